@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from monitoring.metrics import metrics
+
+
+class HedgedGenerator:
+    def __init__(self, deadline, max_pending=8):
+        """
+        Bounds the time until an email is available: the LLM gets deadline seconds, then a fallback
+        (eg. render_template_email) is used. The LLM request keeps running, its late result is handed
+        to an optional callback so the fallback can be replaced or followed up.
+
+        Args:
+            deadline (float): Seconds to wait for the LLM.
+            max_pending (int): Maximum number of running LLM requests. While the LLM is that far behind,
+                the fallback is used right away instead of queueing more requests.
+        """
+        self.deadline = deadline
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="llm-hedge")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def generate(self, generate, fallback, on_late=None):
+        """
+        Runs generate with the deadline.
+
+        Args:
+            generate (callable): Returns the LLM text or None in case of error.
+            fallback (callable): Returns the text used if generate fails or misses the deadline.
+            on_late (callable): Called with the LLM text if it arrives after the fallback was used.
+
+        Returns:
+            tuple: (text, fallback_used)
+        """
+        with self._lock:
+            busy = self._pending >= self.max_pending
+            if not busy:
+                self._pending += 1
+        if busy:
+            metrics.inc("llm_hedge_total", result="fallback_busy")
+            return fallback(), True
+
+        future = self._executor.submit(generate)
+        future.add_done_callback(self._finished)
+        try:
+            content = future.result(timeout=self.deadline)
+        except TimeoutError:
+            print(f"LLM hat nicht innerhalb von {self.deadline:g} s geantwortet, verwende Vorlage.")
+            metrics.inc("llm_hedge_total", result="fallback_timeout")
+            if on_late is not None:
+                future.add_done_callback(lambda done: self._deliver_late(done, on_late))
+            return fallback(), True
+        except Exception as e:
+            print(f"Fehler bei der LLM-Anfrage, verwende Vorlage: {e}")
+            content = None
+
+        if not content:
+            metrics.inc("llm_hedge_total", result="fallback_error")
+            return fallback(), True
+        metrics.inc("llm_hedge_total", result="llm")
+        return content, False
+
+    def _deliver_late(self, future, on_late):
+        if future.exception() is not None or not future.result():
+            return
+        metrics.inc("llm_hedge_total", result="late")
+        try:
+            on_late(future.result())
+        except Exception as e:
+            print(f"Fehler bei der Verarbeitung der verspäteten LLM-Antwort: {e}")
+
+    def close(self, wait=True):
+        """
+        Stops the worker threads, with wait=True the running LLM requests (and their late callbacks) are finished first.
+        """
+        self._executor.shutdown(wait=wait)
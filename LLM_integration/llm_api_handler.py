@@ -1,43 +1,175 @@
 import os
-import yaml
-from dotenv import load_dotenv
-import google.generativeai as genai
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import load_config
+from LLM_integration.prompts import estimate_tokens
+from LLM_integration.rate_limiter import RateLimiter
+from monitoring.metrics import metrics
+
+
+def _is_retryable(error):
+    """
+    Returns True for errors worth retrying: rate limits (429) and server errors (5xx).
+    """
+    code = getattr(error, "code", None)
+    if callable(code):  # grpc errors expose the code as method
+        code = None
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
 
 class LLMApiHandler:
-    def __init__(self, model_name):
+    def __init__(self, model_name, generation_config=None, cache=None,
+                 requests_per_minute=None, tokens_per_minute=None, max_retries=3):
         """
         Initializes the LLM API handler for Google Gemini.
 
         Args:
             model_name (str): The name of the Gemini model to be used (eg "gemini-pro").
+            generation_config (dict): Optional generation settings (eg. {"temperature": 0.2}).
+            cache (LLMResponseCache): Optional response cache, None disables caching.
+            requests_per_minute (int): Request budget shared by all concurrent calls, None for no limit.
+            tokens_per_minute (int): Budget of estimated prompt tokens per minute, None for no limit.
+            max_retries (int): Number of retries with exponential backoff on 429/5xx errors.
         """
+        # the SDKs are imported on first use, they dominate the startup time of the CLI
+        from dotenv import load_dotenv
+        import google.generativeai as genai
+
         load_dotenv()
         api_key = os.environ.get("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("The environment variable GEMINI_API_KEY is not set.")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.cache = cache
+        self.max_retries = max_retries
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.model = genai.GenerativeModel(model_name, generation_config=generation_config)
 
     def generate_response(self, prompt):
         """
         Sends a prompt to the Google Gemini API and returns the response.
+        Identical requests are answered from the cache if one is configured.
         Args:
             prompt (str): The prompt to be sent to Gemini.
         Returns:
             str: The generated response of the LLM or None in case of error.
         """
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            print(f"Error interacting with the Google Gemini API: {e}")
-            return None
+        metrics.observe("llm_prompt_chars", len(prompt), model=self.model_name)
+        with metrics.timer("llm_generate_response_seconds", model=self.model_name):
+            if self.cache is None:
+                response = self._generate(prompt)
+            else:
+                key = self.cache.make_key(self.model_name, prompt, self.generation_config)
+                response = self.cache.get_or_compute(key, lambda: self._generate(prompt))
+        if response is not None:
+            metrics.observe("llm_response_chars", len(response), model=self.model_name)
+        return response
+
+    def _generate(self, prompt):
+        tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                with metrics.timer("llm_api_seconds", model=self.model_name):
+                    response = self.model.generate_content(prompt)
+                metrics.inc("llm_api_requests_total", model=self.model_name, result="ok")
+                metrics.inc("llm_prompt_tokens_estimated_total", tokens, model=self.model_name)
+                return response.text
+            except Exception as e:
+                metrics.inc("llm_api_requests_total", model=self.model_name, result=type(e).__name__)
+                if attempt < self.max_retries and _is_retryable(e):
+                    delay = min(2 ** attempt, 30) + random.uniform(0, 1)
+                    print(f"Google Gemini API busy ({e}), retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+                    continue
+                print(f"Error interacting with the Google Gemini API: {e}")
+                return None
+
+    def generate_response_stream(self, prompt):
+        """
+        Sends a prompt to the Google Gemini API and yields the response text in chunks as they arrive.
+        Cached responses are yielded as a single chunk, complete responses are added to the cache.
+        Args:
+            prompt (str): The prompt to be sent to Gemini.
+        Yields:
+            str: Text chunks of the generated response. Nothing is yielded in case of error.
+        """
+        metrics.observe("llm_prompt_chars", len(prompt), model=self.model_name)
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, prompt, self.generation_config)
+            cached_response = self.cache.get(key)
+            if cached_response is not None:
+                yield cached_response
+                return
+
+        tokens = estimate_tokens(prompt)
+        chunks = []
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    chunks.append(chunk.text)
+                    yield chunk.text
+                metrics.inc("llm_api_requests_total", model=self.model_name, result="ok")
+                break
+            except Exception as e:
+                metrics.inc("llm_api_requests_total", model=self.model_name, result=type(e).__name__)
+                # only retry if nothing was yielded yet
+                if not chunks and attempt < self.max_retries and _is_retryable(e):
+                    delay = min(2 ** attempt, 30) + random.uniform(0, 1)
+                    print(f"Google Gemini API busy ({e}), retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+                    continue
+                print(f"Error interacting with the Google Gemini API: {e}")
+                return
+
+        if chunks:
+            response = "".join(chunks)
+            metrics.observe("llm_response_chars", len(response), model=self.model_name)
+            if self.cache is not None:
+                self.cache.put(key, response)
+
+    def generate_many(self, prompts, max_workers=4):
+        """
+        Sends several prompts concurrently, within the requests/tokens per minute budget.
+
+        Args:
+            prompts (list): The prompts to be sent to Gemini.
+            max_workers (int): Maximum number of concurrent requests.
+
+        Returns:
+            list: The responses in the order of the prompts (None for failed requests).
+        """
+        responses = [None] * len(prompts)
+        for index, response in self.generate_many_as_completed(prompts, max_workers):
+            responses[index] = response
+        return responses
+
+    def generate_many_as_completed(self, prompts, max_workers=4):
+        """
+        Sends several prompts concurrently and yields the responses as they complete.
+
+        Args:
+            prompts (list): The prompts to be sent to Gemini.
+            max_workers (int): Maximum number of concurrent requests.
+
+        Yields:
+            tuple: (index of the prompt, response or None in case of error)
+        """
+        if not prompts:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+            futures = {executor.submit(self.generate_response, prompt): index for index, prompt in enumerate(prompts)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
 
 if __name__ == "__main__":
     # For Testin (OpenAI API-Key und model name required in config.yaml)
-    config_path = os.path.join(os.getcwd(), "config", "config.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = load_config()
     gemini_model = config.get("llm_model")
 
     warning_details = {
@@ -0,0 +1,81 @@
+from LLM_integration.prompts import (
+    chunk_incidents,
+    generate_chunk_summary_prompt,
+    generate_einsatz_email_prompt,
+    generate_reduce_email_prompt,
+)
+
+
+def build_email_prompts(road_id, roadworks_data, warnings_data, closures_data, chunk_size=40, compact=True,
+                        token_budget=None, hotspots=None, trend=None, nearby=None):
+    """
+    Builds the prompts of a deployment email without calling the LLM (see generate_einsatz_email_map_reduce).
+    nearby are incidents of other highways around the patrol, see generate_einsatz_email_prompt.
+
+    Returns:
+        tuple: (prompt, chunk_prompts), prompt is the single email prompt for highways with no more than
+            chunk_size incidents, otherwise chunk_prompts holds the summary prompts of the chunks.
+    """
+    chunks = chunk_incidents(roadworks_data, warnings_data, closures_data, chunk_size) if chunk_size else []
+    if len(chunks) <= 1:
+        return generate_einsatz_email_prompt(road_id, roadworks_data, warnings_data, closures_data,
+                                             compact=compact, token_budget=token_budget, hotspots=hotspots,
+                                             trend=trend, nearby=nearby), None
+
+    return None, [
+        generate_chunk_summary_prompt(road_id, i + 1, len(chunks), chunk["roadworks"], chunk["warning"], chunk["closure"], compact)
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def generate_email_from_prompts(llm_handler, road_id, prompt, chunk_prompts, max_workers=4, hotspots=None, trend=None,
+                                nearby=None):
+    """
+    Generates the deployment email from the prompts of build_email_prompts.
+
+    Returns:
+        str: The generated email or None in case of error.
+    """
+    if prompt is not None:
+        return llm_handler.generate_response(prompt)
+
+    print(f"Fasse {len(chunk_prompts)} Abschnitte der {road_id} parallel zusammen...")
+    summaries = llm_handler.generate_many(chunk_prompts, max_workers)
+
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+    if len(summaries) < len(chunk_prompts):
+        print(f"Warnung: nur {len(summaries)} von {len(chunk_prompts)} Abschnitten der {road_id} konnten zusammengefasst werden.")
+
+    return llm_handler.generate_response(generate_reduce_email_prompt(road_id, summaries, hotspots, trend, nearby))
+
+
+def generate_einsatz_email_map_reduce(llm_handler, road_id, roadworks_data, warnings_data, closures_data,
+                                      chunk_size=40, max_workers=4, compact=True, token_budget=None, hotspots=None,
+                                      trend=None):
+    """
+    Generates the deployment email of a highway in map-reduce fashion.
+    The incidents are split into bounded chunks which are summarized in parallel,
+    a short reduce prompt then writes the final email from the summaries.
+    Highways with no more than chunk_size incidents use the single prompt.
+
+    Args:
+        llm_handler (LLMApiHandler): Handler used for all LLM calls.
+        road_id (str): ID of the highway (eg. "A8").
+        roadworks_data (list): List of dictionaries with roadwork informations.
+        warnings_data (list): List of dictionaries with warning informations.
+        closures_data (list): List of dictionaries with closure informations.
+        chunk_size (int): Maximum number of incidents per chunk, None always uses the single prompt.
+        max_workers (int): Maximum number of concurrent chunk summaries.
+        compact (bool): Only pass the operational fields of each incident.
+        token_budget (int): Token budget of the single prompt (not used for the chunks).
+        hotspots (list): Optional pre-ranked deployment candidates, see generate_einsatz_email_prompt.
+        trend (str): Optional summary of the recent history of the highway, passed to the final email prompt.
+
+    Returns:
+        str: The generated email or None in case of error.
+    """
+    prompt, chunk_prompts = build_email_prompts(road_id, roadworks_data, warnings_data, closures_data,
+                                                chunk_size, compact, token_budget, hotspots, trend)
+    return generate_email_from_prompts(llm_handler, road_id, prompt, chunk_prompts, max_workers, hotspots, trend)
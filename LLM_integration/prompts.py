@@ -1,21 +1,108 @@
 import json
+from autobahn_api.incidents import as_dict
+from monitoring.metrics import metrics
 
-def _format_data_for_llm(data, title):
+# Fields kept per service in compact mode, everything else (extent, identifier, icon, ...) is noise for the LLM
+COMPACT_FIELDS = {
+    "roadworks": ("title", "subtitle", "description", "isBlocked", "future", "startTimestamp", "point"),
+    "warning": ("title", "subtitle", "description", "isBlocked", "future", "startTimestamp", "point",
+                "delayTimeValue", "averageSpeed", "abnormalTrafficType"),
+    "closure": ("title", "subtitle", "description", "isBlocked", "future", "startTimestamp", "point",
+                "routeRecommendation"),
+}
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of LLM tokens of a text (about 4 characters per token).
+    """
+    return (len(text) + 3) // 4
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact_description(lines, seen):
+    """
+    Removes empty and duplicated lines of a description, including lines repeating title/subtitle.
+    """
+    compact_lines = []
+    for line in lines:
+        line = str(line).strip()
+        if line and line not in seen:
+            seen.add(line)
+            compact_lines.append(line)
+    return " / ".join(compact_lines)
+
+
+def _format_item(item, fields=None):
+    item = as_dict(item)
+    if fields is None:
+        return [f"{key}: {value}" for key, value in item.items() if value is not None]
+
+    seen = {str(item.get(key, "")).strip() for key in ("title", "subtitle")}
+    item_details = []
+    for key in fields:
+        value = item.get(key)
+        if key == "description" and isinstance(value, list):
+            value = _compact_description(value, seen)
+        if not _is_empty(value):
+            item_details.append(f"{key}: {value}")
+    return item_details
+
+
+def _format_data_for_llm(data, title, fields=None, token_budget=None):
     """
     Format a list of dictionaries into a readable string for the LLM.
     Ensures that the input is a list and not empty.
+
+    Args:
+        data (list): List of dictionaries with incident informations (or normalized Incidents).
+        title (str): Title of a single item (eg. "Baustelle").
+        fields (tuple): Compact mode, only these keys are kept and empty values are removed.
+        token_budget (int): Maximum number of estimated tokens, further items are left out.
     """
     if not data or not isinstance(data, list):
         return f"Keine {title} Daten verfügbar."
 
     formatted_items = []
-    for i, item in enumerate(data):
-        item_details = [f"{key}: {value}" for key, value in item.items() if value is not None]
-        formatted_items.append(f"--- {title} #{i+1} ---\n" + "\n".join(item_details))
-    return "\n\n".join(formatted_items)
+    used_tokens = 0
+    left_out = 0
+    with metrics.timer("prompt_format_seconds", section=title):
+        for i, item in enumerate(data):
+            item_details = _format_item(item, fields)
+            formatted_item = f"--- {title} #{i+1} ---\n" + "\n".join(item_details)
+            if token_budget is not None:
+                used_tokens += estimate_tokens(formatted_item) + 1
+                # keep room for the note about left out items
+                if used_tokens + 20 > token_budget:
+                    left_out = len(data) - i
+                    formatted_items.append(f"... {left_out} weitere {title} Einträge aus Platzgründen ausgelassen.")
+                    break
+            formatted_items.append(formatted_item)
+        formatted = "\n\n".join(formatted_items)
+
+    metrics.inc("prompt_items_total", len(data) - left_out, section=title)
+    metrics.inc("prompt_items_left_out_total", left_out, section=title)
+    metrics.observe("prompt_section_chars", len(formatted), section=title)
+    return formatted
+
+
+def _format_hotspots_for_llm(hotspots):
+    """
+    Format pre-ranked deployment candidates (distance_km, incident) into a short list for the LLM.
+    """
+    lines = []
+    for rank, (distance_km, item) in enumerate(hotspots, start=1):
+        item = as_dict(item)
+        location = " | ".join(part for part in (item.get("title"), item.get("subtitle")) if part)
+        lines.append(f"{rank}. {location} ({distance_km:.1f} km entfernt)")
+    return "\n".join(lines)
 
 
-def generate_einsatz_email_prompt(road_id, roadworks_data, warnings_data, closures_data):
+def generate_einsatz_email_prompt(road_id, roadworks_data, warnings_data, closures_data, compact=False, token_budget=None,
+                                  hotspots=None, trend=None, nearby=None):
     """
     Generates a prompt for the LLM to create an email to the highway patrol regarding potential incidents.
 
@@ -24,27 +111,43 @@ def generate_einsatz_email_prompt(road_id, roadworks_data, warnings_data, closur
         roadworks_data (list): List of dictionaries with roadwork informations.
         warnings_data (list): List of dictionaries with warning informations.
         closures_data (list): List of dictionaries with closure informations.
+        compact (bool): Only pass the operational fields of each incident (see COMPACT_FIELDS).
+        token_budget (int): Maximum estimated tokens of the whole prompt. Closures are filled in first,
+            then warnings, then roadworks.
+        hotspots (list): Optional deployment candidates as (distance_km, incident) tuples, nearest first
+            (see SpatialIndex.nearest).
+        trend (str): Optional summary of the recent history of the highway (see IncidentArchive.trend_summary).
+        nearby (list): Optional incidents of other highways around the patrol as (distance_km, incident) tuples,
+            nearest first (see SpatialIndex.radius_query).
 
     Returns:
         str: Full prompt for the LLM.
     """
-    roadworks_str = _format_data_for_llm(roadworks_data, "Baustelle")
-    warnings_str = _format_data_for_llm(warnings_data, "Verkehrsmeldung")
-    closures_str = _format_data_for_llm(closures_data, "Sperrung")
+    def fields(service):
+        return COMPACT_FIELDS[service] if compact else None
 
-    prompt = f"""
-Du bist ein KI-Assistent für die Autobahnpolizei. Deine Aufgabe ist es, die aktuelle Verkehrslage auf der Autobahn {road_id} zu analysieren und eine prägnante, handlungsorientierte E-Mail für die Bereitschaft zu formulieren.
+    hotspots_str = _format_hotspots_for_llm(hotspots) if hotspots else ""
+    nearby_str = _format_hotspots_for_llm(nearby) if nearby else ""
 
-**Ziel der E-Mail:**
-Informiere die Autobahnpolizei-Bereitschaft über relevante Vorkommnisse (Baustellen, Verkehrsmeldungen, Sperrungen) auf der Autobahn {road_id}, die möglicherweise einen sofortigen Einsatz erfordern oder eine besondere Aufmerksamkeit verdienen.
-Schlage zudem vor, wohin die Bereitschaft aktuell fahren könnte und was dort zu tun wäre.
+    remaining = None
+    if token_budget is not None:
+        remaining = token_budget - estimate_tokens(_build_einsatz_email_prompt(road_id, "", "", "", hotspots_str, trend,
+                                                                                nearby_str))
+
+    closures_str = _format_data_for_llm(closures_data, "Sperrung", fields("closure"), remaining)
+    if remaining is not None:
+        remaining -= estimate_tokens(closures_str)
+    warnings_str = _format_data_for_llm(warnings_data, "Verkehrsmeldung", fields("warning"), remaining)
+    if remaining is not None:
+        remaining -= estimate_tokens(warnings_str)
+    roadworks_str = _format_data_for_llm(roadworks_data, "Baustelle", fields("roadworks"), remaining)
+
+    return _build_einsatz_email_prompt(road_id, roadworks_str, warnings_str, closures_str, hotspots_str, trend,
+                                       nearby_str)
 
-**Priorisiere folgende Informationen in deiner Analyse und E-Mail:**
-1.  **Sperrungen:** Sind Vollsperrungen oder größere Teilsperrungen vorhanden? Wo genau und wie lange? Was ist die empfohlene Umleitung?
-2.  **Verkehrsmeldungen:** Gibt es Unfälle, gefährliche Objekte auf der Fahrbahn, Falschfahrer, Staus mit hohem Rückstaupotenzial oder andere akute Gefahren? Wo genau ist der Vorfall und welche Maßnahmen sind denkbar (z.B. Absicherung, Bergung, Verkehrsleitung)?
-3.  **Baustellen:** Gibt es größere Baustellen, die zu erheblichen Verkehrsbehinderungen führen oder eine besondere Überwachung erfordern (z.B. an Unfallschwerpunkten)?
 
-**Instruktionen für die E-Mail:**
+def _email_instructions(road_id):
+    return f"""**Instruktionen für die E-Mail:**
 * **Betreffzeile:** Beginne mit "Einsatzhinweis {road_id}:" gefolgt von einer kurzen, prägnanten Zusammenfassung der wichtigsten Punkte (z.B. "Einsatzhinweis A8: Unfall und Baustelle bei Stuttgart").
 * **Anrede:** "Sehr geehrte Kolleginnen und Kollegen der Autobahnpolizei-Bereitschaft,"
 * **Einleitung:** Kurze Zusammenfassung der aktuellen Lage.
@@ -55,7 +158,63 @@ Schlage zudem vor, wohin die Bereitschaft aktuell fahren könnte und was dort zu
     * **Konkrete Empfehlung für den Einsatzort und die Aufgabe der Bereitschaft.**
 * **Abschluss:** "Mit freundlichen Grüßen,"
 * **Signatur:** "Ihr KI-Verkehrsassistent"
+"""
+
+
+def _hotspots_section(hotspots_str):
+    if not hotspots_str:
+        return ""
+    return f"""
+**Vorausgewählte Einsatzorte, nach Entfernung zur aktuellen Position der Bereitschaft sortiert:**
+Berücksichtige diese Reihenfolge bei deinem Vorschlag, wohin die Bereitschaft fahren könnte.
+
+<Einsatzorte>
+{hotspots_str}
+</Einsatzorte>
+"""
+
+
+def _nearby_section(nearby_str):
+    if not nearby_str:
+        return ""
+    return f"""
+**Weitere Meldungen auf anderen Autobahnen im Umkreis der Bereitschaft, nach Entfernung sortiert:**
+Berücksichtige diese Meldungen, wenn sie dringender sind als die Vorkommnisse auf der Autobahn selbst.
+
+<Umkreis>
+{nearby_str}
+</Umkreis>
+"""
+
+
+def _trend_section(trend):
+    if not trend:
+        return ""
+    return f"""
+**Entwicklung der letzten Tage (aus dem lokalen Archiv):**
+Nutze diese Historie, um wiederkehrende Brennpunkte zu erkennen.
+
+<Historie>
+{trend}
+</Historie>
+"""
+
+
+def _build_einsatz_email_prompt(road_id, roadworks_str, warnings_str, closures_str, hotspots_str="", trend=None,
+                                nearby_str=""):
+    prompt = f"""
+Du bist ein KI-Assistent für die Autobahnpolizei. Deine Aufgabe ist es, die aktuelle Verkehrslage auf der Autobahn {road_id} zu analysieren und eine prägnante, handlungsorientierte E-Mail für die Bereitschaft zu formulieren.
+
+**Ziel der E-Mail:**
+Informiere die Autobahnpolizei-Bereitschaft über relevante Vorkommnisse (Baustellen, Verkehrsmeldungen, Sperrungen) auf der Autobahn {road_id}, die möglicherweise einen sofortigen Einsatz erfordern oder eine besondere Aufmerksamkeit verdienen.
+Schlage zudem vor, wohin die Bereitschaft aktuell fahren könnte und was dort zu tun wäre.
+
+**Priorisiere folgende Informationen in deiner Analyse und E-Mail:**
+1.  **Sperrungen:** Sind Vollsperrungen oder größere Teilsperrungen vorhanden? Wo genau und wie lange? Was ist die empfohlene Umleitung?
+2.  **Verkehrsmeldungen:** Gibt es Unfälle, gefährliche Objekte auf der Fahrbahn, Falschfahrer, Staus mit hohem Rückstaupotenzial oder andere akute Gefahren? Wo genau ist der Vorfall und welche Maßnahmen sind denkbar (z.B. Absicherung, Bergung, Verkehrsleitung)?
+3.  **Baustellen:** Gibt es größere Baustellen, die zu erheblichen Verkehrsbehinderungen führen oder eine besondere Überwachung erfordern (z.B. an Unfallschwerpunkten)?
 
+{_email_instructions(road_id)}
 **Rohdaten für die Analyse der Autobahn {road_id}:**
 
 <Baustellen>
@@ -69,12 +228,127 @@ Schlage zudem vor, wohin die Bereitschaft aktuell fahren könnte und was dort zu
 <Sperrungen>
 {closures_str}
 </Sperrungen>
-
+{_hotspots_section(hotspots_str)}{_nearby_section(nearby_str)}{_trend_section(trend)}
 Bitte generiere jetzt die komplette E-Mail im angegebenen Format. Wenn keine relevanten Vorkommnisse vorliegen, formuliere eine entsprechende kurze E-Mail.
 """
     return prompt
 
 
+def chunk_incidents(roadworks_data, warnings_data, closures_data, max_items=40):
+    """
+    Splits the incidents of a highway into bounded chunks for map-reduce prompting.
+    Incidents of the same segment/direction (subtitle) are kept together where possible.
+
+    Args:
+        roadworks_data (list): List of dictionaries with roadwork informations.
+        warnings_data (list): List of dictionaries with warning informations.
+        closures_data (list): List of dictionaries with closure informations.
+        max_items (int): Maximum number of incidents per chunk.
+
+    Returns:
+        list: Chunks as dictionaries {"roadworks": [...], "warning": [...], "closure": [...]}.
+    """
+    groups = {}
+    for service, data in (("closure", closures_data), ("warning", warnings_data), ("roadworks", roadworks_data)):
+        for item in data or []:
+            groups.setdefault(as_dict(item).get("subtitle") or "", []).append((service, item))
+
+    chunks = []
+    current = []
+    for group in groups.values():
+        # start a new chunk if the segment fits into a chunk of its own but not into the current one
+        if current and len(group) <= max_items and len(current) + len(group) > max_items:
+            chunks.append(current)
+            current = []
+        for entry in group:
+            if len(current) >= max_items:
+                chunks.append(current)
+                current = []
+            current.append(entry)
+    if current:
+        chunks.append(current)
+
+    result = []
+    for chunk in chunks:
+        chunk_dict = {"roadworks": [], "warning": [], "closure": []}
+        for service, item in chunk:
+            chunk_dict[service].append(item)
+        result.append(chunk_dict)
+    return result
+
+
+def generate_chunk_summary_prompt(road_id, chunk_index, chunk_count, roadworks_data, warnings_data, closures_data, compact=True):
+    """
+    Generates the map prompt: a short operational summary of one chunk of a highway's incidents.
+
+    Args:
+        road_id (str): ID of the highway (eg. "A8").
+        chunk_index (int): Index of the chunk (starting at 1).
+        chunk_count (int): Total number of chunks.
+        roadworks_data (list): Roadworks of the chunk.
+        warnings_data (list): Warnings of the chunk.
+        closures_data (list): Closures of the chunk.
+        compact (bool): Only pass the operational fields of each incident.
+
+    Returns:
+        str: Prompt for the LLM.
+    """
+    def fields(service):
+        return COMPACT_FIELDS[service] if compact else None
+
+    roadworks_str = _format_data_for_llm(roadworks_data, "Baustelle", fields("roadworks"))
+    warnings_str = _format_data_for_llm(warnings_data, "Verkehrsmeldung", fields("warning"))
+    closures_str = _format_data_for_llm(closures_data, "Sperrung", fields("closure"))
+
+    return f"""
+Du bist ein KI-Assistent für die Autobahnpolizei. Dies ist Teil {chunk_index} von {chunk_count} der aktuellen Meldungen auf der Autobahn {road_id}.
+Fasse die einsatzrelevanten Vorkommnisse dieses Teils in höchstens 10 Stichpunkten zusammen, nach Dringlichkeit sortiert (Sperrungen, akute Gefahren, Staus, größere Baustellen).
+Nenne zu jedem Stichpunkt Art, genauen Ort/Abschnitt mit Fahrtrichtung, Auswirkung und eine mögliche Aufgabe der Bereitschaft. Lasse unbedeutende Meldungen weg. Schreibe keine E-Mail.
+
+<Baustellen>
+{roadworks_str}
+</Baustellen>
+
+<Verkehrsmeldungen>
+{warnings_str}
+</Verkehrsmeldungen>
+
+<Sperrungen>
+{closures_str}
+</Sperrungen>
+"""
+
+
+def generate_reduce_email_prompt(road_id, chunk_summaries, hotspots=None, trend=None, nearby=None):
+    """
+    Generates the reduce prompt: the deployment email based on the summaries of all chunks.
+
+    Args:
+        road_id (str): ID of the highway (eg. "A8").
+        chunk_summaries (list): Summaries generated from the chunk summary prompts.
+        hotspots (list): Optional deployment candidates as (distance_km, incident) tuples, nearest first.
+        trend (str): Optional summary of the recent history of the highway.
+        nearby (list): Optional incidents of other highways around the patrol, nearest first.
+
+    Returns:
+        str: Prompt for the LLM.
+    """
+    summaries_str = "\n\n".join(f"--- Teil {i+1} ---\n{summary.strip()}" for i, summary in enumerate(chunk_summaries))
+
+    return f"""
+Du bist ein KI-Assistent für die Autobahnpolizei. Die aktuellen Meldungen auf der Autobahn {road_id} wurden abschnittsweise vorausgewertet.
+Formuliere auf Basis dieser Zusammenfassungen eine prägnante, handlungsorientierte E-Mail für die Bereitschaft.
+Wähle die wichtigsten Vorkommnisse der gesamten Autobahn aus und schlage vor, wohin die Bereitschaft aktuell fahren könnte und was dort zu tun wäre.
+
+{_email_instructions(road_id)}
+**Zusammenfassungen der Abschnitte der Autobahn {road_id}:**
+
+{summaries_str}
+{_hotspots_section(_format_hotspots_for_llm(hotspots) if hotspots else "")}{_nearby_section(_format_hotspots_for_llm(nearby) if nearby else "")}{_trend_section(trend)}
+Bitte generiere jetzt die komplette E-Mail im angegebenen Format.
+"""
+
+
 def generate_summary_prompt(text_to_summarize):
     """
     Generates a prompt for the LLM to summarize a given text.
@@ -117,4 +391,9 @@ if __name__ == "__main__":
     # Test with empty data
     no_data_prompt = generate_einsatz_email_prompt("A8", [], [], [])
     print("\n--- Prompt ohne Daten ---")
-    print(no_data_prompt)
\ No newline at end of file
+    print(no_data_prompt)
+
+    # Test compact mode with a token budget
+    compact_prompt = generate_einsatz_email_prompt("A8", example_roadworks, example_warnings, example_closures, compact=True, token_budget=1000)
+    print(f"\n--- Kompakter Prompt ({estimate_tokens(compact_prompt)} statt {estimate_tokens(full_prompt)} Tokens) ---")
+    print(compact_prompt)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """
+        Sliding-window limiter for requests and tokens per minute, shared by all threads of a handler.
+
+        Args:
+            requests_per_minute (int): Maximum number of requests per minute, None for no limit.
+            tokens_per_minute (int): Maximum number of (estimated) tokens per minute, None for no limit.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._window = deque()  # (timestamp, tokens) of the requests of the last 60 seconds
+        self._window_tokens = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._window and now - self._window[0][0] >= 60:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _wait_time(self, now, tokens):
+        waits = []
+        if self.requests_per_minute and len(self._window) >= self.requests_per_minute:
+            waits.append(60 - (now - self._window[0][0]))
+        if self.tokens_per_minute and self._window and self._window_tokens + tokens > self.tokens_per_minute:
+            # wait until enough tokens left the window (a single request above the limit is let through alone)
+            freed = self._window_tokens + tokens - self.tokens_per_minute
+            for timestamp, request_tokens in self._window:
+                freed -= request_tokens
+                if freed <= 0:
+                    waits.append(60 - (now - timestamp))
+                    break
+        return max(waits, default=0)
+
+    def acquire(self, tokens=0):
+        """
+        Blocks until a request with the given number of tokens fits into both budgets and records it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._window.append((now, tokens))
+                    self._window_tokens += tokens
+                    return
+            time.sleep(min(wait, 1.0))
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from common.in_flight import InFlight
+from common.sqlite import execute, prepare
+from monitoring.metrics import metrics
+
+
+class LLMResponseCache:
+    def __init__(self, db_path=None, ttl=900, max_entries=256):
+        """
+        Content-addressed cache for LLM responses: an in-memory LRU backed by a SQLite store.
+
+        Args:
+            db_path (str): Path of the SQLite database. None keeps the cache in memory only.
+            ttl (int): Time-to-live of a response in seconds.
+            max_entries (int): Maximum number of responses kept in memory.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        if self.db_path:
+            prepare(self.db_path)
+            execute(self.db_path, "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)")
+            execute(self.db_path, "CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (created_at)")
+        # expired responses are removed on startup and then at most once per ttl (see put)
+        self._last_eviction = time.time()
+        self.evict_expired()
+
+    @staticmethod
+    def make_key(model_name, prompt, generation_config=None):
+        """
+        Returns the cache key of a request: a hash of model name, prompt and generation settings.
+        """
+        serialized = json.dumps([model_name, prompt, generation_config], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at):
+        return (time.time() - created_at) >= self.ttl
+
+    def _remember(self, key, response, created_at):
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key, count=True):
+        """
+        Returns the cached response for a key or None if missing or expired.
+        With count=True the lookup is recorded in the hit/miss counters.
+        """
+        response = self._lookup(key)
+        if count:
+            with self._lock:
+                if response is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            metrics.inc("llm_cache_total", result="hit" if response is not None else "miss")
+        return response
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._is_expired(entry[1]):
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                del self._entries[key]
+
+        if not self.db_path:
+            return None
+        try:
+            rows = execute(self.db_path, "SELECT response, created_at FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"Error reading the LLM response cache: {e}")
+            return None
+        if not rows:
+            return None
+        row = rows[0]
+        if self._is_expired(row[1]):
+            try:
+                execute(self.db_path, "DELETE FROM responses WHERE key = ? AND created_at = ?", (key, row[1]))
+            except sqlite3.Error as e:
+                print(f"Error cleaning up the LLM response cache: {e}")
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def put(self, key, response):
+        """
+        Stores a response in memory and in the SQLite store.
+        """
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, response, created_at)
+            evict = created_at - self._last_eviction >= self.ttl
+            if evict:
+                self._last_eviction = created_at
+        if evict:
+            self.evict_expired()
+        if not self.db_path:
+            return
+        try:
+            execute(self.db_path, "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, response, created_at))
+        except sqlite3.Error as e:
+            print(f"Error writing the LLM response cache: {e}")
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached response or calls compute() once, concurrent calls with the same key
+        wait for the running computation instead of calling the LLM themselves (single-flight).
+        Responses that are None (errors) are not cached.
+
+        Args:
+            key (str): Cache key, see make_key().
+            compute (callable): Function returning the response.
+
+        Returns:
+            str: The response or None in case of error.
+        """
+        response = self.get(key, count=False)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            metrics.inc("llm_cache_total", result="hit")
+            return response
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = InFlight()
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+        metrics.inc("llm_cache_total", result="miss" if leader else "deduplicated")
+
+        if not leader:
+            in_flight.event.wait()
+            return in_flight.result
+
+        try:
+            in_flight.result = compute()
+            if in_flight.result is not None:
+                self.put(key, in_flight.result)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.event.set()
+        return in_flight.result
+
+    def evict_expired(self):
+        """
+        Removes all expired responses from memory and from the SQLite store.
+        """
+        with self._lock:
+            for key in [key for key, (_, created_at) in self._entries.items() if self._is_expired(created_at)]:
+                del self._entries[key]
+        if not self.db_path:
+            return
+        try:
+            execute(self.db_path, "DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl,))
+        except sqlite3.Error as e:
+            print(f"Error cleaning up the LLM response cache: {e}")
+
+    def stats(self):
+        """
+        Returns the hit/miss counters.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "deduplicated": self.deduplicated, "entries": len(self._entries)}
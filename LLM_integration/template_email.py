@@ -0,0 +1,102 @@
+from autobahn_api.incidents import as_dict
+
+SERVICE_NAMES = {"closure": "Sperrung", "warning": "Verkehrsmeldung", "roadworks": "Baustelle"}
+
+
+def _plural(count, singular, plural):
+    return f"{count} {singular if count == 1 else plural}"
+
+
+def _is_true(value):
+    return value is True or str(value).lower() == "true"
+
+
+def _delay(item):
+    try:
+        return float(item.get("delayTimeValue") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _format_line(service, item, description_lines=2, max_chars=160):
+    location = " | ".join(part for part in (item.get("title"), item.get("subtitle")) if part) or "Ort unbekannt"
+    details = []
+    if _is_true(item.get("isBlocked")):
+        details.append("gesperrt")
+    if _delay(item):
+        details.append(f"{_delay(item):.0f} min Verzögerung")
+    details.extend(str(line).strip() for line in (item.get("description") or [])[:description_lines] if str(line).strip())
+    line = f"* {SERVICE_NAMES[service]}: {location}"
+    if details:
+        text = "; ".join(details)
+        line += f" – {text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + '…'}"
+    route = item.get("routeRecommendation")
+    if route:
+        line += f"\n    * Umleitung: {'; '.join(str(part) for part in route)}"
+    return line
+
+
+def render_template_email(road_id, roadworks_data, warnings_data, closures_data, hotspots=None, max_items=10):
+    """
+    Renders a deployment email from the incidents without the LLM, eg. as fallback if the LLM doesn't answer in time.
+    The output is deterministic and has the same format as the generated emails (subject line "Einsatzhinweis ...").
+
+    Args:
+        road_id (str): ID of the highway (eg. "A8").
+        roadworks_data (list): Roadworks as dictionaries or Incidents.
+        warnings_data (list): Warnings as dictionaries or Incidents.
+        closures_data (list): Closures as dictionaries or Incidents.
+        hotspots (list): Optional deployment candidates as (distance_km, incident) tuples, nearest first.
+        max_items (int): Maximum number of listed incidents. Closures come first, then blocking
+            and delayed warnings, then blocking roadworks.
+
+    Returns:
+        str: The email including the subject line.
+    """
+    closures = [as_dict(item) for item in closures_data or []]
+    warnings = sorted((as_dict(item) for item in warnings_data or []),
+                      key=lambda item: (not _is_true(item.get("isBlocked")), -_delay(item)))
+    roadworks = sorted((as_dict(item) for item in roadworks_data or []),
+                       key=lambda item: not _is_true(item.get("isBlocked")))
+
+    counts = [(len(closures), "Sperrung", "Sperrungen"), (len(warnings), "Verkehrsmeldung", "Verkehrsmeldungen"),
+              (len(roadworks), "Baustelle", "Baustellen")]
+    parts = [_plural(*count) for count in counts if count[0]]
+    summary = (", ".join(parts[:-1]) + " und " + parts[-1] if len(parts) > 1 else "".join(parts)) or "keine neuen Meldungen"
+
+    items = [("closure", item) for item in closures] + [("warning", item) for item in warnings] + \
+            [("roadworks", item) for item in roadworks]
+    lines = [_format_line(service, item) for service, item in items[:max_items]]
+    if len(items) > max_items:
+        lines.append(f"* ... sowie {len(items) - max_items} weitere Meldung(en).")
+
+    recommendation = "Bitte die Lage vor Ort prüfen."
+    if hotspots:
+        distance_km, item = hotspots[0]
+        item = as_dict(item)
+        location = " | ".join(part for part in (item.get("title"), item.get("subtitle")) if part)
+        recommendation = f"Nächstgelegener Einsatzort: {location} ({distance_km:.1f} km entfernt)."
+    elif closures or warnings:
+        recommendation = "Vorrangig die zuerst genannten Meldungen prüfen und absichern."
+
+    details = "\n".join(lines) if lines else "* Keine Vorkommnisse."
+    return f"""Einsatzhinweis {road_id}: {summary}
+
+Sehr geehrte Kolleginnen und Kollegen der Autobahnpolizei-Bereitschaft,
+
+auf der Autobahn {road_id} liegen aktuell {summary} vor. Diese Kurzfassung wurde automatisch aus den Meldungen der Autobahn GmbH erstellt, da die KI-Auswertung nicht rechtzeitig verfügbar war.
+
+{details}
+
+{recommendation}
+
+Mit freundlichen Grüßen,
+Ihr Verkehrsassistent
+"""
+
+
+if __name__ == "__main__":
+    closures = [{"title": "A8 | Stuttgart - München", "subtitle": "AS Leonberg-Ost - AS Stuttgart-Vaihingen",
+                 "isBlocked": "true", "description": ["Vollsperrung", "Unfall"], "routeRecommendation": ["U12"]}]
+    warnings = [{"title": "A8 | Karlsruhe - Stuttgart", "delayTimeValue": "25", "description": ["Stau"]}]
+    print(render_template_email("A8", [], warnings, closures))
@@ -1,24 +1,190 @@
 import requests
 import json
-import os
-import yaml
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from autobahn_api.resilience import AdaptiveTokenBucket, CircuitBreaker, backoff_delay, parse_retry_after
+from autobahn_api.response_cache import service_for_endpoint
+from config import load_config
+from monitoring.metrics import metrics
 
 class AutobahnApiClient:
-    def __init__(self, base_url):
+    def __init__(self, base_url, max_workers=8, cache=None, timeout=10, max_retries=3, requests_per_second=None,
+                 failure_threshold=5, reset_timeout=30, backoff_base=0.5):
+        """
+        Initializes the Autobahn API client.
+
+        Args:
+            base_url (str): Base URL of the Autobahn API.
+            max_workers (int): Maximum number of concurrent requests used by get_all_data.
+            cache (ResponseCache): Optional response cache, None disables caching.
+            timeout (float): Connect and read timeout of a request in seconds.
+            max_retries (int): Retries of timeouts, connection errors, 429 and 5xx responses.
+            requests_per_second (float): Request rate shared by all threads, adapted on 429. None for no limit.
+            failure_threshold (int): Consecutive failures of a service until its circuit opens. While open,
+                the last cached data is served without asking the API.
+            reset_timeout (float): Seconds until an open circuit lets a trial request through.
+            backoff_base (float): Base delay of the jittered exponential backoff in seconds.
+        """
         self.base_url = base_url.rstrip('/')
+        self.max_workers = max(1, int(max_workers))
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.backoff_base = backoff_base
+        self.rate_limiter = AdaptiveTokenBucket(requests_per_second)
+
+        # one circuit breaker per service (roads, roadworks, warning, closure, details)
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+        # Shared keep-alive session, the connection pool is sized to the number of workers
+        # and grown by the other thread pools using the client (see reserve_connections)
+        self.session = requests.Session()
+        self.pool_size = self.max_workers
+        self._pool_lock = threading.Lock()
+        self._adapter = None
+        self._mount_adapter()
+
+    def _mount_adapter(self):
+        previous, self._adapter = self._adapter, HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        if previous is not None:
+            # closes the idle connections of the replaced pool instead of leaving their sockets to the GC
+            previous.close()
+
+    def reserve_connections(self, workers):
+        """
+        Grows the connection pool by workers connections for another pool of threads sending requests through
+        this client (eg. DetailsFetcher), so concurrent requests don't exceed the pool and lose their keep-alive
+        connection ("Connection pool is full"). Should be called before the threads start sending requests.
+
+        Args:
+            workers (int): Number of additional concurrent requests.
+        """
+        with self._pool_lock:
+            self.pool_size += max(0, int(workers))
+            self._mount_adapter()
+
+    def _breaker(self, service):
+        with self._breakers_lock:
+            breaker = self._breakers.get(service)
+            if breaker is None:
+                breaker = self._breakers[service] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _request(self, url, params, headers, service):
+        """
+        Sends a GET request within the rate limit. Timeouts, connection errors, 429 and 5xx responses
+        are retried with jittered exponential backoff, a Retry-After holds back all requests of the client.
+        Other request errors (eg. too many redirects, invalid URL) are not retried.
+
+        Returns:
+            requests.Response: The response (2xx, 3xx or 4xx other than 429) or None if all attempts failed.
+        """
+        error = None
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with metrics.timer("autobahn_request_seconds", service=service):
+                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.inc("autobahn_errors_total", service=service, error=type(e).__name__)
+                error = e
+            except requests.exceptions.RequestException as e:
+                metrics.inc("autobahn_errors_total", service=service, error=type(e).__name__)
+                print(f"Error retrieving '{url}': {e}")
+                return None
+            else:
+                metrics.inc("autobahn_requests_total", service=service, status=response.status_code)
+                if response.status_code == 429 or response.status_code >= 500:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429:
+                        self.rate_limiter.on_throttle(retry_after)
+                    elif retry_after:
+                        self.rate_limiter.pause(retry_after)
+                    error = f"HTTP {response.status_code}"
+                else:
+                    self.rate_limiter.on_success()
+                    return response
+
+            if attempt < self.max_retries:
+                metrics.inc("autobahn_retries_total", service=service)
+                time.sleep(backoff_delay(attempt, self.backoff_base))
+        print(f"Error retrieving '{url}' after {self.max_retries + 1} attempts: {error}")
+        return None
+
+    def _serve_stale(self, entry, service):
+        if entry is None:
+            return None
+        metrics.inc("autobahn_cache_total", service=service, result="stale")
+        return entry.data
 
     def _get(self, endpoint, params=None):
         """
         Internal helper method for GET requests.
+        Fresh responses are served from the cache, stale ones are revalidated with ETag/Last-Modified.
+        If the API fails or the circuit of the service is open, the last cached data is served (even if stale).
         """
         url = f"{self.base_url}{endpoint}"
+        cache_key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+        service = service_for_endpoint(endpoint)
+        entry = self.cache.get(cache_key) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry, endpoint):
+            metrics.inc("autobahn_cache_total", service=service, result="hit")
+            return entry.data
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        breaker = self._breaker(service)
+        if not breaker.allow():
+            metrics.inc("autobahn_circuit_rejected_total", service=service)
+            return self._serve_stale(entry, service)
+
+        # every allowed request records its result, otherwise a half open circuit would never close again
+        response = None
+        try:
+            response = self._request(url, params, headers, service)
+        finally:
+            if response is None:
+                if breaker.record_failure():
+                    metrics.inc("autobahn_circuit_opened_total", service=service)
+                    print(f"Autobahn API '{service}' unavailable, serving cached data for the next {self.reset_timeout}s.")
+            else:
+                breaker.record_success()
+        if response is None:
+            return self._serve_stale(entry, service)
+
         try:
-            response = requests.get(url, params=params)
+            if response.status_code == 304 and entry is not None:
+                self.cache.touch(cache_key)
+                metrics.inc("autobahn_cache_total", service=service, result="revalidated")
+                return entry.data
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # invalid JSON raises ValueError in older requests versions, a bad reply is treated like a failed request
+            metrics.inc("autobahn_errors_total", service=service, error=type(e).__name__)
             print(f"Error retrieving '{url}': {e}")
-            return None
+            return self._serve_stale(entry, service)
+
+        metrics.observe("autobahn_response_bytes", len(response.content), service=service)
+        if self.cache:
+            metrics.inc("autobahn_cache_total", service=service, result="miss")
+            self.cache.put(cache_key, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return data
 
     def get_available_roads(self):
         """
@@ -62,35 +228,99 @@ class AutobahnApiClient:
         """
         return self._get(f"/details/closure/{closure_id}")
     
-    def get_all_data(self):
+    def get_details(self, service, identifier):
+        """
+        Retrieves the details of an incident of a service ("roadworks", "warning" or "closure").
+        """
+        return self._get(f"/details/{service}/{identifier}")
+
+    def get_road_data(self, road_id):
+        """
+        Retrieves roadworks, warnings and closures for a specific highway.
+        Services that could not be retrieved (and have no cached data) are missing from the result.
+        """
+        road_data = {}
+        for payload in (self.get_roadworks(road_id), self.get_warnings(road_id), self.get_closures(road_id)):
+            if payload:
+                road_data.update(payload)
+        return road_data
+
+    def get_all_data(self, parallel=True, max_workers=None):
         """
         Retrieves roadworks, warnings and closures for all highways.
+
+        Args:
+            parallel (bool): Fetch the highways concurrently using a bounded worker pool.
+            max_workers (int): Concurrency limit, defaults to the client's max_workers.
+
+        Returns:
+            dict: {road_id: {"roadworks": [...], "warning": [...], "closure": [...]}}
         """
         roads = self.get_available_roads()
         roads_data = dict()
-        for road_id in roads["roads"]:
-            print(f"Fetching data for {road_id}...", end="", flush=True)
-            roadworks = self.get_roadworks(road_id)
-            warnings = self.get_warnings(road_id)
-            closures = self.get_closures(road_id)
-            road_dict = {**roadworks, **warnings, **closures}
-            # roads_data.update(road_dict)
-            roads_data[road_id] = road_dict
-            
-            print(f"done ({len(road_dict)} items).")
+        if not roads:
+            return roads_data
+        # a highway listed twice is fetched once
+        road_ids = list(dict.fromkeys(roads["roads"]))
+
+        if not parallel:
+            for road_id in road_ids:
+                print(f"Fetching data for {road_id}...", end="", flush=True)
+                road_dict = self.get_road_data(road_id)
+                roads_data[road_id] = road_dict
+                print(f"done ({len(road_dict)} items).")
+            return roads_data
+
+        workers = min(max_workers or self.max_workers, self.max_workers)
+        print(f"Fetching data for {len(road_ids)} highways with {workers} workers...", flush=True)
+        completed = dict(self.iter_all_data(road_ids, workers))
+        # keep the order of the roads list
+        for road_id in road_ids:
+            roads_data[road_id] = completed.get(road_id, {})
+        print(f"done ({len(roads_data)} highways).")
 
         return roads_data
 
+    def iter_all_data(self, road_ids=None, max_workers=None):
+        """
+        Yields roadworks, warnings and closures per highway as soon as a highway is complete.
+        At most max_workers highways are in flight, so consumers can process the first highways while the
+        others are still downloading and memory is bounded by the highways in flight, not by the whole network.
+
+        Args:
+            road_ids (list): Highways to fetch, defaults to all available highways.
+            max_workers (int): Concurrency limit, defaults to the client's max_workers.
+
+        Yields:
+            tuple: (road_id, {"roadworks": [...], "warning": [...], "closure": [...]}) in completion order.
+        """
+        if road_ids is None:
+            roads = self.get_available_roads()
+            if not roads:
+                return
+            road_ids = roads["roads"]
+
+        workers = min(max_workers or self.max_workers, self.max_workers)
+        remaining = iter(road_ids)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(self.get_road_data, road_id): road_id for road_id in islice(remaining, workers)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    road_id = pending.pop(future)
+                    # submit the next highway before handing this one over, the pool keeps working meanwhile
+                    for next_road_id in islice(remaining, 1):
+                        pending[executor.submit(self.get_road_data, next_road_id)] = next_road_id
+                    yield road_id, future.result()
+
 
 
 if __name__ == "__main__":
     # for testing
-    config_path = os.path.join(os.getcwd(), "config", "config.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = load_config()
     base_url = config.get("autobahn_api_url")
 
-    client = AutobahnApiClient(base_url)
+    client = AutobahnApiClient(base_url, config.get("autobahn_max_workers", 8))
 
     print("Available highways:")
     roads = client.get_available_roads()
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from autobahn_api.incidents import SERVICES
+from common.sqlite import connect, execute, prepare
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS road_snapshots (road_id TEXT PRIMARY KEY, snapshot TEXT NOT NULL)"
+
+
+def content_hash(item):
+    """
+    Returns a stable hash of an incident's content.
+    """
+    serialized = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _incident_key(item):
+    # The identifier is stable across polls, items without one are keyed by their content
+    return item.get("identifier") or content_hash(item)
+
+
+class RoadChanges:
+    def __init__(self, road_id):
+        """
+        Changes of a single highway between two polls.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+        """
+        self.road_id = road_id
+        self.new = {service: [] for service in SERVICES}
+        self.changed = {service: [] for service in SERVICES}
+        # keys (identifiers) of the incidents which are no longer reported, the snapshots keep no payloads
+        self.resolved = {service: [] for service in SERVICES}
+        # {service: (previous, current)} snapshots of the update, see ChangeDetector.rollback
+        self._snapshots = {}
+
+    def has_changes(self):
+        """
+        Returns True if any incident is new, changed or resolved.
+        """
+        return any(self.new[s] or self.changed[s] or self.resolved[s] for s in SERVICES)
+
+    def updated(self, service):
+        """
+        Returns the new and changed incidents of a service.
+        """
+        return self.new[service] + self.changed[service]
+
+    def as_prompt_data(self):
+        """
+        Returns the new and changed incidents as (roadworks, warnings, closures) for generate_einsatz_email_prompt.
+        """
+        return tuple(self.updated(service) for service in SERVICES)
+
+    def summary(self):
+        counts = [f"{service}: +{len(self.new[service])} ~{len(self.changed[service])} -{len(self.resolved[service])}" for service in SERVICES]
+        return f"{self.road_id} ({', '.join(counts)})"
+
+
+class ChangeDetector:
+    def __init__(self, state_path=None):
+        """
+        Keeps the previous snapshot (content hash per incident) per highway and reports incremental changes.
+
+        Args:
+            state_path (str): Optional SQLite database to persist the snapshots across restarts,
+                one row per highway so saving a highway doesn't rewrite the others.
+        """
+        self.state_path = state_path
+        # {road_id: {service: {key: hash}}}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        # keeps the rows in the order of the snapshots, a slow write never overwrites a newer one
+        self._save_lock = threading.Lock()
+
+        if self.state_path:
+            try:
+                prepare(self.state_path)
+                execute(self.state_path, _SCHEMA)
+                self._load()
+            except sqlite3.Error as e:
+                print(f"Error opening change detector state '{self.state_path}', continuing without it: {e}")
+                self.state_path = None
+
+    def _load(self):
+        for road_id, snapshot in execute(self.state_path, "SELECT road_id, snapshot FROM road_snapshots"):
+            try:
+                self._snapshots[road_id] = json.loads(snapshot)
+            except ValueError as e:
+                print(f"Error loading change detector state of {road_id}: {e}")
+
+    def save(self, road_id=None):
+        """
+        Writes the current snapshot of a highway to state_path, of all highways without road_id.
+        """
+        if not self.state_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                road_ids = list(self._snapshots) if road_id is None else [road_id]
+                rows = [(road, json.dumps(self._snapshots[road], separators=(",", ":")))
+                        for road in road_ids if road in self._snapshots]
+            if not rows:
+                return
+            try:
+                connection = connect(self.state_path)
+                try:
+                    with connection:
+                        connection.executemany("INSERT OR REPLACE INTO road_snapshots (road_id, snapshot) VALUES (?, ?)", rows)
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                print(f"Error writing change detector state '{self.state_path}': {e}")
+
+    def update(self, road_id, road_data):
+        """
+        Compares the current data of a highway with the previous snapshot and stores it as new snapshot
+        (in memory, see save and rollback).
+        Services missing in road_data (eg. after a failed request) are left untouched.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            road_data (dict): {"roadworks": [...], "warning": [...], "closure": [...]}
+
+        Returns:
+            RoadChanges: New, changed and resolved incidents per service.
+        """
+        changes = RoadChanges(road_id)
+        with self._lock:
+            previous_road = self._snapshots.setdefault(road_id, {})
+            for service in SERVICES:
+                items = road_data.get(service)
+                if items is None:
+                    continue
+
+                previous = previous_road.get(service)
+                known = previous or {}
+                current = {}
+                for item in items:
+                    key = _incident_key(item)
+                    item_hash = content_hash(item)
+                    current[key] = item_hash
+                    if key not in known:
+                        changes.new[service].append(item)
+                    elif known[key] != item_hash:
+                        changes.changed[service].append(item)
+
+                changes.resolved[service] = [key for key in known if key not in current]
+                previous_road[service] = current
+                changes._snapshots[service] = (previous, current)
+
+        return changes
+
+    def rollback(self, changes):
+        """
+        Restores the snapshot of a highway from before the update which returned changes, eg. if no email
+        could be generated for them: the next update reports the changes again.
+        Services updated again in the meantime are left untouched.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(changes.road_id)
+            if snapshot is None:
+                return
+            for service, (previous, current) in changes._snapshots.items():
+                if snapshot.get(service) is not current:
+                    continue
+                if previous is None:
+                    del snapshot[service]
+                else:
+                    snapshot[service] = previous
+
+    def forget(self, road_id):
+        """
+        Drops the snapshot of a highway, the next update reports all its incidents as new.
+        """
+        with self._lock:
+            self._snapshots.pop(road_id, None)
+        if self.state_path:
+            try:
+                execute(self.state_path, "DELETE FROM road_snapshots WHERE road_id = ?", (road_id,))
+            except sqlite3.Error as e:
+                print(f"Error writing change detector state '{self.state_path}': {e}")
+
+
+if __name__ == "__main__":
+    # Example polls of the same highway
+    detector = ChangeDetector()
+
+    first_poll = {
+        "roadworks": [{"identifier": "rw1", "title": "A8 | Fahrbahnerneuerung"}],
+        "warning": [{"identifier": "warn1", "title": "A8 | Unfall mit Stau", "isBlocked": "false"}],
+        "closure": [],
+    }
+    second_poll = {
+        "roadworks": [{"identifier": "rw1", "title": "A8 | Fahrbahnerneuerung"}],
+        "warning": [{"identifier": "warn1", "title": "A8 | Unfall mit Stau", "isBlocked": "true"}],
+        "closure": [{"identifier": "clos1", "title": "A8 | Vollsperrung"}],
+    }
+    third_poll = second_poll
+
+    for poll in (first_poll, second_poll, third_poll):
+        changes = detector.update("A8", poll)
+        print(changes.summary(), "-> LLM call" if changes.has_changes() else "-> no changes")
@@ -0,0 +1,179 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from autobahn_api.autobahn_api_client import AutobahnApiClient
+from autobahn_api.incidents import SERVICES
+from common.in_flight import InFlight
+from config import load_config
+
+
+class DetailsFetcher:
+    def __init__(self, client, max_workers=8):
+        """
+        Bulk fetcher for the details endpoints of the Autobahn API.
+        Details are fetched concurrently, concurrent requests for the same incident share one HTTP request,
+        and fetched details are kept until the incident disappears from the listing of its highway.
+
+        Args:
+            client (AutobahnApiClient): Client used for the requests.
+            max_workers (int): Maximum number of concurrent detail requests, shared by all callers.
+        """
+        self.client = client
+        self.max_workers = max(1, int(max_workers))
+        self.requests = 0
+
+        # {(service, identifier): details}
+        self._details = {}
+        # {road_id: {(service, identifier)}} of the last listing
+        self._listed = {}
+        # {(service, identifier): number of highways listing the incident}
+        self._listed_count = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="details")
+        self.client.reserve_connections(self.max_workers)
+
+    def _fetch(self, key, in_flight):
+        service, identifier = key
+        try:
+            in_flight.result = self.client.get_details(service, identifier)
+        finally:
+            with self._lock:
+                self.requests += 1
+                # only listed incidents are cached (until they disappear), failed requests are retried next time
+                if in_flight.result is not None and key in self._listed_count:
+                    self._details[key] = in_flight.result
+                del self._in_flight[key]
+            in_flight.event.set()
+
+    def fetch_many(self, keys):
+        """
+        Returns the details of several incidents. Cached details are returned directly,
+        duplicates and incidents already being fetched by another caller are requested only once.
+        Details are only cached for incidents listed via sync_listing().
+
+        Args:
+            keys (iterable): (service, identifier) tuples.
+
+        Returns:
+            dict: {(service, identifier): details}, incidents whose details could not be retrieved are missing.
+        """
+        results = {}
+        waiting = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key[0] not in SERVICES:
+                    raise ValueError(f"Unknown service '{key[0]}', expected one of {SERVICES}.")
+                details = self._details.get(key)
+                if details is not None:
+                    results[key] = details
+                    continue
+                in_flight = self._in_flight.get(key)
+                if in_flight is None:
+                    in_flight = self._in_flight[key] = InFlight()
+                    self._executor.submit(self._fetch, key, in_flight)
+                waiting.append((key, in_flight))
+
+        for key, in_flight in waiting:
+            in_flight.event.wait()
+            if in_flight.result is not None:
+                results[key] = in_flight.result
+        return results
+
+    def fetch(self, service, identifiers):
+        """
+        Returns the details of several incidents of one service.
+
+        Args:
+            service (str): "roadworks", "warning" or "closure".
+            identifiers (iterable): Identifiers of the incidents, duplicates are fetched once.
+
+        Returns:
+            dict: {identifier: details}
+        """
+        return {identifier: details for (_, identifier), details in self.fetch_many((service, i) for i in identifiers).items()}
+
+    def sync_listing(self, road_id, road_data):
+        """
+        Updates the listing of a highway and drops the cached details of incidents no longer listed
+        by any highway. Services missing from road_data (failed requests) are left untouched.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            road_data (dict): {"roadworks": [...], "warning": [...], "closure": [...]} as returned by get_road_data.
+
+        Returns:
+            int: Number of dropped details.
+        """
+        road_data = road_data or {}
+        with self._lock:
+            previous = self._listed.get(road_id, set())
+            listed = {key for key in previous if key[0] not in road_data}
+            for service in SERVICES:
+                for item in road_data.get(service) or []:
+                    if item.get("identifier"):
+                        listed.add((service, item["identifier"]))
+            self._listed[road_id] = listed
+
+            for key in listed - previous:
+                self._listed_count[key] = self._listed_count.get(key, 0) + 1
+            dropped = 0
+            for key in previous - listed:
+                self._listed_count[key] -= 1
+                if self._listed_count[key] == 0:
+                    del self._listed_count[key]
+                    if self._details.pop(key, None) is not None:
+                        dropped += 1
+        return dropped
+
+    def enrich(self, road_data):
+        """
+        Merges the details into the incidents of a highway (eg. only the new and changed ones).
+        Call sync_listing() with the full listing first, so the details are cached.
+
+        Args:
+            road_data (dict): {"roadworks": [...], "warning": [...], "closure": [...]}
+
+        Returns:
+            dict: Copy of road_data whose incidents are updated with their details.
+        """
+        keys = [(service, item["identifier"]) for service in SERVICES
+                for item in (road_data or {}).get(service) or [] if item.get("identifier")]
+        details = self.fetch_many(keys)
+        enriched = dict(road_data or {})
+        for service in SERVICES:
+            if service in enriched:
+                enriched[service] = [{**item, **details.get((service, item.get("identifier")), {})}
+                                     for item in enriched[service] or []]
+        return enriched
+
+    def cached(self):
+        """
+        Returns the number of cached details.
+        """
+        with self._lock:
+            return len(self._details)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    # for testing
+    config = load_config()
+
+    client = AutobahnApiClient(config.get("autobahn_api_url"), config.get("autobahn_max_workers", 8))
+    fetcher = DetailsFetcher(client, config.get("details_max_workers", 8))
+
+    road_id_example = "A8"
+    road_data = client.get_road_data(road_id_example)
+    fetcher.sync_listing(road_id_example, road_data)
+    enriched = fetcher.enrich(road_data)
+    print(f"{fetcher.requests} detail requests, {fetcher.cached()} details cached.")
+    if enriched.get("closure"):
+        print(json.dumps(enriched["closure"][0], indent=4, ensure_ascii=False))
+
+    # the second call is served from the cache
+    fetcher.enrich(road_data)
+    print(f"{fetcher.requests} detail requests after the second call.")
+    fetcher.close()
@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+import numpy as np
+from autobahn_api.incidents import split_by_service
+from autobahn_api.spatial_index import EARTH_RADIUS_KM
+
+# Base severity per service, closures matter most for the on-call team
+SERVICE_WEIGHTS = {"closure": 3.0, "warning": 2.0, "roadworks": 1.0}
+BLOCKED_WEIGHT = 2.0
+RECENCY_WEIGHT = 1.5
+RECENCY_HALF_LIFE_HOURS = 24.0
+FUTURE_FACTOR = 0.3
+DENSITY_WEIGHT = 0.5
+
+
+def incident_features(incidents, now=None):
+    """
+    Extracts the scoring features of a batch of incidents into NumPy arrays.
+
+    Args:
+        incidents (list): Normalized incidents (see autobahn_api.incidents).
+        now (datetime): Reference time for the recency, defaults to the current time.
+
+    Returns:
+        dict: Arrays "lat", "lon" (NaN without position), "service", "blocked", "future", "age_hours" (NaN if unknown).
+    """
+    now = now or datetime.now(timezone.utc)
+    now_ts = now.timestamp()
+    count = len(incidents)
+    features = {
+        "lat": np.fromiter((i.lat if i.lat is not None else np.nan for i in incidents), dtype=np.float64, count=count),
+        "lon": np.fromiter((i.lon if i.lon is not None else np.nan for i in incidents), dtype=np.float64, count=count),
+        "service": np.fromiter((SERVICE_WEIGHTS.get(i.service, 1.0) for i in incidents), dtype=np.float64, count=count),
+        "blocked": np.fromiter((i.is_blocked for i in incidents), dtype=bool, count=count),
+        "future": np.fromiter((i.future for i in incidents), dtype=bool, count=count),
+        "start": np.fromiter((i.start_time.timestamp() if i.start_time else np.nan for i in incidents), dtype=np.float64, count=count),
+    }
+    features["age_hours"] = (now_ts - features.pop("start")) / 3600.0
+    return features
+
+
+def _distances_km(lat, lon, lats, lons):
+    """
+    Haversine distances from one point (or a column of points) to arrays of points.
+    """
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(lons - lon)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def local_density(lat, lon, radius_km=5.0, block_size=512):
+    """
+    Counts for every incident the other incidents within radius_km (row blocks keep the memory at block_size x N).
+    Incidents without position get a density of 0.
+    """
+    count = len(lat)
+    density = np.zeros(count, dtype=np.float64)
+    has_position = ~(np.isnan(lat) | np.isnan(lon))
+    positioned = np.flatnonzero(has_position)
+    lats, lons = lat[positioned], lon[positioned]
+    for start in range(0, len(positioned), block_size):
+        block = slice(start, start + block_size)
+        distances = _distances_km(lats[block, None], lons[block, None], lats[None, :], lons[None, :])
+        density[positioned[block]] = (distances <= radius_km).sum(axis=1) - 1  # without the incident itself
+    return density
+
+
+def score_incidents(incidents, now=None, density_radius_km=5.0):
+    """
+    Computes a deterministic severity score per incident from service type, blocking,
+    recency of the start, the future flag and the local incident density.
+
+    Args:
+        incidents (list): Normalized incidents.
+        now (datetime): Reference time for the recency, defaults to the current time.
+        density_radius_km (float): Radius for the local density.
+
+    Returns:
+        numpy.ndarray: Scores in the order of the incidents.
+    """
+    if not incidents:
+        return np.zeros(0)
+    features = incident_features(incidents, now)
+
+    # recent incidents score higher, unknown start times count as one half-life old
+    age_hours = np.nan_to_num(np.clip(features["age_hours"], 0.0, None), nan=RECENCY_HALF_LIFE_HOURS)
+    recency = np.exp2(-age_hours / RECENCY_HALF_LIFE_HOURS)
+
+    density = local_density(features["lat"], features["lon"], density_radius_km)
+    scores = (features["service"]
+              + BLOCKED_WEIGHT * features["blocked"]
+              + RECENCY_WEIGHT * recency
+              + DENSITY_WEIGHT * np.log1p(density))
+    return np.where(features["future"], scores * FUTURE_FACTOR, scores)
+
+
+def cluster_incidents(incidents, scores, radius_km=2.0):
+    """
+    Greedily clusters nearby incidents: the highest scored unassigned incident becomes the seed
+    and takes all unassigned incidents within radius_km. Incidents without position form their own cluster.
+
+    Args:
+        incidents (list): Normalized incidents.
+        scores (numpy.ndarray): Scores from score_incidents.
+        radius_km (float): Cluster radius around the seed.
+
+    Returns:
+        list: (cluster_score, [incident indices]) sorted by cluster score, highest first.
+    """
+    count = len(incidents)
+    if count == 0:
+        return []
+    lat = np.fromiter((i.lat if i.lat is not None else np.nan for i in incidents), dtype=np.float64, count=count)
+    lon = np.fromiter((i.lon if i.lon is not None else np.nan for i in incidents), dtype=np.float64, count=count)
+    has_position = ~(np.isnan(lat) | np.isnan(lon))
+    assigned = np.zeros(count, dtype=bool)
+
+    clusters = []
+    for seed in np.argsort(-scores, kind="stable"):
+        if assigned[seed]:
+            continue
+        if has_position[seed]:
+            members = np.flatnonzero(~assigned & has_position)
+            members = members[_distances_km(lat[seed], lon[seed], lat[members], lon[members]) <= radius_km]
+        else:
+            members = np.array([seed])
+        assigned[members] = True
+        clusters.append((float(scores[members].sum()), members.tolist()))
+
+    clusters.sort(key=lambda cluster: -cluster[0])
+    return clusters
+
+
+def select_top_incidents(incidents, top_n=5, now=None, cluster_radius_km=2.0, density_radius_km=5.0):
+    """
+    Keeps only the incidents of the top_n clusters of a highway, eg. for generate_einsatz_email_prompt.
+
+    Args:
+        incidents (list): Normalized incidents of one highway.
+        top_n (int): Number of clusters to keep.
+        now (datetime): Reference time for the recency, defaults to the current time.
+        cluster_radius_km (float): Cluster radius around the seed.
+        density_radius_km (float): Radius for the local density.
+
+    Returns:
+        tuple: (roadworks, warnings, closures) of the kept incidents, highest scored first.
+    """
+    scores = score_incidents(incidents, now, density_radius_km)
+    clusters = cluster_incidents(incidents, scores, cluster_radius_km)[:top_n]
+    kept = [index for _, members in clusters for index in sorted(members, key=lambda i: -scores[i])]
+    return split_by_service([incidents[index] for index in kept])
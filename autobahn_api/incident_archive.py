@@ -0,0 +1,252 @@
+import json
+import sqlite3
+import threading
+import time
+from autobahn_api.change_detector import _incident_key, content_hash
+from autobahn_api.incidents import SERVICES
+from common.sqlite import connect, execute, prepare
+from monitoring.metrics import metrics
+
+SERVICE_LABELS = {"roadworks": "Baustellen", "warning": "Verkehrsmeldungen", "closure": "Sperrungen"}
+
+_SCHEMA = (
+    # One row per version of an incident: a poll that finds an incident unchanged writes nothing,
+    # a changed incident closes its current version (valid_to) and appends a new one.
+    "CREATE TABLE IF NOT EXISTS incident_versions ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, road_id TEXT NOT NULL, service TEXT NOT NULL, identifier TEXT NOT NULL, "
+    "version INTEGER NOT NULL, content_hash TEXT NOT NULL, title TEXT, subtitle TEXT, is_blocked INTEGER, "
+    "data TEXT NOT NULL, valid_from REAL NOT NULL, valid_to REAL, resolved INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_road_time ON incident_versions (road_id, valid_from)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_service_time ON incident_versions (service, valid_from)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_identifier ON incident_versions (identifier, valid_from)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_current ON incident_versions (road_id, valid_to)",
+)
+
+_COLUMNS = ("road_id", "service", "identifier", "version", "title", "subtitle", "is_blocked",
+            "data", "valid_from", "valid_to", "resolved")
+
+
+def _compact_json(item):
+    # empty fields are left out, they make up a large part of the raw payload
+    return json.dumps({key: value for key, value in item.items() if value not in (None, "", [], {})},
+                      ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class IncidentArchive:
+    def __init__(self, db_path):
+        """
+        Append-only history of the incidents of all polled highways in a SQLite database.
+        Unchanged incidents are not stored again, so the archive grows with the changes, not with the polls.
+        Queries by highway, service, identifier and time range are served from indexes without network calls.
+
+        Args:
+            db_path (str): Path of the SQLite database.
+        """
+        self.db_path = db_path
+        # current version per highway, loaded on first use: {road_id: {(service, identifier): (id, version, hash)}}
+        self._current = {}
+        self._lock = threading.Lock()
+
+        prepare(self.db_path)
+        connection = connect(self.db_path)
+        try:
+            # readers don't block the writer
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+        finally:
+            connection.close()
+
+    def _load_current(self, connection, road_id):
+        current = {}
+        rows = connection.execute(
+            "SELECT id, service, identifier, version, content_hash FROM incident_versions "
+            "WHERE road_id = ? AND valid_to IS NULL", (road_id,))
+        for row_id, service, identifier, version, item_hash in rows:
+            current[(service, identifier)] = (row_id, version, item_hash)
+        return current
+
+    def record(self, road_id, road_data, fetched_at=None):
+        """
+        Stores a snapshot of a highway: new and changed incidents are appended as new versions,
+        incidents missing from the snapshot are marked as resolved. Services missing from road_data
+        (eg. after a failed request) are left untouched.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            road_data (dict): Road payload as returned by AutobahnApiClient.get_road_data.
+            fetched_at (float): Time of the snapshot as Unix timestamp, defaults to now.
+
+        Returns:
+            int: Number of appended versions.
+        """
+        if not road_data:
+            return 0
+        fetched_at = fetched_at or time.time()
+
+        with self._lock:
+            connection = connect(self.db_path)
+            try:
+                current = self._current.get(road_id)
+                if current is None:
+                    current = self._load_current(connection, road_id)
+
+                closed = []
+                appended = []
+                for service in SERVICES:
+                    if service not in road_data:
+                        continue
+                    seen = set()
+                    for item in road_data.get(service) or []:
+                        identifier = _incident_key(item)
+                        key = (service, identifier)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        item_hash = content_hash(item)
+                        previous = current.get(key)
+                        if previous is not None and previous[2] == item_hash:
+                            continue
+                        version = 1
+                        if previous is not None:
+                            closed.append((fetched_at, 0, previous[0]))
+                            version = previous[1] + 1
+                        appended.append((key, version, item_hash, item))
+
+                    for key, (row_id, _, _) in list(current.items()):
+                        if key[0] == service and key not in seen:
+                            closed.append((fetched_at, 1, row_id))
+                            del current[key]
+
+                with connection:
+                    connection.executemany("UPDATE incident_versions SET valid_to = ?, resolved = ? WHERE id = ?", closed)
+                    for (service, identifier), version, item_hash, item in appended:
+                        cursor = connection.execute(
+                            "INSERT INTO incident_versions (road_id, service, identifier, version, content_hash, title, "
+                            "subtitle, is_blocked, data, valid_from) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (road_id, service, identifier, version, item_hash, item.get("title"), item.get("subtitle"),
+                             int(str(item.get("isBlocked")).lower() == "true"), _compact_json(item), fetched_at))
+                        current[(service, identifier)] = (cursor.lastrowid, version, item_hash)
+            except sqlite3.Error as e:
+                # the cached versions may no longer match the database, reload them on the next snapshot
+                self._current.pop(road_id, None)
+                print(f"Error archiving incidents of '{road_id}': {e}")
+                return 0
+            finally:
+                connection.close()
+            self._current[road_id] = current
+
+        metrics.inc("archive_versions_total", len(appended), kind="appended")
+        metrics.inc("archive_versions_total", len(closed), kind="closed")
+        return len(appended)
+
+    def history(self, road_id=None, service=None, identifier=None, start=None, end=None, limit=None):
+        """
+        Returns the versions of incidents which were active in the given time range, oldest first.
+
+        Args:
+            road_id (str): Only incidents of this highway.
+            service (str): Only incidents of this service (eg. "closure").
+            identifier (str): Only versions of this incident.
+            start (float): Unix timestamp, versions which ended before are left out.
+            end (float): Unix timestamp, versions which started after are left out.
+            limit (int): Maximum number of versions.
+
+        Returns:
+            list: Dictionaries with the columns of the version, "data" holds the incident.
+        """
+        conditions = []
+        params = []
+        for column, value in (("road_id", road_id), ("service", service), ("identifier", identifier)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if end is not None:
+            conditions.append("valid_from <= ?")
+            params.append(end)
+        if start is not None:
+            conditions.append("(valid_to IS NULL OR valid_to >= ?)")
+            params.append(start)
+
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM incident_versions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY valid_from, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        versions = []
+        for row in execute(self.db_path, sql, params):
+            version = dict(zip(_COLUMNS, row))
+            version["data"] = json.loads(version["data"])
+            version["is_blocked"] = bool(version["is_blocked"])
+            version["resolved"] = bool(version["resolved"])
+            versions.append(version)
+        return versions
+
+    def count_new(self, road_id, start, end=None):
+        """
+        Returns the number of incidents per service which first appeared on a highway in the given time range.
+        """
+        rows = execute(
+            self.db_path,
+            "SELECT service, COUNT(*) FROM incident_versions "
+            "WHERE road_id = ? AND valid_from >= ? AND valid_from <= ? AND version = 1 GROUP BY service",
+            (road_id, start, end if end is not None else time.time()))
+        counts = dict.fromkeys(SERVICES, 0)
+        counts.update(dict(rows))
+        return counts
+
+    def frequent_segments(self, road_id, service="closure", start=None, end=None, top=5):
+        """
+        Returns the segments (titles) of a highway with the most new incidents of a service in the given time range.
+
+        Returns:
+            list: (title, count) tuples, most frequent first.
+        """
+        return execute(
+            self.db_path,
+            "SELECT title, COUNT(*) AS incident_count FROM incident_versions "
+            "WHERE road_id = ? AND service = ? AND valid_from >= ? AND valid_from <= ? AND version = 1 "
+            "AND title IS NOT NULL GROUP BY title ORDER BY incident_count DESC, title LIMIT ?",
+            (road_id, service, start or 0, end if end is not None else time.time(), top))
+
+    def trend_summary(self, road_id, days=7, now=None, top=3):
+        """
+        Returns a short German summary of the history of a highway for the prompt (see generate_einsatz_email_prompt),
+        or an empty string if nothing was archived in the time range.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            days (float): Length of the time range in days.
+            now (float): End of the time range as Unix timestamp, defaults to now.
+            top (int): Number of the most frequently affected segments per service.
+        """
+        end = now or time.time()
+        start = end - days * 86400
+        counts = self.count_new(road_id, start, end)
+        if not any(counts.values()):
+            return ""
+
+        lines = [f"Neue Meldungen der letzten {days:g} Tage: "
+                 + ", ".join(f"{counts[service]} {SERVICE_LABELS[service]}" for service in SERVICES) + "."]
+        for service in ("closure", "warning"):
+            segments = self.frequent_segments(road_id, service, start, end, top)
+            repeated = [f"{title} ({count}x)" for title, count in segments if count > 1]
+            if repeated:
+                lines.append(f"Häufigste Abschnitte ({SERVICE_LABELS[service]}): " + "; ".join(repeated))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from autobahn_api.autobahn_api_client import AutobahnApiClient
+    from config import load_config
+
+    config = load_config()
+    client = AutobahnApiClient(config.get("autobahn_api_url"))
+    archive = IncidentArchive(config.get("incident_archive_path", ".cache/incidents.sqlite3"))
+    road_id = "A8"
+    print(f"{archive.record(road_id, client.get_road_data(road_id))} neue Versionen archiviert.")
+    print(archive.trend_summary(road_id) or "Noch keine Historie vorhanden.")
@@ -0,0 +1,216 @@
+import sys
+from datetime import datetime
+
+# Keys of the services in the road payload of the Autobahn API
+SERVICES = ("roadworks", "warning", "closure")
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() == "true"
+
+
+def _parse_timestamp(value):
+    """
+    Parses timestamps like "2021-05-25T00:00:00.000+0200", returns None if missing or invalid.
+    """
+    if not value:
+        return None
+    for timestamp_format in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z"):
+        try:
+            return datetime.strptime(value, timestamp_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_extent(value):
+    """
+    Parses "lon1,lat1,lon2,lat2" into a tuple of floats, returns None if missing or invalid.
+    """
+    if not value:
+        return None
+    parts = tuple(_parse_float(part) for part in str(value).split(","))
+    if len(parts) != 4 or None in parts:
+        return None
+    return parts
+
+
+def _parse_coordinate(item):
+    coordinate = item.get("coordinate") or {}
+    lat = _parse_float(coordinate.get("lat"))
+    lon = _parse_float(coordinate.get("long"))
+    if (lat is None or lon is None) and item.get("point"):
+        # "point" is "lon,lat"
+        parts = str(item["point"]).split(",")
+        if len(parts) == 2:
+            lon, lat = _parse_float(parts[0]), _parse_float(parts[1])
+    return lat, lon
+
+
+class Incident:
+    # no per-instance __dict__, a full-network snapshot holds several thousand incidents
+    __slots__ = ("road_id", "service", "identifier", "title", "subtitle", "description",
+                 "lat", "lon", "extent", "is_blocked", "future", "start_time",
+                 "delay_minutes", "average_speed", "abnormal_traffic_type", "route_recommendation")
+
+    def __init__(self, road_id, service, identifier, title="", subtitle="", description=(),
+                 lat=None, lon=None, extent=None, is_blocked=False, future=False, start_time=None,
+                 delay_minutes=None, average_speed=None, abnormal_traffic_type=None, route_recommendation=()):
+        self.road_id = road_id
+        self.service = service
+        self.identifier = identifier
+        self.title = title
+        self.subtitle = subtitle
+        self.description = description
+        self.lat = lat
+        self.lon = lon
+        self.extent = extent
+        self.is_blocked = is_blocked
+        self.future = future
+        self.start_time = start_time
+        self.delay_minutes = delay_minutes
+        self.average_speed = average_speed
+        self.abnormal_traffic_type = abnormal_traffic_type
+        self.route_recommendation = route_recommendation
+
+    def __repr__(self):
+        return f"Incident({self.road_id}, {self.service}, {self.title!r})"
+
+    @property
+    def has_position(self):
+        return self.lat is not None and self.lon is not None
+
+    def to_dict(self):
+        """
+        Returns the incident in the key format of the Autobahn API (eg. for the prompts), empty values are left out.
+        """
+        item = {
+            "identifier": self.identifier,
+            "title": self.title,
+            "subtitle": self.subtitle,
+            "description": list(self.description),
+            "isBlocked": self.is_blocked,
+            "future": self.future,
+            "startTimestamp": self.start_time.isoformat() if self.start_time else None,
+            "point": f"{self.lon:.6f},{self.lat:.6f}" if self.has_position else None,
+            "delayTimeValue": self.delay_minutes,
+            "averageSpeed": self.average_speed,
+            "abnormalTrafficType": self.abnormal_traffic_type,
+            "routeRecommendation": list(self.route_recommendation),
+        }
+        return {key: value for key, value in item.items() if value not in (None, "", [])}
+
+
+def as_dict(item):
+    """
+    Returns an incident in the key format of the Autobahn API: Incidents are converted (see Incident.to_dict),
+    raw dictionaries of the API are returned as they are.
+    """
+    return item.to_dict() if hasattr(item, "to_dict") else item
+
+
+def parse_incident(road_id, service, item):
+    """
+    Parses a single incident of the Autobahn API into an Incident.
+
+    Args:
+        road_id (str): ID of the highway (eg. "A8").
+        service (str): "roadworks", "warning" or "closure".
+        item (dict): Incident as returned by the Autobahn API.
+
+    Returns:
+        Incident: The normalized incident.
+    """
+    lat, lon = _parse_coordinate(item)
+    delay = _parse_float(item.get("delayTimeValue"))
+    return Incident(
+        road_id=road_id,
+        service=service,
+        identifier=item.get("identifier"),
+        title=sys.intern(item.get("title") or ""),
+        subtitle=sys.intern(item.get("subtitle") or ""),
+        description=tuple(line for line in (item.get("description") or []) if line),
+        lat=lat,
+        lon=lon,
+        extent=_parse_extent(item.get("extent")),
+        is_blocked=_parse_bool(item.get("isBlocked")),
+        future=_parse_bool(item.get("future")),
+        start_time=_parse_timestamp(item.get("startTimestamp")),
+        delay_minutes=int(delay) if delay is not None else None,
+        average_speed=_parse_float(item.get("averageSpeed")),
+        abnormal_traffic_type=item.get("abnormalTrafficType"),
+        route_recommendation=tuple(item.get("routeRecommendation") or ()),
+    )
+
+
+def normalize_road_data(road_id, road_data):
+    """
+    Parses the payload of a highway into a list of Incidents.
+
+    Args:
+        road_id (str): ID of the highway (eg. "A8").
+        road_data (dict): {"roadworks": [...], "warning": [...], "closure": [...]}
+
+    Returns:
+        list: Incidents of all services.
+    """
+    incidents = []
+    for service in SERVICES:
+        for item in road_data.get(service) or []:
+            incidents.append(parse_incident(road_id, service, item))
+    return incidents
+
+
+def normalize_all_data(roads_data):
+    """
+    Parses the output of AutobahnApiClient.get_all_data into a list of Incidents.
+    roads_data can also be an iterable of (road_id, road_data), eg. AutobahnApiClient.iter_all_data(),
+    then every payload can be released as soon as it is parsed.
+    """
+    incidents = []
+    items = roads_data.items() if isinstance(roads_data, dict) else roads_data
+    for road_id, road_data in items:
+        incidents.extend(normalize_road_data(road_id, road_data))
+    return incidents
+
+
+def split_by_service(incidents):
+    """
+    Splits incidents into (roadworks, warnings, closures) lists, eg. for generate_einsatz_email_prompt.
+    """
+    by_service = {service: [] for service in SERVICES}
+    for incident in incidents:
+        by_service[incident.service].append(incident)
+    return tuple(by_service[service] for service in SERVICES)
+
+
+if __name__ == "__main__":
+    warning = {
+        "extent": "8.61785,52.97344,8.69904,53.00507",
+        "identifier": "V0FSTklOR19fbWRtLnZpel9fTE1TLU5JL3JfTE1TLU5JLzIxMjI2MF9EICBOSSBMTVMtTkkgIC4w",
+        "routeRecommendation": [],
+        "coordinate": {"lat": "53.005070", "long": "8.699040"},
+        "footer": [],
+        "icon": "101",
+        "isBlocked": "false",
+        "description": ["Beginn: 25.05.2021 00:00", "Ende: 30.11.2021 23:59", "", "A1 Bremen Richtung Osnabrück"],
+        "title": "A1 | AS Delmenhorst-Ost (58b) - AS Groß Ippener (59)",
+        "point": "8.699040,53.005070",
+        "display_type": "WARNING",
+        "lorryParkingFeatureIcons": [],
+        "future": "false",
+        "subtitle": "Bremen Richtung Osnabrück",
+        "startTimestamp": "2021-05-25T00:00:00.000+0200",
+    }
+    incident = parse_incident("A1", "warning", warning)
+    print(incident, incident.lat, incident.lon, incident.extent, incident.is_blocked, incident.start_time)
+    print(incident.to_dict())
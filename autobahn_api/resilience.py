@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header (seconds or HTTP date).
+
+    Returns:
+        float: Seconds to wait or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """
+    Exponential backoff with full jitter: a random delay up to base * 2^attempt, at most cap seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveTokenBucket:
+    def __init__(self, rate=None, burst=None, min_rate=0.5):
+        """
+        Token bucket shared by all requests of a client. The rate is halved when the API throttles (429)
+        and recovers step by step with successful responses (AIMD), a Retry-After pauses all requests.
+
+        Args:
+            rate (float): Maximum requests per second, None for no limit (Retry-After is still honored).
+            burst (int): Bucket size, defaults to one second of requests.
+            min_rate (float): Lower bound of the adapted rate.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self.capacity = burst or (max(1.0, rate) if rate else 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self.rate is None:
+                        return
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            if self.rate is not None and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def pause(self, seconds):
+        """
+        Holds back all requests for the given seconds (eg. Retry-After of a 503).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Slows down after a 429 and pauses all requests for retry_after seconds.
+        """
+        with self._lock:
+            if self.rate is not None:
+                self._refill(time.monotonic())
+                self.rate = max(self.min_rate, self.rate / 2)
+        if retry_after:
+            self.pause(retry_after)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Stops requests to an endpoint after failure_threshold consecutive failures. After reset_timeout seconds
+        a single trial request is let through, its result closes the circuit again or keeps it open.
+
+        Args:
+            failure_threshold (int): Consecutive failures until the circuit opens.
+            reset_timeout (float): Seconds until a trial request is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns True if a request may be sent.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # open, or half open with the trial request still running
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        Records a failed request.
+
+        Returns:
+            bool: True if the circuit was opened by this failure.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Default time-to-live in seconds per service of the Autobahn API
+DEFAULT_TTLS = {
+    "roads": 6 * 60 * 60,
+    "roadworks": 15 * 60,
+    "warning": 60,
+    "closure": 5 * 60,
+    "details": 15 * 60,
+}
+
+# Seconds after which a temporary file counts as left over by an interrupted write, a write takes milliseconds
+TMP_MAX_AGE = 60
+
+
+def service_for_endpoint(endpoint):
+    """
+    Maps an endpoint of the Autobahn API to the service name used for the TTL lookup.
+
+    Args:
+        endpoint (str): Endpoint relative to the base URL (eg. "/A8/services/warning").
+
+    Returns:
+        str: "roads", "details" or the service name (eg. "warning").
+    """
+    path = endpoint.strip("/")
+    if not path:
+        return "roads"
+    if path.startswith("details/"):
+        return "details"
+    return path.rsplit("/", 1)[-1]
+
+
+class CacheEntry:
+    __slots__ = ("data", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, data, etag=None, last_modified=None, fetched_at=None):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=None, ttls=None, max_entries=512, max_age=None):
+        """
+        Initializes the response cache: an in-memory LRU backed by a disk store.
+
+        Args:
+            cache_dir (str): Directory of the disk store. None keeps the cache in memory only.
+            ttls (dict): Time-to-live in seconds per service, overrides DEFAULT_TTLS.
+            max_entries (int): Maximum number of entries kept in memory.
+            max_age (float): Seconds after which files are removed from the disk store (eg. details of
+                incidents which are long gone), defaults to the longest TTL. Stale entries younger than that
+                are kept, they are served while the API is unavailable.
+        """
+        self.cache_dir = cache_dir
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.max_age = max_age if max_age is not None else max(self.ttls.values())
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = time.time()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.prune()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("key") != key:
+            return None
+        return CacheEntry(stored["data"], stored.get("etag"), stored.get("last_modified"), stored.get("fetched_at"))
+
+    def _store(self, key, entry):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        stored = {
+            "key": key,
+            "data": entry.data,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "fetched_at": entry.fetched_at,
+        }
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # atomic, readers never see a half written file
+        except OSError as e:
+            print(f"Error writing cache file '{path}': {e}")
+
+    def get(self, key):
+        """
+        Returns the cached entry for a key (fresh or stale) or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.cache_dir:
+            return None
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """
+        Stores a response in memory and on disk.
+        """
+        entry = CacheEntry(data, etag, last_modified)
+        self._remember(key, entry)
+        if self.cache_dir:
+            self._store(key, entry)
+            # the disk store is pruned at most once per max_age
+            with self._lock:
+                prune = entry.fetched_at - self._last_prune >= self.max_age
+                if prune:
+                    self._last_prune = entry.fetched_at
+            if prune:
+                self.prune()
+        return entry
+
+    def prune(self):
+        """
+        Removes the files of the disk store which weren't written for max_age seconds
+        and the temporary files left by interrupted writes.
+
+        Returns:
+            int: Number of removed files.
+        """
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        removed = 0
+        try:
+            with os.scandir(self.cache_dir) as files:
+                for file in files:
+                    if file.name.endswith(".json"):
+                        cutoff = now - self.max_age
+                    elif file.name.endswith(".tmp"):
+                        cutoff = now - TMP_MAX_AGE
+                    else:
+                        continue
+                    try:
+                        if file.stat().st_mtime < cutoff:
+                            os.remove(file.path)
+                            removed += 1
+                    except OSError:
+                        pass  # removed or rewritten concurrently (eg. by another shard)
+        except OSError as e:
+            print(f"Error cleaning up cache directory '{self.cache_dir}': {e}")
+        return removed
+
+    def touch(self, key):
+        """
+        Marks a cached entry as fresh again, eg. after a "304 Not Modified" response.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return self.put(key, entry.data, entry.etag, entry.last_modified)
+
+    def is_fresh(self, entry, endpoint):
+        """
+        Checks whether an entry is still within the TTL of the endpoint's service.
+        """
+        ttl = self.ttls.get(service_for_endpoint(endpoint), 0)
+        return (time.time() - entry.fetched_at) < ttl
+
+    def clear(self):
+        """
+        Removes all entries from memory and disk.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith((".json", ".tmp")):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
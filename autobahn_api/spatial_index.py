@@ -0,0 +1,205 @@
+import math
+import threading
+from autobahn_api.incidents import SERVICES, normalize_road_data
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in kilometers.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+class SpatialIndex:
+    def __init__(self, incidents=(), cell_size=0.1):
+        """
+        Uniform grid index over incidents for radius, k-nearest and bounding-box queries.
+        Incidents without a position are ignored. The incidents of a highway can be replaced with update_road,
+        so one index can follow the whole network while the highways are polled one by one.
+
+        Args:
+            incidents (list): Normalized incidents (see autobahn_api.incidents).
+            cell_size (float): Edge length of a grid cell in degrees (0.1 is about 11 x 7 km in Germany).
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.size = 0
+        # {road_id: [incident]} of the indexed incidents, needed to replace the incidents of a highway
+        self._roads = {}
+        # bounds of the occupied cells, only growing (the ring search of nearest stops at them)
+        self._bounds = None
+        self._lock = threading.Lock()
+        for incident in incidents:
+            self._add(incident)
+
+    @classmethod
+    def from_road_data(cls, roads_data, cell_size=0.1):
+        """
+        Builds a network-wide index from the output of AutobahnApiClient.get_all_data or iter_all_data.
+        """
+        index = cls(cell_size=cell_size)
+        items = roads_data.items() if isinstance(roads_data, dict) else roads_data
+        for road_id, road_data in items:
+            index.update_road(road_id, normalize_road_data(road_id, road_data))
+        return index
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _add(self, incident):
+        if not incident.has_position:
+            return
+        row, col = cell = self._cell(incident.lat, incident.lon)
+        self.cells.setdefault(cell, []).append(incident)
+        self._roads.setdefault(incident.road_id, []).append(incident)
+        self.size += 1
+        if self._bounds is None:
+            self._bounds = (row, row, col, col)
+        else:
+            min_row, max_row, min_col, max_col = self._bounds
+            self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+
+    def update_road(self, road_id, incidents, services=SERVICES):
+        """
+        Replaces the indexed incidents of a highway with its current ones.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            incidents (list): Current normalized incidents of the highway.
+            services (iterable): Services the incidents are current for, the incidents of other services
+                (eg. after a failed request) are kept.
+        """
+        services = set(services)
+        with self._lock:
+            kept = []
+            for incident in self._roads.pop(road_id, ()):
+                if incident.service not in services:
+                    kept.append(incident)
+                    continue
+                cell = self._cell(incident.lat, incident.lon)
+                self.cells[cell].remove(incident)
+                if not self.cells[cell]:
+                    del self.cells[cell]
+                self.size -= 1
+            if kept:
+                self._roads[road_id] = kept
+            for incident in incidents:
+                if incident.service in services:
+                    self._add(incident)
+
+    def _candidates(self, min_row, max_row, min_col, max_col):
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield from self.cells.get((row, col), ())
+
+    def _ring_cells(self, center_row, center_col, ring):
+        """
+        Yields the cells at Chebyshev distance ring from the center cell, clipped to the bounds of the occupied cells.
+        """
+        min_row, max_row, min_col, max_col = self._bounds
+        if ring == 0:
+            yield center_row, center_col
+            return
+        cols = range(max(center_col - ring, min_col), min(center_col + ring, max_col) + 1)
+        for row in (center_row - ring, center_row + ring):
+            if min_row <= row <= max_row:
+                for col in cols:
+                    yield row, col
+        rows = range(max(center_row - ring + 1, min_row), min(center_row + ring - 1, max_row) + 1)
+        for col in (center_col - ring, center_col + ring):
+            if min_col <= col <= max_col:
+                for row in rows:
+                    yield row, col
+
+    def bbox_query(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Returns all incidents within a bounding box.
+        """
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        with self._lock:
+            return [
+                incident for incident in self._candidates(min_row, max_row, min_col, max_col)
+                if min_lat <= incident.lat <= max_lat and min_lon <= incident.lon <= max_lon
+            ]
+
+    def radius_query(self, lat, lon, radius_km):
+        """
+        Returns all incidents within radius_km of a position (eg. of a patrol).
+
+        Returns:
+            list: (distance_km, incident) tuples sorted by distance.
+        """
+        # the bounding box of the circle, widened in longitude at the latitude farthest from the equator
+        d_lat = radius_km / KM_PER_DEGREE
+        d_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + d_lat, 89.0))), 1e-6))
+        results = []
+        for incident in self.bbox_query(lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon):
+            distance = haversine_km(lat, lon, incident.lat, incident.lon)
+            if distance <= radius_km:
+                results.append((distance, incident))
+        results.sort(key=lambda result: result[0])
+        return results
+
+    def nearest(self, lat, lon, k=5):
+        """
+        Returns the k incidents nearest to a position (eg. of a patrol), searching the grid ring by ring.
+
+        Returns:
+            list: (distance_km, incident) tuples sorted by distance.
+        """
+        with self._lock:
+            return self._nearest(lat, lon, k)
+
+    def _nearest(self, lat, lon, k):
+        if not self.cells or k <= 0:
+            return []
+
+        center_row, center_col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self._bounds
+        max_ring = max(abs(center_row - min_row), abs(center_row - max_row),
+                       abs(center_col - min_col), abs(center_col - max_col))
+
+        results = []
+        for ring in range(max_ring + 1):
+            for row, col in self._ring_cells(center_row, center_col, ring):
+                for incident in self.cells.get((row, col), ()):
+                    results.append((haversine_km(lat, lon, incident.lat, incident.lon), incident))
+
+            if len(results) >= k:
+                results.sort(key=lambda result: result[0])
+                # everything outside the searched rings is at least this far away
+                lat_extent = abs(lat) + (ring + 1) * self.cell_size
+                min_outside_km = ring * self.cell_size * KM_PER_DEGREE * max(math.cos(math.radians(min(lat_extent, 89.0))), 0.0)
+                if results[k - 1][0] <= min_outside_km:
+                    break
+
+        results.sort(key=lambda result: result[0])
+        return results[:k]
+
+
+def rank_hotspots(incidents, position, k=5):
+    """
+    Returns the k incidents nearest to a patrol position as pre-ranked deployment candidates.
+
+    Args:
+        incidents (list): Normalized incidents.
+        position (dict): {"lat": ..., "lon": ...} of the patrol, None disables the ranking.
+        k (int): Number of candidates.
+
+    Returns:
+        list: (distance_km, incident) tuples nearest first, None without position.
+    """
+    if not position:
+        return None
+    return SpatialIndex(incidents).nearest(float(position["lat"]), float(position["lon"]), k)
@@ -0,0 +1,56 @@
+import hashlib
+import time
+from LLM_integration.llm_api_handler import LLMApiHandler
+from LLM_integration.rate_limiter import RateLimiter
+
+
+class _FakeResponse:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, latency=0.5, stream_chunks=8):
+        """
+        Stand-in for genai.GenerativeModel with a fixed latency and a deterministic answer.
+        """
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+
+    def _answer(self, prompt):
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return (
+            f"Betreff: Einsatzhinweis Benchmark {digest}\n\n"
+            "Sehr geehrte Kolleginnen und Kollegen der Autobahnpolizei-Bereitschaft,\n\n"
+            "dies ist eine synthetische Antwort für Benchmarks.\n\n"
+            "Mit freundlichen Grüßen,\nIhr KI-Verkehrsassistent"
+        )
+
+    def generate_content(self, prompt, stream=False):
+        text = self._answer(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return _FakeResponse(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        size = max(1, len(text) // self.stream_chunks + 1)
+        for start in range(0, len(text), size):
+            time.sleep(self.latency / self.stream_chunks)
+            yield _FakeResponse(text[start:start + size])
+
+
+class FakeLLMApiHandler(LLMApiHandler):
+    def __init__(self, latency=0.5, cache=None, requests_per_minute=None, tokens_per_minute=None):
+        """
+        LLMApiHandler backed by FakeModel: caching, rate limiting and batching run as usual,
+        no API key or network is needed.
+        """
+        self.model_name = "fake-model"
+        self.generation_config = None
+        self.cache = cache
+        self.max_retries = 0
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.model = FakeModel(latency)
@@ -0,0 +1,162 @@
+"""
+Offline benchmarks of the pipeline stages: fetching (against a local stub of the Autobahn API),
+prompt building, generation (fake LLM) and sending (local SMTP sink). No network access is needed.
+
+    python -m benchmarks.run_benchmarks --roads 50 --incidents 40 --max-p95 fetch=500 prompt=20
+
+Exits with code 1 if a --max-p95 limit is exceeded, so regressions can be caught in CI.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from autobahn_api.autobahn_api_client import AutobahnApiClient
+from autobahn_api.incidents import normalize_road_data, split_by_service
+from benchmarks.fake_llm import FakeLLMApiHandler
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stub_autobahn_api import StubAutobahnApi, make_network
+from email_notifier.email_sender import EmailSender
+from LLM_integration.prompts import generate_einsatz_email_prompt
+from monitoring.metrics import metrics
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the percentile of already sorted values (nearest-rank).
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class StageResult:
+    def __init__(self, name, latencies, wall_time):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.wall_time = wall_time
+
+    def as_dict(self):
+        count = len(self.latencies)
+        return {
+            "stage": self.name,
+            "count": count,
+            "wall_time_s": round(self.wall_time, 4),
+            "throughput_per_s": round(count / self.wall_time, 2) if self.wall_time > 0 else None,
+            "p50_ms": round(percentile(self.latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(self.latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 0.99) * 1000, 3),
+        }
+
+
+def _timed_map(function, items, workers):
+    """
+    Calls function for every item on a thread pool, returns the results, per-call latencies and wall time.
+    """
+    latencies = []
+
+    def timed(item):
+        start = time.perf_counter()
+        result = function(item)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(timed, items))
+    return results, latencies, time.perf_counter() - start
+
+
+def run(args):
+    network = make_network(args.roads, args.incidents)
+    results = []
+
+    with StubAutobahnApi(network, latency=args.api_latency, error_rate=args.api_error_rate,
+                         throttle_rate=args.api_throttle_rate, retry_after=0) as stub, SMTPSink() as sink:
+        # Fetching
+        client = AutobahnApiClient(stub.url, args.workers, backoff_base=0.05)
+        road_ids = client.get_available_roads()["roads"]
+        roads_data, latencies, wall_time = _timed_map(client.get_road_data, road_ids, args.workers)
+        results.append(StageResult("fetch", latencies, wall_time))
+
+        # Prompt building (normalization included)
+        def build_prompt(item):
+            road_id, road_data = item
+            roadworks, warnings, closures = split_by_service(normalize_road_data(road_id, road_data))
+            return generate_einsatz_email_prompt(road_id, roadworks, warnings, closures,
+                                                 compact=True, token_budget=args.token_budget)
+        prompts, latencies, wall_time = _timed_map(build_prompt, list(zip(road_ids, roads_data)), 1)
+        results.append(StageResult("prompt", latencies, wall_time))
+
+        # Generation
+        llm_handler = FakeLLMApiHandler(latency=args.llm_latency)
+        responses, latencies, wall_time = _timed_map(llm_handler.generate_response, prompts, args.llm_workers)
+        results.append(StageResult("generate", latencies, wall_time))
+
+        # Sending
+        os.environ.setdefault("SMTP_PASSWORD", "benchmark")
+        host, port = sink.address
+        email_sender = EmailSender(host, port, "benchmark", None, "benchmark@example.com", "police@example.com", use_tls=False)
+        _, latencies, wall_time = _timed_map(lambda body: email_sender.send_email("Benchmark", body), responses, 1)
+        email_sender.close()
+        results.append(StageResult("send", latencies, wall_time))
+
+        if sink.messages != len(responses):
+            print(f"Warning: the SMTP sink received {sink.messages} of {len(responses)} emails.", file=sys.stderr)
+
+    return results
+
+
+def parse_limits(values):
+    limits = {}
+    for value in values or []:
+        stage, _, limit = value.partition("=")
+        limits[stage] = float(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the Autobahn pipeline stages.")
+    parser.add_argument("--roads", type=int, default=20, help="number of synthetic highways")
+    parser.add_argument("--incidents", type=int, default=30, help="incidents per service and highway")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="latency of the stub API in seconds")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="share of 503 responses of the stub API")
+    parser.add_argument("--api-throttle-rate", type=float, default=0.0, help="share of 429 responses of the stub API")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="latency of the fake LLM in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent fetches")
+    parser.add_argument("--llm-workers", type=int, default=4, help="concurrent LLM calls")
+    parser.add_argument("--token-budget", type=int, default=8000, help="prompt token budget")
+    parser.add_argument("--json", dest="json_path", help="write the results to this JSON file")
+    parser.add_argument("--metrics", dest="metrics_path", help="record the pipeline metrics and write them to this file")
+    parser.add_argument("--max-p95", nargs="*", metavar="STAGE=MS", help="fail if the p95 latency of a stage exceeds MS")
+    args = parser.parse_args(argv)
+
+    if args.metrics_path:
+        metrics.enable()
+    results = [result.as_dict() for result in run(args)]
+    if args.metrics_path:
+        metrics.write(args.metrics_path)
+
+    print(f"{'stage':<10}{'count':>7}{'wall s':>10}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(f"{result['stage']:<10}{result['count']:>7}{result['wall_time_s']:>10.3f}{result['throughput_per_s'] or 0:>10.1f}"
+              f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    for stage, limit in parse_limits(args.max_p95).items():
+        for result in results:
+            if result["stage"] == stage and result["p95_ms"] > limit:
+                print(f"FAIL: p95 of '{stage}' is {result['p95_ms']:.2f} ms (limit {limit:.2f} ms)", file=sys.stderr)
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self._reply("220 smtp-sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            verb = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-smtp-sink\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                self._reply("235 authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 ok")
+            elif verb == "DATA":
+                self._reply("354 end data with <CR><LF>.<CR><LF>")
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line == b".\r\n":
+                        break
+                self.server.sink.record()
+                self._reply("250 queued")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                break
+            else:
+                self._reply("502 command not implemented")
+
+
+class SMTPSink:
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        Local SMTP server accepting and discarding every email (plain SMTP, AUTH PLAIN accepts any credentials).
+
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 picks a free one.
+        """
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def record(self):
+        with self._lock:
+            self.messages += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,85 @@
+"""
+Measures the import time of the CLI entry points in fresh interpreters and checks it against a budget.
+
+    python -m benchmarks.startup_time --budget-ms 300
+
+Exits with code 1 if the median startup time exceeds the budget, so slow imports can be caught in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = ("core.interactive_suggestions", "core.main")
+# Modules which must only be imported on first use, not at startup
+LAZY_MODULES = ("google.generativeai", "dotenv", "numpy")
+
+
+def measure(module, runs=5):
+    """
+    Imports module in fresh interpreters and returns the wall times in seconds.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True, env=os.environ.copy())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def eager_imports(module):
+    """
+    Returns the lazy modules that are nevertheless imported at startup of module.
+    """
+    check = f"import sys, {module}; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], check=True, capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def slowest_imports(module, count=5):
+    """
+    Returns the direct imports of module with the highest cumulative import time (python -X importtime).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            check=True, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # importtime indents nested imports by two spaces per level, level 1 are the imports of the entry point
+        name = parts[2].lstrip()
+        if len(parts[2]) - len(name) == 3:
+            imports.append((int(parts[1]), name))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time of the CLI entry points.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median startup time exceeds this")
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(measure("sys", args.runs))
+    failed = False
+    for module in args.modules:
+        median = statistics.median(measure(module, args.runs))
+        print(f"{module}: {median * 1000:.0f} ms (interpreter alone {baseline * 1000:.0f} ms)")
+        for micros, name in slowest_imports(module):
+            print(f"    {micros / 1000:7.1f} ms  {name}")
+
+        eager = eager_imports(module)
+        if eager:
+            print(f"FAIL: {module} imports {', '.join(eager)} at startup", file=sys.stderr)
+            failed = True
+        if args.budget_ms is not None and median * 1000 > args.budget_ms:
+            print(f"FAIL: startup of {module} takes {median * 1000:.0f} ms (budget {args.budget_ms:.0f} ms)", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
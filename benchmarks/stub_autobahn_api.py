@@ -0,0 +1,170 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICES = ("roadworks", "warning", "closure")
+
+
+def make_incident(road_id, service, index, rng):
+    """
+    Builds a synthetic incident in the format of the Autobahn API.
+    """
+    lat = 47.5 + rng.random() * 7
+    lon = 6.0 + rng.random() * 8.5
+    identifier = f"{service}-{road_id}-{index}"
+    return {
+        "extent": f"{lon - 0.05:.5f},{lat - 0.03:.5f},{lon:.5f},{lat:.5f}",
+        "identifier": identifier,
+        "routeRecommendation": [],
+        "coordinate": {"lat": f"{lat:.6f}", "long": f"{lon:.6f}"},
+        "footer": [],
+        "icon": "101",
+        "isBlocked": "true" if rng.random() < 0.15 else "false",
+        "description": [
+            "Beginn: 25.05.2021 00:00",
+            "Ende: 30.11.2021 23:59",
+            "",
+            f"{road_id} Richtung Süd",
+            f"zwischen AS {index} und AS {index + 1}",
+            "Fahrbahnverengung, geänderte Verkehrsführung, Staugefahr",
+        ],
+        "title": f"{road_id} | AS {index} - AS {index + 1}",
+        "point": f"{lon:.6f},{lat:.6f}",
+        "display_type": service.upper(),
+        "lorryParkingFeatureIcons": [],
+        "future": "false",
+        "subtitle": f"Richtung {'Nord' if index % 2 else 'Süd'}",
+        "startTimestamp": "2021-05-25T00:00:00.000+0200",
+    }
+
+
+def make_network(road_count=20, incidents_per_service=30, seed=42):
+    """
+    Builds a synthetic network: {road_id: {"roadworks": [...], "warning": [...], "closure": [...]}}.
+    """
+    rng = random.Random(seed)
+    network = {}
+    for road_number in range(1, road_count + 1):
+        road_id = f"A{road_number}"
+        network[road_id] = {
+            service: [make_incident(road_id, service, i, rng) for i in range(incidents_per_service)]
+            for service in SERVICES
+        }
+    return network
+
+
+class StubAutobahnApi:
+    def __init__(self, network=None, latency=0.05, host="127.0.0.1", port=0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, seed=42):
+        """
+        Local HTTP stub of the Autobahn API serving recorded or synthetic payloads with a fixed latency.
+        Responses carry an ETag and answer If-None-Match with "304 Not Modified".
+
+        Args:
+            network (dict): Payloads per highway, see make_network().
+            latency (float): Delay of every response in seconds.
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 picks a free one.
+            error_rate (float): Share of requests answered with "503 Service Unavailable".
+            throttle_rate (float): Share of requests answered with "429 Too Many Requests".
+            retry_after (int): Retry-After header of the 429 responses in seconds.
+            seed (int): Seed of the fault injection.
+        """
+        self.network = network if network is not None else make_network()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _payload(self, path):
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        if not parts:
+            return {"roads": list(self.network)}
+        if len(parts) == 3 and parts[1] == "services" and parts[0] in self.network and parts[2] in SERVICES:
+            return {parts[2]: self.network[parts[0]][parts[2]]}
+        if len(parts) == 3 and parts[0] == "details" and parts[1] in SERVICES:
+            for road in self.network.values():
+                for item in road[parts[1]]:
+                    if item["identifier"] == parts[2]:
+                        return item
+        return None
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    fault = stub._rng.random()
+                time.sleep(stub.latency)
+                if fault < stub.throttle_rate:
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(stub.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if fault < stub.throttle_rate + stub.error_rate:
+                    self.send_error(503)
+                    return
+                payload = stub._payload(self.path)
+                if payload is None:
+                    self.send_error(404)
+                    return
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-autobahn-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with StubAutobahnApi(latency=0) as stub:
+        print(f"Stub Autobahn API running at {stub.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
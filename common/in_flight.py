@@ -0,0 +1,13 @@
+import threading
+
+
+class InFlight:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        """
+        A computation shared by concurrent callers: the first caller computes the result and sets the event,
+        the others wait for the event and take the result.
+        """
+        self.event = threading.Event()
+        self.result = None
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+
+
+def prepare(db_path):
+    """
+    Creates the directory of a SQLite database if needed.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def connect(db_path):
+    """
+    Opens a connection to a SQLite database. The stores use one short-lived connection per operation,
+    sqlite connections can't be shared across threads.
+    """
+    return sqlite3.connect(db_path, timeout=10)
+
+
+def execute(db_path, sql, params=()):
+    """
+    Runs a statement in its own transaction.
+
+    Returns:
+        list: The rows of the result.
+    """
+    connection = connect(db_path)
+    try:
+        with connection:
+            return connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+
+
+def write(db_path, sql, params=()):
+    """
+    Runs a writing statement in its own transaction.
+
+    Returns:
+        tuple: (lastrowid, rowcount)
+    """
+    connection = connect(db_path)
+    try:
+        with connection:
+            cursor = connection.execute(sql, params)
+            return cursor.lastrowid, cursor.rowcount
+    finally:
+        connection.close()
@@ -0,0 +1,42 @@
+import functools
+import os
+
+
+def default_config_path():
+    return os.path.join(os.getcwd(), "config", "config.yaml")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config(path):
+    import yaml  # only needed once per process
+
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(str(e)) from e
+
+
+def load_config(path=None):
+    """
+    Loads the YAML config. The file is parsed once per process, later calls return the same dict,
+    so callers must not modify it.
+
+    Args:
+        path (str): Path of the config file, defaults to config/config.yaml in the working directory.
+
+    Returns:
+        dict: The config.
+
+    Raises:
+        FileNotFoundError: If the config file does not exist.
+        ValueError: If the config file is not valid YAML.
+    """
+    return _load_config(os.path.abspath(path or default_config_path()))
+
+
+def clear_config_cache():
+    """
+    Forgets the loaded configs, the next load_config() reads the file again.
+    """
+    _load_config.cache_clear()
@@ -1,8 +1,15 @@
-import os
-import yaml
 from autobahn_api.autobahn_api_client import AutobahnApiClient
+from autobahn_api.incident_archive import IncidentArchive
+from autobahn_api.incidents import normalize_road_data, split_by_service
+from autobahn_api.response_cache import ResponseCache
+from autobahn_api.spatial_index import rank_hotspots
+from config import default_config_path, load_config
+from core.road_prefetch import RoadPrefetcher, SelectionStats
 from LLM_integration.llm_api_handler import LLMApiHandler
+from LLM_integration.map_reduce import generate_einsatz_email_map_reduce
 from LLM_integration.prompts import generate_einsatz_email_prompt
+from LLM_integration.response_cache import LLMResponseCache
+from monitoring.metrics import configure as configure_metrics, export as export_metrics
 
 def autobahn_selection():
     """
@@ -11,9 +18,7 @@ def autobahn_selection():
     The user should enter the name of the highway (e.g., A980).
     """
 
-    config_path = os.path.join(os.getcwd(), "config", "config.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = load_config()
     autobahn_base_url = config.get("autobahn_api_url")
 
     client = AutobahnApiClient(autobahn_base_url)
@@ -39,13 +44,9 @@ def autobahn_selection():
 
     autobahn_id = autobahn_string
 
-    roadworks = client.get_roadworks(autobahn_id)
-    warnings = client.get_warnings(autobahn_id)
-    closures = client.get_closures(autobahn_id)
+    autobahn_id_dict = client.get_road_data(autobahn_id)
 
-    autobahn_id_dict = {**roadworks, **warnings, **closures}
-
-    print(f'Auf der Autobahn {autobahn_id} liegen {len(autobahn_id_dict["roadworks"])} Baustelle(n), {len(warnings["warning"])} Verkehrsmeldung(en) und {len(closures["closure"])} Sperrung(en) vor.')
+    print(f'Auf der Autobahn {autobahn_id} liegen {len(autobahn_id_dict.get("roadworks", []))} Baustelle(n), {len(autobahn_id_dict.get("warning", []))} Verkehrsmeldung(en) und {len(autobahn_id_dict.get("closure", []))} Sperrung(en) vor.')
 
 
 def advanced_autobahn_selection():
@@ -54,18 +55,18 @@ def advanced_autobahn_selection():
     """
 
     #1. Load config
-    config_path = os.path.join(os.getcwd(), "config", "config.yaml")
+    config_path = default_config_path()
     try:
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)    
+        config = load_config(config_path)
         print("Konfiguration erfolgreich geladen.")
 
     except FileNotFoundError:
         print(f"Fehler: Konfigurationsdatei '{config_path}' nicht gefunden.")
         return
-    except yaml.YAMLError as e:
+    except ValueError as e:
         print(f"Fehler beim Laden der Konfigurationsdatei: {e}")
         return
+    configure_metrics(config)
     
     #2. Initialise clients
     try:
@@ -73,14 +74,24 @@ def advanced_autobahn_selection():
         autobahn_base_url = config.get("autobahn_api_url")
         if not autobahn_base_url:
             raise ValueError("autobahn_api_url nicht in config.yaml gefunden.")
-        autobahn_client = AutobahnApiClient(autobahn_base_url)
+        response_cache = ResponseCache(config.get("cache_dir"), config.get("cache_ttl"))
+        autobahn_client = AutobahnApiClient(autobahn_base_url, config.get("autobahn_max_workers", 8), response_cache,
+                                            timeout=config.get("autobahn_timeout", 10),
+                                            max_retries=config.get("autobahn_max_retries", 3),
+                                            requests_per_second=config.get("autobahn_requests_per_second"),
+                                            failure_threshold=config.get("autobahn_circuit_failure_threshold", 5),
+                                            reset_timeout=config.get("autobahn_circuit_reset_timeout", 30))
         print("Autobahn API Client initialisiert.")
+        archive = IncidentArchive(config["incident_archive_path"]) if config.get("incident_archive_path") else None
 
         # LLM Handler (Gemini)
         gemini_model = config.get("llm_model")
         if not gemini_model:
             raise ValueError("llm_model (Gemini) nicht in config.yaml gefunden.")
-        llm_handler = LLMApiHandler(gemini_model)
+        llm_cache = LLMResponseCache(config.get("llm_cache_path"), config.get("llm_cache_ttl", 900))
+        llm_handler = LLMApiHandler(gemini_model, config.get("llm_generation_config"), llm_cache,
+                                    requests_per_minute=config.get("llm_requests_per_minute"),
+                                    tokens_per_minute=config.get("llm_tokens_per_minute"))
         print("Gemini LLM Handler initialisiert.")
 
     except ValueError as e:
@@ -90,25 +101,43 @@ def advanced_autobahn_selection():
         print(f"Unerwarteter Fehler bei der Initialisierung: {e}")
         return
     
-    #3. Collect highway data
-    # TODO: increase the performance. get_all_data is timeconsuming and inefficient. Idea: Collect/Update the data per highway when needed. 
-    autobahn_data = autobahn_client.get_all_data()
+    #3. Collect highway list, the data of each highway is loaded when needed
+    autobahn_ids = autobahn_client.get_available_roads()
+    if not autobahn_ids:
+        print("Fehler: Liste der Autobahnen konnte nicht abgerufen werden.")
+        return
+    autobahn_list = autobahn_ids["roads"]
+
+    # Warm the cache in the background, most frequently selected highways first
+    selection_stats = SelectionStats(config.get("selection_stats_path"))
+    prefetcher = None
+    if autobahn_client.cache:
+        prefetcher = RoadPrefetcher(autobahn_client, autobahn_list, selection_stats).start()
 
     #4. Select highway
     print("Bitte geben Sie die Bezeichnung der gewünschten Autobahn ein (z.B. A980):")
-    print(", ".join(str(key) for key in autobahn_data) +".")
+    print(", ".join(autobahn_list) +".")
 
     while True:
         autobahn_input = filter(str.isdigit, input("Ihre Auswahl: ")) # only consider digit inputs
         autobahn_string = "A"+"".join(autobahn_input)
-        if autobahn_string in autobahn_data:
+        if autobahn_string in autobahn_list:
             print(f"Sie haben die Autobahn {autobahn_string} ausgewählt.")
             break
         else:
             print(f"Ungültige Eingabe {autobahn_string} . Bitte geben Sie eine Autobahn aus der Liste ein.")
 
     autobahn_id = autobahn_string
-    print(f'Auf der Autobahn {autobahn_id} liegen {len(autobahn_data[autobahn_id]["roadworks"])} Baustelle(n), {len(autobahn_data[autobahn_id]["warning"])} Verkehrsmeldung(en) und {len(autobahn_data[autobahn_id]["closure"])} Sperrung(en) vor.')
+    selection_stats.record(autobahn_id)
+    if prefetcher:
+        prefetcher.stop()
+    road_data = autobahn_client.get_road_data(autobahn_id)
+    trend = None
+    if archive is not None:
+        archive.record(autobahn_id, road_data)
+        trend = archive.trend_summary(autobahn_id, config.get("archive_trend_days", 7))
+    road_roadworks, road_warnings, road_closures = split_by_service(normalize_road_data(autobahn_id, road_data))
+    print(f'Auf der Autobahn {autobahn_id} liegen {len(road_roadworks)} Baustelle(n), {len(road_warnings)} Verkehrsmeldung(en) und {len(road_closures)} Sperrung(en) vor.')
 
     #5. Select hazard type
     print("Bitte geben Sie die Art der Meldungen ein zu der eine Einsatzempfehlung gewünscht ist:")
@@ -124,41 +153,74 @@ def advanced_autobahn_selection():
         
     if type_int == 1:
         print(f"Sie haben sich für Einsatzempfehlungen zu Baustellen entschieden.")
-        roadwork_data = autobahn_data[autobahn_id]["roadworks"]
+        roadwork_data = road_roadworks
         warnings_data = []
         closures_data = []
         
     elif type_int == 2:
         print(f"Sie haben sich für Einsatzempfehlungen zu Verkehrsmeldungen entschieden.")
         roadwork_data = []
-        warnings_data = autobahn_data[autobahn_id]["warning"]
+        warnings_data = road_warnings
         closures_data = []
         
     elif type_int == 3:
         print(f"Sie haben sich für Einsatzempfehlungen zu Sperrungen entschieden.")
         roadwork_data = []
         warnings_data = []
-        closures_data = autobahn_data[autobahn_id]["closure"]
+        closures_data = road_closures
     
     else:   # default for all int inputs
         print(f"Sie haben sich für Einsatzempfehlungen zu allen Meldungen entschieden.")
-        roadwork_data = autobahn_data[autobahn_id]["roadworks"]
-        warnings_data = autobahn_data[autobahn_id]["warning"]
-        closures_data = autobahn_data[autobahn_id]["closure"]
-
-    #6. Generate LLM prompt
-    email_prompt = generate_einsatz_email_prompt(autobahn_id, roadwork_data, warnings_data, closures_data)
-
-    #7. Call LLM
+        roadwork_data = road_roadworks
+        warnings_data = road_warnings
+        closures_data = road_closures
+
+    #6. Generate LLM prompt and call LLM
+    top_clusters = config.get("hotspot_clusters")
+    if top_clusters:
+        # only pass the highest scored clusters of incidents to the LLM, numpy is imported only when needed
+        from autobahn_api.hotspot_scoring import select_top_incidents
+        roadwork_data, warnings_data, closures_data = select_top_incidents(
+            roadwork_data + warnings_data + closures_data, top_clusters,
+            cluster_radius_km=config.get("hotspot_cluster_radius_km", 2.0))
     print(f"Generiere E-Mail-Inhalt für {autobahn_id} mit Gemini...")
-    generated_email_content = llm_handler.generate_response(email_prompt)
-    if generated_email_content:
-        print(f"E-Mail-Inhalt für {autobahn_id} generiert. Inhalt wird nicht versendet. Hier der Inhalt: \n")
-        print(generated_email_content)
+    incident_count = len(roadwork_data) + len(warnings_data) + len(closures_data)
+    hotspots = rank_hotspots(roadwork_data + warnings_data + closures_data,
+                             config.get("patrol_position"), config.get("hotspot_count", 5))
+    chunk_size = config.get("map_reduce_chunk_size")
+    if chunk_size and incident_count > chunk_size:
+        # too many incidents for a single prompt: summarize chunks in parallel, then write the email
+        generated_email_content = generate_einsatz_email_map_reduce(
+            llm_handler, autobahn_id, roadwork_data, warnings_data, closures_data,
+            chunk_size=chunk_size,
+            max_workers=config.get("llm_max_workers", 4),
+            compact=config.get("prompt_compact", False),
+            hotspots=hotspots,
+            trend=trend)
+        if generated_email_content:
+            print(f"E-Mail-Inhalt für {autobahn_id} generiert. Inhalt wird nicht versendet. Hier der Inhalt: \n")
+            print(generated_email_content)
     else:
+        email_prompt = generate_einsatz_email_prompt(autobahn_id, roadwork_data, warnings_data, closures_data,
+                                                     compact=config.get("prompt_compact", False),
+                                                     token_budget=config.get("prompt_token_budget"),
+                                                     hotspots=hotspots,
+                                                     trend=trend)
+        # print the email while it is generated
+        generated_chunks = []
+        for chunk in llm_handler.generate_response_stream(email_prompt):
+            if not generated_chunks:
+                print(f"E-Mail-Inhalt für {autobahn_id} wird generiert. Inhalt wird nicht versendet. Hier der Inhalt: \n")
+            print(chunk, end="", flush=True)
+            generated_chunks.append(chunk)
+        generated_email_content = "".join(generated_chunks)
+        if generated_email_content:
+            print()
+
+    if not generated_email_content:
         print(f"Konnte keinen E-Mail-Inhalt für Autobahn {autobahn_id} generieren.")
 
-    
+    export_metrics(config)
     print("\nAutobahn-KI-Assistent beendet.")
 
 
@@ -1,15 +1,457 @@
+import signal
+import threading
+from autobahn_api.autobahn_api_client import AutobahnApiClient
+from autobahn_api.change_detector import ChangeDetector
+from autobahn_api.details_fetcher import DetailsFetcher
+from autobahn_api.incident_archive import IncidentArchive
+from autobahn_api.incidents import SERVICES, normalize_road_data, split_by_service
+from autobahn_api.response_cache import ResponseCache
+from autobahn_api.spatial_index import SpatialIndex, rank_hotspots
+from config import default_config_path, load_config
+from core.pipeline import Pipeline, Stage
+from core.scheduler import RoadScheduler
+from core.sharding import ShardCoordinator, shard_path
+from email_notifier.digest import DigestCollector
+from email_notifier.email_sender import EmailSender
+from email_notifier.outbox import EmailOutbox
+from email_notifier.subscriptions import load_subscriptions
+from LLM_integration.hedged_generation import HedgedGenerator
+from LLM_integration.llm_api_handler import LLMApiHandler
+from LLM_integration.map_reduce import build_email_prompts, generate_email_from_prompts
+from LLM_integration.response_cache import LLMResponseCache
+from LLM_integration.template_email import render_template_email
+from monitoring.metrics import configure as configure_metrics, export as export_metrics, metrics
+
+
+def split_subject(email_content, road_id):
+    """
+    Splits the generated email into subject and body.
+    The subject is taken from the first line starting with "Betreff" or "Einsatzhinweis".
+
+    Args:
+        email_content (str): Email generated by the LLM.
+        road_id (str): ID of the highway (eg. "A8"), used for the default subject.
+
+    Returns:
+        tuple: (subject, body)
+    """
+    lines = email_content.strip().splitlines()
+    for i, line in enumerate(lines):
+        cleaned = line.strip().strip("*").strip()
+        if cleaned.lower().startswith("betreff"):
+            cleaned = cleaned.split(":", 1)[1].strip().strip("*").strip() if ":" in cleaned else ""
+        if cleaned.startswith("Einsatzhinweis"):
+            return cleaned, "\n".join(lines[:i] + lines[i + 1:]).strip()
+    return f"Einsatzhinweis {road_id}", email_content.strip()
+
+
+class RoadJob:
+    def __init__(self, road_id):
+        """
+        A highway on its way through the deployment pipeline.
+        The scheduler waits for decided, which is set as soon as it is known whether the highway had changes,
+        generating and sending the email continues in the later stages.
+        """
+        self.road_id = road_id
+        self.changed = False
+        self.decided = threading.Event()
+        self.road_data = None
+        # changes not yet reported, their snapshot is saved once the email is queued
+        self.changes = None
+        self.incidents = None
+        self.recipients = None
+        self.hotspots = None
+        self.nearby = None
+        self.trend = None
+        self.prompt = None
+        self.chunk_prompts = None
+        self.email_content = None
+        self.fallback_used = False
+        # the LLM email arriving after the template email was used
+        self.late_content = None
+        self.message_id = None
+        self.lock = threading.Lock()
+
+    def decide(self, changed):
+        if not self.decided.is_set():
+            self.changed = changed
+            self.decided.set()
+
+
+class DeploymentPipeline:
+    def __init__(self, config, autobahn_client, change_detector, llm_handler, outbox, details_fetcher=None, archive=None,
+                 router=None, digest=None):
+        """
+        Polling cycles of the highways as concurrent stages: fetch -> normalize -> prompt -> generate -> send.
+        The stages are connected by bounded queues (see core.pipeline), so network, LLM and SMTP waits
+        of different highways overlap and a slow LLM holds back the polling instead of buffering without limit.
+        With a details_fetcher the new and changed incidents are enriched with their details,
+        with an archive every snapshot is recorded and the recent history of the highway is added to the prompt.
+        With llm_deadline_seconds set, a template email is sent if the LLM doesn't answer in time
+        and replaced by the LLM email if that arrives before the template email was sent (see on_late_email).
+        With a router and a digest, the email of a highway is generated once and collected into
+        the digests of its subscribers, highways without subscribers are not generated at all.
+        With patrol_position and patrol_radius_km set, the current incidents of all polled highways are kept in a
+        spatial index and the incidents of other highways around the patrol are added to the prompt.
+        """
+        self.config = config
+        self.autobahn_client = autobahn_client
+        self.change_detector = change_detector
+        self.llm_handler = llm_handler
+        self.outbox = outbox
+        self.details_fetcher = details_fetcher
+        self.archive = archive
+        self.router = router
+        self.digest = digest
+
+        # network-wide index, every poll replaces the incidents of its highway
+        self.network_index = None
+        if config.get("patrol_position") and config.get("patrol_radius_km"):
+            self.network_index = SpatialIndex()
+
+        self.hedger = None
+        if config.get("llm_deadline_seconds"):
+            self.hedger = HedgedGenerator(config["llm_deadline_seconds"], config.get("llm_max_pending", 8))
+
+        settings = config.get("pipeline") or {}
+        # the fetch workers share the client's connection pool with its own and the details workers
+        autobahn_client.reserve_connections(settings.get("fetch_workers", 4))
+        self.pipeline = Pipeline([
+            Stage("fetch", self.fetch, settings.get("fetch_workers", 4)),
+            Stage("normalize", self.normalize, settings.get("normalize_workers", 1)),
+            Stage("prompt", self.build_prompt, settings.get("prompt_workers", 1)),
+            Stage("generate", self.generate, settings.get("generate_workers", 4)),
+            Stage("send", self.send, settings.get("send_workers", 1)),
+        ], queue_size=settings.get("queue_size", 8), on_drop=self.on_drop)
+
+    def start(self):
+        self.pipeline.start()
+        return self
+
+    def stop(self):
+        """
+        Finishes the highways already in the pipeline and saves the change detector state.
+        """
+        self.pipeline.stop()
+        if self.hedger is not None:
+            # late LLM emails of the last cycles are still handed to the outbox
+            self.hedger.close(wait=True)
+        if self.details_fetcher is not None:
+            self.details_fetcher.close()
+        self.change_detector.save()
+
+    def __call__(self, road_id):
+        """
+        Runs the cycle of a highway (called by the RoadScheduler).
+        Returns as soon as the change detection is done, the email is generated in the background.
+
+        Returns:
+            bool: True if the highway had changes since the last cycle.
+        """
+        job = RoadJob(road_id)
+        self.pipeline.submit(job)
+        job.decided.wait()
+        metrics.inc("cycles_total", changed=job.changed)
+        export_metrics(self.config)
+        return job.changed
+
+    def fetch(self, job):
+        job.road_data = self.autobahn_client.get_road_data(job.road_id)
+        if self.details_fetcher is not None:
+            self.details_fetcher.sync_listing(job.road_id, job.road_data)
+        return job
+
+    def normalize(self, job):
+        if self.archive is not None:
+            self.archive.record(job.road_id, job.road_data)
+        if self.network_index is not None:
+            # services missing from road_data (failed requests) keep their incidents
+            self.network_index.update_road(job.road_id, normalize_road_data(job.road_id, job.road_data),
+                                           job.road_data.keys())
+        changes = self.change_detector.update(job.road_id, job.road_data)
+        job.road_data = None
+        job.decide(changes.has_changes())
+        if not job.changed:
+            return None
+        # saved once the email is queued (see send), restored if the job is dropped before (see on_drop)
+        job.changes = changes
+
+        print(f"Änderungen: {changes.summary()}")
+        updated = dict(zip(SERVICES, changes.as_prompt_data()))
+        if self.details_fetcher is not None:
+            updated = self.details_fetcher.enrich(updated)
+        roadworks_data, warnings_data, closures_data = split_by_service(normalize_road_data(job.road_id, updated))
+        if not (roadworks_data or warnings_data or closures_data):
+            # only resolved incidents, nothing to deploy to
+            return self._reported(job)
+        if self.router is not None:
+            job.recipients = self.router.recipients(job.road_id, roadworks_data + warnings_data + closures_data)
+            if not job.recipients:
+                return self._reported(job)
+
+        top_clusters = self.config.get("hotspot_clusters")
+        if top_clusters:
+            from autobahn_api.hotspot_scoring import select_top_incidents  # numpy is imported only when needed
+            roadworks_data, warnings_data, closures_data = select_top_incidents(
+                roadworks_data + warnings_data + closures_data, top_clusters,
+                cluster_radius_km=self.config.get("hotspot_cluster_radius_km", 2.0))
+        job.incidents = (roadworks_data, warnings_data, closures_data)
+        return job
+
+    def build_prompt(self, job):
+        roadworks_data, warnings_data, closures_data = job.incidents
+        job.hotspots = rank_hotspots(roadworks_data + warnings_data + closures_data,
+                                     self.config.get("patrol_position"), self.config.get("hotspot_count", 5))
+        job.nearby = self.nearby_incidents(job.road_id)
+        if self.archive is not None:
+            job.trend = self.archive.trend_summary(job.road_id, self.config.get("archive_trend_days", 7))
+        job.prompt, job.chunk_prompts = build_email_prompts(
+            job.road_id, roadworks_data, warnings_data, closures_data,
+            chunk_size=self.config.get("map_reduce_chunk_size"),
+            compact=self.config.get("prompt_compact", False),
+            token_budget=self.config.get("prompt_token_budget"),
+            hotspots=job.hotspots,
+            trend=job.trend,
+            nearby=job.nearby)
+        return job
+
+    def nearby_incidents(self, road_id):
+        """
+        Returns the incidents of the other highways within patrol_radius_km of the patrol position.
+
+        Returns:
+            list: At most hotspot_count (distance_km, incident) tuples nearest first, None without network index.
+        """
+        if self.network_index is None:
+            return None
+        position = self.config["patrol_position"]
+        nearby = self.network_index.radius_query(float(position["lat"]), float(position["lon"]),
+                                                 float(self.config["patrol_radius_km"]))
+        return [(distance, incident) for distance, incident in nearby
+                if incident.road_id != road_id][:self.config.get("hotspot_count", 5)]
+
+    def generate(self, job):
+        prompt, chunk_prompts, hotspots, trend, nearby = job.prompt, job.chunk_prompts, job.hotspots, job.trend, job.nearby
+
+        def generate_email():
+            return generate_email_from_prompts(self.llm_handler, job.road_id, prompt, chunk_prompts,
+                                               self.config.get("llm_max_workers", 4), hotspots, trend, nearby)
+
+        if self.hedger is None:
+            job.email_content = generate_email()
+        else:
+            roadworks_data, warnings_data, closures_data = job.incidents
+            job.email_content, job.fallback_used = self.hedger.generate(
+                generate_email,
+                lambda: render_template_email(job.road_id, roadworks_data, warnings_data, closures_data, hotspots),
+                on_late=lambda content: self.on_late_email(job, content))
+        job.prompt = job.chunk_prompts = job.trend = job.nearby = job.incidents = None
+        if not job.email_content:
+            print(f"Konnte keinen E-Mail-Inhalt für Autobahn {job.road_id} generieren.")
+            return None
+        return job
+
+    def send(self, job):
+        with job.lock:
+            # the LLM email may have arrived while the template email was waiting for this stage
+            content = job.late_content or job.email_content
+            subject, body = split_subject(content, job.road_id)
+            job.message_id = self._queue_email(job, subject, body)
+        self._reported(job)
+        return job
+
+    def _reported(self, job):
+        """
+        Saves the snapshot of a highway whose changes were reported (or need no email), so a crashed or
+        restarted process doesn't report them again.
+        """
+        job.changes = None
+        self.change_detector.save(job.road_id)
+        return None
+
+    def on_drop(self, job):
+        """
+        Called by the pipeline for a job that was dropped or failed in a stage. If the email about its changes
+        wasn't queued (eg. the LLM failed), the previous snapshot is restored so the next poll reports them again.
+        """
+        job.decide(False)
+        if job.changes is not None:
+            self.change_detector.rollback(job.changes)
+            job.changes = None
+
+    def _queue_email(self, job, subject, body):
+        if self.digest is None:
+            return self.outbox.enqueue(subject, body)
+        return self.digest.add(job.road_id, subject, body, job.recipients)
+
+    def on_late_email(self, job, content):
+        """
+        Handles an LLM email which arrived after the deadline: it replaces the queued template email,
+        if that was sent already it is sent as follow-up (llm_late_followup).
+        """
+        with job.lock:
+            if job.message_id is None:
+                job.late_content = content
+                return
+        subject, body = split_subject(content, job.road_id)
+        replaced = (self.digest or self.outbox).replace(job.message_id, subject, body)
+        # None: handed to the shard coordinator, which replaces or follows up itself
+        if replaced:
+            print(f"Vorlagen-E-Mail für {job.road_id} durch die verspätete KI-E-Mail ersetzt.")
+        elif replaced is False and self.config.get("llm_late_followup", False):
+            self._queue_email(job, f"Aktualisierung: {subject}", body)
+
+
+def create_autobahn_client(config, shard_count=1):
+    """
+    Creates the Autobahn API client from the config.
+    With shard_count processes polling in parallel, each gets its share of the request rate limit.
+
+    Raises:
+        ValueError: If autobahn_api_url is missing.
+    """
+    autobahn_base_url = config.get("autobahn_api_url")
+    if not autobahn_base_url:
+        raise ValueError("autobahn_api_url nicht in config.yaml gefunden.")
+    requests_per_second = config.get("autobahn_requests_per_second")
+    response_cache = ResponseCache(config.get("cache_dir"), config.get("cache_ttl"))
+    return AutobahnApiClient(autobahn_base_url, config.get("autobahn_max_workers", 8), response_cache,
+                             timeout=config.get("autobahn_timeout", 10),
+                             max_retries=config.get("autobahn_max_retries", 3),
+                             requests_per_second=requests_per_second / shard_count if requests_per_second else None,
+                             failure_threshold=config.get("autobahn_circuit_failure_threshold", 5),
+                             reset_timeout=config.get("autobahn_circuit_reset_timeout", 30))
+
+
+def create_deployment(config, outbox, router=None, digest=None, shard_index=None, shard_count=1):
+    """
+    Creates the DeploymentPipeline and its clients from the config.
+    A shard (see core.sharding) keeps its own change detector state and gets its share of the rate limits.
+
+    Args:
+        config (dict): Loaded config.yaml.
+        outbox: EmailOutbox the emails are queued in (None if a digest is given).
+        router (SubscriptionRouter): Optional routing of the emails to subscribed stations.
+        digest: DigestCollector (or ShardSink) collecting the emails of the subscribed stations.
+        shard_index (int): Index of the shard, None if not sharded.
+        shard_count (int): Number of shards.
+
+    Raises:
+        ValueError: If a required setting is missing.
+    """
+    autobahn_client = create_autobahn_client(config, shard_count)
+    change_detector = ChangeDetector(shard_path(config.get("change_detector_state_path"), shard_index))
+    details_fetcher = None
+    if config.get("fetch_details", False):
+        details_fetcher = DetailsFetcher(autobahn_client, config.get("details_max_workers", 8))
+    archive = None
+    if config.get("incident_archive_path"):
+        archive = IncidentArchive(config.get("incident_archive_path"))
+
+    gemini_model = config.get("llm_model")
+    if not gemini_model:
+        raise ValueError("llm_model (Gemini) nicht in config.yaml gefunden.")
+    requests_per_minute = config.get("llm_requests_per_minute")
+    tokens_per_minute = config.get("llm_tokens_per_minute")
+    llm_cache = LLMResponseCache(config.get("llm_cache_path"), config.get("llm_cache_ttl", 900))
+    llm_handler = LLMApiHandler(gemini_model, config.get("llm_generation_config"), llm_cache,
+                                requests_per_minute=requests_per_minute / shard_count if requests_per_minute else None,
+                                tokens_per_minute=tokens_per_minute / shard_count if tokens_per_minute else None)
+
+    return DeploymentPipeline(config, autobahn_client, change_detector, llm_handler, outbox, details_fetcher, archive,
+                              router, digest)
+
+
+def create_scheduler(config, road_ids, run_cycle):
+    """
+    Creates the RoadScheduler of the highways with the settings of the "polling" section.
+    """
+    polling = config.get("polling") or {}
+    return RoadScheduler(
+        road_ids,
+        run_cycle,
+        default_interval=polling.get("default_interval", 300),
+        min_interval=polling.get("min_interval", 120),
+        max_interval=polling.get("max_interval", 1800),
+        road_intervals=polling.get("road_intervals"),
+        jitter=polling.get("jitter", 0.1),
+        workers=polling.get("workers", 4))
+
+
 def main():
     #1 Load Config
+    config_path = default_config_path()
+    try:
+        config = load_config(config_path)
+        print("Konfiguration erfolgreich geladen.")
+    except FileNotFoundError:
+        print(f"Fehler: Konfigurationsdatei '{config_path}' nicht gefunden.")
+        return
+    except ValueError as e:
+        print(f"Fehler beim Laden der Konfigurationsdatei: {e}")
+        return
+    configure_metrics(config)
+    shard_count = max(1, int(config.get("shards", 1)))
+
+    try:
+        #2 eMail Sender, emails of all shards are sent from this process
+        email_sender = EmailSender(config.get("smtp_server"), config.get("smtp_port"), config.get("smtp_username"),
+                                   config.get("smtp_password"), config.get("sender_email"), config.get("receiver_email"),
+                                   idle_timeout=config.get("smtp_idle_timeout", 60),
+                                   use_tls=config.get("smtp_use_tls", True))
+        outbox = EmailOutbox(email_sender, config.get("email_outbox_path", ".cache/outbox.sqlite3"),
+                             batch_size=config.get("email_batch_size", 20))
+        router = load_subscriptions(config)
+        digest = DigestCollector(outbox, config.get("digest_interval", 60)) if router is not None else None
 
-    #2 Autobahn API
+        #3 Autobahn API and LLM Handler, created by the shard processes if sharded
+        if shard_count > 1:
+            deployment = None
+            autobahn_client = create_autobahn_client(config)
+        else:
+            deployment = create_deployment(config, outbox, router, digest)
+            autobahn_client = deployment.autobahn_client
+    except ValueError as e:
+        print(f"Fehler bei der Initialisierung: {e}")
+        return
 
-    #3 LLM Handler
+    polling = config.get("polling") or {}
+    road_ids = polling.get("roads") or (router.road_ids() if router is not None else None)
+    if not road_ids:
+        roads = autobahn_client.get_available_roads()
+        if not roads:
+            print("Fehler: Liste der Autobahnen konnte nicht abgerufen werden.")
+            return
+        road_ids = roads["roads"]
 
-    #4 eMail Sender
+    if shard_count > 1:
+        runner = ShardCoordinator(config_path, road_ids, shard_count, outbox, digest,
+                                  late_followup=config.get("llm_late_followup", False))
+    else:
+        runner = create_scheduler(config, road_ids, deployment)
 
+    def shutdown(signum, frame):
+        print("Beende Abfrage...")
+        runner.stop()
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
 
-    pass
+    print(f"Starte automatische Abfrage von {len(road_ids)} Autobahnen.")
+    outbox.start()
+    if digest is not None:
+        digest.start()
+    if deployment is not None:
+        deployment.start()
+    runner.run()
+    if deployment is not None:
+        # the emails of highways already in the pipeline are still generated and queued
+        deployment.stop()
+    if digest is not None:
+        digest.stop()
+    outbox.stop()
+    export_metrics(config)
+    print("Autobahn-KI-Assistent beendet.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,123 @@
+import queue
+import threading
+from monitoring.metrics import metrics
+
+# Marks the end of the input of a stage, one per worker
+_STOP = object()
+
+
+class Stage:
+    def __init__(self, name, function, workers=1):
+        """
+        Step of a Pipeline.
+
+        Args:
+            name (str): Name used in messages and metrics (eg. "fetch").
+            function (callable): function(item) -> item for the next stage, or None to drop the item.
+            workers (int): Number of threads running this stage.
+        """
+        self.name = name
+        self.function = function
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+
+class Pipeline:
+    def __init__(self, stages, queue_size=8, on_drop=None):
+        """
+        Runs items through stages of worker threads connected by bounded queues.
+        Stages run concurrently, so the throughput is set by the slowest stage. If a stage falls behind,
+        its input queue fills up and blocks the stage before it (backpressure) instead of buffering without limit.
+
+        Args:
+            stages (list): Stages in processing order.
+            queue_size (int): Capacity of the queue in front of every stage.
+            on_drop (callable): Called with an item that was dropped by a stage or failed with an error.
+        """
+        self.stages = stages
+        self.on_drop = on_drop
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._threads = []
+        self._remaining_workers = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+
+    def start(self):
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{number + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, item, timeout=None):
+        """
+        Feeds an item into the first stage, blocks while the first queue is full.
+
+        Raises:
+            queue.Full: If timeout is given and the queue stayed full.
+        """
+        self._queues[0].put(item, timeout=timeout)
+
+    def _drop(self, item):
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            try:
+                with metrics.timer("pipeline_stage_seconds", stage=stage.name):
+                    result = stage.function(item)
+            except Exception as e:
+                print(f"Fehler in Stufe '{stage.name}': {e}")
+                with self._lock:
+                    stage.errors += 1
+                metrics.inc("pipeline_items_total", stage=stage.name, result="error")
+                self._drop(item)
+                continue
+
+            if result is None:
+                with self._lock:
+                    stage.dropped += 1
+                metrics.inc("pipeline_items_total", stage=stage.name, result="dropped")
+                self._drop(item)
+                continue
+            with self._lock:
+                stage.processed += 1
+            metrics.inc("pipeline_items_total", stage=stage.name, result="processed")
+            if outbox is not None:
+                # blocks while the next stage is behind
+                outbox.put(result)
+
+        # the last worker of a stage hands the end of the input on to the next stage
+        with self._lock:
+            self._remaining_workers[index] -= 1
+            last = self._remaining_workers[index] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_STOP)
+
+    def stop(self, timeout=None):
+        """
+        Stops accepting items and waits until the items already submitted have passed all stages.
+        """
+        for _ in range(self.stages[0].workers):
+            self._queues[0].put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns per stage the processed, dropped and failed items and the number of items waiting in front of it.
+        """
+        with self._lock:
+            return {stage.name: {"processed": stage.processed, "dropped": stage.dropped, "errors": stage.errors,
+                                 "queued": self._queues[index].qsize()}
+                    for index, stage in enumerate(self.stages)}
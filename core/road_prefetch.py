@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+
+class SelectionStats:
+    def __init__(self, path=None):
+        """
+        Counts how often operators select each highway.
+
+        Args:
+            path (str): Optional JSON file to persist the counts across sessions.
+        """
+        self.path = path
+        self.counts = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.counts = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading selection stats '{self.path}': {e}")
+
+    def record(self, road_id):
+        """
+        Increments the counter of a highway and persists the counts.
+        """
+        self.counts[road_id] = self.counts.get(road_id, 0) + 1
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.counts, f)
+        except OSError as e:
+            print(f"Error writing selection stats '{self.path}': {e}")
+
+    def order(self, road_ids):
+        """
+        Returns the highways sorted by selection count, most selected first (stable for equal counts).
+        """
+        return sorted(road_ids, key=lambda road_id: -self.counts.get(road_id, 0))
+
+
+class RoadPrefetcher:
+    def __init__(self, client, road_ids, stats=None):
+        """
+        Warms the client's response cache in the background, most selected highways first.
+
+        Args:
+            client (AutobahnApiClient): Client with a response cache.
+            road_ids (list): Highways to prefetch.
+            stats (SelectionStats): Optional selection counts used to order the highways.
+        """
+        self.client = client
+        self.road_ids = stats.order(road_ids) if stats else list(road_ids)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="road-prefetch", daemon=True)
+        self.client.reserve_connections(1)
+
+    def _run(self):
+        for road_id in self.road_ids:
+            if self._stop_event.is_set():
+                break
+            self.client.get_road_data(road_id)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the prefetch after the highway currently being fetched.
+        """
+        self._stop_event.set()
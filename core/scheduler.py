@@ -0,0 +1,104 @@
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RoadScheduler:
+    def __init__(self, road_ids, run_cycle, default_interval=300, min_interval=120, max_interval=1800,
+                 road_intervals=None, jitter=0.1, workers=4):
+        """
+        Polls every highway on its own interval. Highways with changes are polled more often
+        (down to min_interval), quiet highways less often (up to max_interval).
+        The next poll of a highway is scheduled when its cycle has finished, so slow cycles never pile up.
+
+        Args:
+            road_ids (list): Highways to poll.
+            run_cycle (callable): run_cycle(road_id) -> bool, True if the highway had changes.
+            default_interval (float): Initial interval in seconds.
+            min_interval (float): Shortest interval in seconds (hot highways).
+            max_interval (float): Longest interval in seconds (quiet highways).
+            road_intervals (dict): Fixed intervals for single highways, these are not adapted.
+            jitter (float): Random deviation of each interval as fraction (0.1 = +-10%).
+            workers (int): Maximum number of concurrent cycles.
+        """
+        self.run_cycle = run_cycle
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.road_intervals = road_intervals or {}
+        self.jitter = jitter
+        self.workers = max(1, workers)
+
+        self.intervals = {road_id: self.road_intervals.get(road_id, default_interval) for road_id in road_ids}
+        self._queue = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._free_workers = threading.Semaphore(self.workers)
+
+        # spread the first cycles over min_interval instead of starting all highways at once
+        now = time.monotonic()
+        for index, road_id in enumerate(road_ids):
+            self._push(now + self.min_interval * index / max(1, len(road_ids)), road_id)
+
+    def _push(self, next_run, road_id):
+        with self._lock:
+            heapq.heappush(self._queue, (next_run, road_id))
+        self._wakeup.set()
+
+    def _jittered(self, interval):
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _adapt(self, road_id, changed):
+        if road_id in self.road_intervals:
+            return self.road_intervals[road_id]
+        interval = self.intervals[road_id]
+        if changed:
+            interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * 1.5)
+        self.intervals[road_id] = interval
+        return interval
+
+    def _run(self, road_id):
+        changed = False
+        try:
+            changed = bool(self.run_cycle(road_id))
+        except Exception as e:
+            print(f"Fehler im Zyklus für {road_id}: {e}")
+        finally:
+            interval = self._adapt(road_id, changed)
+            self._push(time.monotonic() + self._jittered(interval), road_id)
+            self._free_workers.release()
+
+    def run(self):
+        """
+        Runs the scheduler until stop() is called.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="road-cycle") as executor:
+            while not self._stop_event.is_set():
+                self._wakeup.clear()
+                with self._lock:
+                    next_run, road_id = self._queue[0] if self._queue else (None, None)
+                    wait = None if next_run is None else next_run - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        heapq.heappop(self._queue)
+
+                if wait is None or wait > 0:
+                    self._wakeup.wait(timeout=wait)
+                    continue
+
+                # wait for a free worker instead of queueing cycles
+                while not self._free_workers.acquire(timeout=1):
+                    if self._stop_event.is_set():
+                        return
+                executor.submit(self._run, road_id)
+
+    def stop(self):
+        """
+        Stops the scheduler, running cycles are finished.
+        """
+        self._stop_event.set()
+        self._wakeup.set()
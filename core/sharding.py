@@ -0,0 +1,238 @@
+import itertools
+import os
+import signal
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from monitoring.metrics import metrics
+
+
+def shard_of(road_id, shard_count):
+    """
+    Returns the shard of a highway. crc32 is stable across processes and restarts, unlike hash().
+    """
+    return zlib.crc32(road_id.encode("utf-8")) % shard_count
+
+
+def partition(road_ids, shard_count):
+    """
+    Splits the highways into shard_count disjoint lists (see shard_of).
+    """
+    shards = [[] for _ in range(shard_count)]
+    for road_id in road_ids:
+        shards[shard_of(road_id, shard_count)].append(road_id)
+    return shards
+
+
+def shard_path(path, shard_index):
+    """
+    Returns the path of a per-shard file (eg. "state.sqlite3" -> "state.shard2.sqlite3"), the path itself if not sharded.
+    """
+    if not path or shard_index is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{shard_index + 1}{extension}"
+
+
+class ShardSink:
+    def __init__(self, shard_index, results):
+        """
+        Takes the place of the DigestCollector in a shard process: the emails are handed to the coordinator,
+        which queues them in the outbox or its digest, so emails of all shards are merged and sent by one process.
+
+        Args:
+            shard_index (int): Index of the shard.
+            results (multiprocessing.Queue): Queue read by the ShardCoordinator.
+        """
+        self.shard_index = shard_index
+        self.results = results
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, road_id, subject, body, recipients):
+        with self._lock:
+            entry_id = next(self._ids)
+        self.results.put(("email", self.shard_index, entry_id, road_id, subject, body, recipients))
+        return entry_id
+
+    def replace(self, entry_id, subject, body):
+        """
+        Hands a late LLM email to the coordinator, which replaces the queued email or sends a follow-up.
+        Returns None, the outcome is only known (and logged) by the coordinator.
+        """
+        self.results.put(("late", self.shard_index, entry_id, None, subject, body, None))
+        return None
+
+
+def run_shard(config_path, shard_index, shard_count, road_ids, results, stop_event):
+    """
+    Entry point of a shard process: polls its highways with its own DeploymentPipeline until stop_event is set.
+    The Autobahn response cache and the SQLite stores (LLM cache, incident archive) are shared with the
+    other shards, the change detector state and the metrics file are kept per shard.
+    """
+    # Ctrl+C reaches the whole process group, the shard is stopped by the coordinator instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from config import load_config
+    from core.main import create_deployment, create_scheduler
+    from email_notifier.subscriptions import load_subscriptions
+    from monitoring.metrics import configure as configure_metrics, export as export_metrics
+
+    config = dict(load_config(config_path))
+    config["metrics_path"] = shard_path(config.get("metrics_path"), shard_index)
+    configure_metrics(config)
+    try:
+        deployment = create_deployment(config, None, load_subscriptions(config), ShardSink(shard_index, results),
+                                       shard_index, shard_count)
+    except ValueError as e:
+        print(f"Fehler bei der Initialisierung von Shard {shard_index + 1}: {e}")
+        raise SystemExit(2)
+
+    scheduler = create_scheduler(config, road_ids, deployment)
+    threading.Thread(target=lambda: (stop_event.wait(), scheduler.stop()), daemon=True).start()
+
+    print(f"Shard {shard_index + 1}/{shard_count} startet mit {len(road_ids)} Autobahnen.")
+    deployment.start()
+    scheduler.run()
+    deployment.stop()
+    export_metrics(config)
+
+
+class ShardCoordinator:
+    def __init__(self, config_path, road_ids, shard_count, outbox, digest=None, late_followup=False,
+                 restart_delay=5, max_restart_delay=300, shutdown_timeout=120, target=run_shard):
+        """
+        Polls the highways in shard_count processes: the highways are hash partitioned (see shard_of),
+        each shard runs its own scheduler and pipeline on its own core. The coordinator merges the emails of
+        all shards into its outbox (or digest) and restarts shards which exit unexpectedly, with a growing delay
+        if a shard keeps failing. run() and stop() work like those of RoadScheduler.
+
+        Args:
+            config_path (str): Path of config.yaml, loaded by each shard.
+            road_ids (list): Highways to poll.
+            shard_count (int): Number of shard processes.
+            outbox (EmailOutbox): Outbox the emails are queued in.
+            digest (DigestCollector): Optional digest of the subscribed stations.
+            late_followup (bool): Send late LLM emails as follow-up if the template email was sent already.
+            restart_delay (float): Seconds until the first restart of a failed shard, doubled per consecutive failure.
+            max_restart_delay (float): Upper bound of the restart delay, a shard running that long counts as recovered.
+            shutdown_timeout (float): Seconds a shard gets to finish its pipeline on stop before it is terminated.
+            target (callable): Entry point of the shard processes, target(config_path, shard_index, shard_count,
+                road_ids, results, stop_event).
+        """
+        self.config_path = config_path
+        self.shard_count = shard_count
+        self.partitions = partition(road_ids, shard_count)
+        self.outbox = outbox
+        self.digest = digest
+        self.late_followup = late_followup
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.target = target
+
+        import multiprocessing  # only needed if sharded, keeps the CLI startup fast
+        # spawn instead of fork, the parent runs threads (outbox, digest) which must not be copied mid-operation
+        self._context = multiprocessing.get_context("spawn")
+        self.results = self._context.Queue()
+        self._shard_stop = self._context.Event()
+        self._stop_event = threading.Event()
+        self._processes = [None] * shard_count
+        self._started_at = [0.0] * shard_count
+        self._failures = [0] * shard_count
+        self._restart_at = [None] * shard_count
+        # {(shard_index, entry_id): (queued id, road_id, recipients)} for late LLM emails, oldest dropped first
+        self._entries = OrderedDict()
+        self._max_entries = 10000
+
+    def _start(self, index):
+        process = self._context.Process(
+            target=self.target, name=f"shard-{index + 1}",
+            args=(self.config_path, index, self.shard_count, self.partitions[index], self.results, self._shard_stop))
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        self._restart_at[index] = None
+
+    def _check(self, index):
+        process = self._processes[index]
+        now = time.monotonic()
+        if self._restart_at[index] is not None:
+            if now >= self._restart_at[index]:
+                self._start(index)
+            return
+        if process is None or process.is_alive():
+            return
+
+        if now - self._started_at[index] >= self.max_restart_delay:
+            self._failures[index] = 0
+        delay = min(self.max_restart_delay, self.restart_delay * 2 ** self._failures[index])
+        self._failures[index] += 1
+        self._restart_at[index] = now + delay
+        metrics.inc("shard_restarts_total", shard=index + 1)
+        print(f"Shard {index + 1} wurde unerwartet beendet (Exit-Code {process.exitcode}), Neustart in {delay:g} s.")
+
+    def _queue(self, road_id, subject, body, recipients):
+        if self.digest is not None:
+            return self.digest.add(road_id, subject, body, recipients)
+        return self.outbox.enqueue(subject, body)
+
+    def _handle(self, message):
+        kind, shard_index, entry_id, road_id, subject, body, recipients = message
+        key = (shard_index, entry_id)
+        if kind == "email":
+            self._entries[key] = (self._queue(road_id, subject, body, recipients), road_id, recipients)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        queued_id, road_id, recipients = entry
+        if (self.digest or self.outbox).replace(queued_id, subject, body):
+            print(f"Vorlagen-E-Mail für {road_id} durch die verspätete KI-E-Mail ersetzt.")
+        elif self.late_followup:
+            self._queue(road_id, f"Aktualisierung: {subject}", body, recipients)
+            print(f"Verspätete KI-E-Mail für {road_id} als Aktualisierung eingereiht.")
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            if message is None:
+                break
+            try:
+                self._handle(message)
+            except Exception as e:
+                print(f"Fehler beim Übernehmen einer E-Mail aus Shard {message[1] + 1}: {e}")
+
+    def run(self):
+        """
+        Starts the shards and supervises them until stop() is called.
+        """
+        collector = threading.Thread(target=self._collect, name="shard-results", daemon=True)
+        collector.start()
+        for index, road_ids in enumerate(self.partitions):
+            if road_ids:
+                self._start(index)
+
+        while not self._stop_event.wait(1):
+            for index in range(self.shard_count):
+                self._check(index)
+
+        # the shards finish the highways in their pipelines and hand over the remaining emails
+        self._shard_stop.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"Shard {index + 1} reagiert nicht, wird beendet.")
+                process.terminate()
+                process.join()
+        self.results.put(None)
+        collector.join()
+
+    def stop(self):
+        self._stop_event.set()
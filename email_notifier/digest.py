@@ -0,0 +1,116 @@
+import itertools
+import threading
+from monitoring.metrics import metrics
+
+
+class DigestCollector:
+    def __init__(self, outbox, interval=60):
+        """
+        Collects the emails of all highways for interval seconds and then queues one digest per distinct
+        set of highways: a recipient gets one email per interval with all of its highways, recipients with the
+        same highways share one email. Every highway email is generated once, no matter how many recipients it has.
+        Emails not yet flushed are kept in memory only (at most interval seconds).
+
+        Args:
+            outbox (EmailOutbox): Outbox the digests are queued in.
+            interval (float): Seconds between two digests.
+        """
+        self.outbox = outbox
+        self.interval = interval
+        # {entry_id: (road_id, subject, body, recipients)} in arrival order
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, road_id, subject, body, recipients):
+        """
+        Adds the email of a highway to the next digest.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            subject (str): Subject of the highway email.
+            body (str): Content of the highway email.
+            recipients (list): Addresses subscribed to the highway.
+
+        Returns:
+            int: ID of the entry (see replace).
+        """
+        with self._lock:
+            entry_id = next(self._ids)
+            self._pending[entry_id] = (road_id, subject, body, tuple(recipients))
+        return entry_id
+
+    def replace(self, entry_id, subject, body):
+        """
+        Replaces the email of a highway which hasn't been flushed yet.
+
+        Returns:
+            bool: True if the email was replaced, False if it is part of a flushed digest.
+        """
+        with self._lock:
+            entry = self._pending.get(entry_id)
+            if entry is None:
+                return False
+            self._pending[entry_id] = (entry[0], subject, body, entry[3])
+        return True
+
+    @staticmethod
+    def _compose(entries):
+        if len(entries) == 1:
+            _, subject, body, _ = entries[0]
+            return subject, body
+        road_ids = list(dict.fromkeys(road_id for road_id, _, _, _ in entries))
+        subject = f"Einsatzhinweise {', '.join(road_ids)}"
+        sections = [f"=== {entry_subject} ===\n\n{body.strip()}" for _, entry_subject, body, _ in entries]
+        return subject, "\n\n".join(sections)
+
+    def flush(self):
+        """
+        Queues the collected emails as digests in the outbox.
+
+        Returns:
+            int: Number of queued digests.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        by_recipient = {}
+        for entry_id, (_, _, _, recipients) in pending.items():
+            for email in recipients:
+                by_recipient.setdefault(email, []).append(entry_id)
+        # recipients with the same highways share one email
+        by_entries = {}
+        for email, entry_ids in by_recipient.items():
+            by_entries.setdefault(tuple(entry_ids), []).append(email)
+
+        for entry_ids, emails in by_entries.items():
+            subject, body = self._compose([pending[entry_id] for entry_id in entry_ids])
+            self.outbox.enqueue(subject, body, ", ".join(sorted(emails)))
+        metrics.inc("digest_emails_total", len(by_entries))
+        metrics.observe("digest_recipients", len(by_recipient))
+        return len(by_entries)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        """
+        Starts flushing every interval seconds in the background.
+        """
+        self._thread = threading.Thread(target=self._run, name="email-digest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the background flushing and queues the remaining emails.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
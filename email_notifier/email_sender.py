@@ -2,13 +2,17 @@ import smtplib
 from email.mime.text import MIMEText
 from email.header import Header
 import os
-import yaml
-from dotenv import load_dotenv
+import threading
+import time
+from config import load_config
+from monitoring.metrics import metrics
 
 class EmailSender:
-    def __init__(self, smtp_server, smtp_port, smtp_username, smtp_password, sender_email, receiver_email):
+    def __init__(self, smtp_server, smtp_port, smtp_username, smtp_password, sender_email, receiver_email, idle_timeout=60,
+                 use_tls=True):
         """
         Initializes the email sender.
+        The SMTP connection is kept alive between emails and reestablished after idle_timeout or if it dropped.
 
         Args:
             smtp_server (str): Address of the SMTP server (eg. "smtp.gmail.com").
@@ -17,6 +21,8 @@ class EmailSender:
             smtp_password (str): App-Password for SMTP authentication. (App-password recommended!).
             sender_email (str): The sender email address.
             receiver_email (str): The recipient email address (highway police).
+            idle_timeout (float): Seconds after which an unused connection is closed.
+            use_tls (bool): Upgrade the connection with STARTTLS (disable only for local test servers).
         """
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
@@ -24,55 +30,121 @@ class EmailSender:
         # self.smtp_password = smtp_password # use .env
         self.sender_email = sender_email
         self.receiver_email = receiver_email
+        self.idle_timeout = idle_timeout
+        self.use_tls = use_tls
 
+        self._server = None
+        self._last_used = 0
+        self._lock = threading.Lock()
+
+        from dotenv import load_dotenv  # imported on first use, keeps the CLI startup fast
         load_dotenv()
         self.smtp_password = os.environ.get("SMTP_PASSWORD")
         if not self.smtp_password:
             raise ValueError("The environment variable SMTP_PASSWORD is not set.")
-        
 
-    def send_email(self, subject, body):
+    def _connect(self):
+        # For TLS (port 587) use start_tls()
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _connection(self):
+        """
+        Returns the open SMTP connection, reconnects if it was idle for too long or dropped.
+        """
+        if self._server is not None:
+            idle = time.monotonic() - self._last_used
+            try:
+                if idle > self.idle_timeout or self._server.noop()[0] != 250:
+                    self._disconnect()
+            except smtplib.SMTPException:
+                self._disconnect()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        except OSError:
+            pass
+        self._server = None
+
+    def close(self):
+        """
+        Closes the SMTP connection.
+        """
+        with self._lock:
+            self._disconnect()
+
+    def send_email(self, subject, body, receiver_email=None):
         """
         Sends an email with the specified subject and content.
 
         Args:
             subject (str): Subject of the email.
             body (str): Content of the email.
+            receiver_email (str): Optional recipients separated by commas, defaults to the receiver_email of the sender.
+                Several recipients get a single message.
 
         Returns:
             bool: True, if the email was sent successfully, otherwise False.
         """
+        receiver_email = receiver_email or self.receiver_email
+        recipients = [address.strip() for address in receiver_email.split(",") if address.strip()]
         msg = MIMEText(body, 'plain', 'utf-8')
         msg['From'] = self.sender_email
-        msg['To'] = self.receiver_email
+        msg['To'] = receiver_email
         msg['Subject'] = Header(subject, 'utf-8')
 
-        try:
-            # Establish connection to the SMTP server
-            # For TLS (port 587) use start_tls()
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.sendmail(self.sender_email, self.receiver_email, msg.as_string())
-            print(f"E-Mail '{subject}' erfolgreich an {self.receiver_email} gesendet.")
-            return True
-        except smtplib.SMTPAuthenticationError as e:
-            print(f"Fehler bei der SMTP-Authentifizierung: Überprüfen Sie Benutzername und Passwort. Details: {e}")
-            return False
-        except smtplib.SMTPConnectError as e:
-            print(f"Fehler beim Verbinden mit dem SMTP-Server: Überprüfen Sie Serveradresse und Port. Details: {e}")
-            return False
-        except Exception as e:
-            print(f"Ein unerwarteter Fehler ist beim E-Mail-Versand aufgetreten: {e}")
-            return False
+        metrics.observe("email_body_chars", len(body))
+        with self._lock, metrics.timer("email_send_seconds"):
+            try:
+                try:
+                    self._connection().sendmail(self.sender_email, recipients, msg.as_string())
+                except smtplib.SMTPServerDisconnected:
+                    # the server closed the kept-alive connection, retry once with a new one
+                    metrics.inc("smtp_reconnects_total")
+                    if self._server is not None:
+                        self._server.close()
+                        self._server = None
+                    self._connection().sendmail(self.sender_email, recipients, msg.as_string())
+                self._last_used = time.monotonic()
+                metrics.inc("emails_total", result="sent")
+                print(f"E-Mail '{subject}' erfolgreich an {receiver_email} gesendet.")
+                return True
+            except smtplib.SMTPAuthenticationError as e:
+                print(f"Fehler bei der SMTP-Authentifizierung: Überprüfen Sie Benutzername und Passwort. Details: {e}")
+                metrics.inc("emails_total", result="auth_error")
+                self._disconnect()
+                return False
+            except smtplib.SMTPConnectError as e:
+                print(f"Fehler beim Verbinden mit dem SMTP-Server: Überprüfen Sie Serveradresse und Port. Details: {e}")
+                metrics.inc("emails_total", result="connect_error")
+                self._disconnect()
+                return False
+            except Exception as e:
+                print(f"Ein unerwarteter Fehler ist beim E-Mail-Versand aufgetreten: {e}")
+                metrics.inc("emails_total", result="error")
+                self._disconnect()
+                return False
 
 if __name__ == "__main__":
     # To test email functionality
     # Make sure your config.yaml is filled out correctly and the email account details are valid.
 
-    config_path = os.path.join(os.getcwd(), "config", "config.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = load_config()
 
     # Read email config from YAML
     smtp_server = config.get("smtp_server")
@@ -100,4 +172,5 @@ if __name__ == "__main__":
         if email_sender.send_email(test_subject, test_body):
             print("Test-E-Mail-Versand erfolgreich abgeschlossen.")
         else:
-            print("Test-E-Mail-Versand fehlgeschlagen. Fehlermeldungen überprüfen.")
\ No newline at end of file
+            print("Test-E-Mail-Versand fehlgeschlagen. Fehlermeldungen überprüfen.")
+        email_sender.close()
\ No newline at end of file
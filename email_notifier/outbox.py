@@ -0,0 +1,155 @@
+import random
+import sqlite3
+import threading
+import time
+from common.sqlite import execute, prepare, write
+
+
+class EmailOutbox:
+    def __init__(self, email_sender, db_path, batch_size=20, max_attempts=5, poll_interval=5):
+        """
+        Persistent outbox: emails are queued in a SQLite database and sent in batches by a background worker
+        over the sender's kept-alive connection. Failed emails are retried with exponential backoff,
+        queued emails survive restarts.
+
+        Args:
+            email_sender (EmailSender): Sender used for the delivery.
+            db_path (str): Path of the SQLite database of the queue.
+            batch_size (int): Maximum number of emails sent per batch.
+            max_attempts (int): Number of attempts before an email is marked as failed.
+            poll_interval (float): Seconds between two checks for due emails.
+        """
+        self.email_sender = email_sender
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        # emails replaced while queued, the batch being sent may hold their old content
+        self._replaced = {}
+        self._sending = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        prepare(self.db_path)
+        execute(
+            self.db_path,
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT NOT NULL, body TEXT NOT NULL, receiver_email TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL, failed INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def enqueue(self, subject, body, receiver_email=None):
+        """
+        Queues an email and returns immediately.
+
+        Args:
+            subject (str): Subject of the email.
+            body (str): Content of the email.
+            receiver_email (str): Optional recipient, defaults to the receiver_email of the sender.
+
+        Returns:
+            int: ID of the queued email (see replace).
+        """
+        message_id, _ = write(self.db_path,
+                              "INSERT INTO outbox (subject, body, receiver_email, next_attempt) VALUES (?, ?, ?, ?)",
+                              (subject, body, receiver_email, time.time()))
+        self._wakeup.set()
+        return message_id
+
+    def replace(self, message_id, subject, body):
+        """
+        Replaces the content of a queued email which hasn't been sent yet.
+
+        Args:
+            message_id (int): ID returned by enqueue.
+            subject (str): New subject.
+            body (str): New content.
+
+        Returns:
+            bool: True if the email was replaced, False if it is already sent, being sent or failed.
+        """
+        with self._lock:
+            if message_id == self._sending:
+                return False
+            _, updated = write(self.db_path, "UPDATE outbox SET subject = ?, body = ? WHERE id = ? AND failed = 0",
+                               (subject, body, message_id))
+            if updated:
+                self._replaced[message_id] = (subject, body)
+        return bool(updated)
+
+    def pending(self):
+        """
+        Returns the number of queued emails (without failed ones).
+        """
+        return execute(self.db_path, "SELECT COUNT(*) FROM outbox WHERE failed = 0")[0][0]
+
+    def _backoff(self, attempts):
+        return min(2 ** attempts * 10, 600) * random.uniform(0.8, 1.2)
+
+    def send_due(self):
+        """
+        Sends the due emails in batches until none is left.
+
+        Returns:
+            int: Number of emails sent.
+        """
+        sent = 0
+        while not self._stop_event.is_set():
+            batch = execute(
+                self.db_path,
+                "SELECT id, subject, body, receiver_email, attempts FROM outbox "
+                "WHERE failed = 0 AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size))
+            if not batch:
+                break
+            for message_id, subject, body, receiver_email, attempts in batch:
+                with self._lock:
+                    self._sending = message_id
+                    subject, body = self._replaced.pop(message_id, (subject, body))
+                try:
+                    delivered = self.email_sender.send_email(subject, body, receiver_email)
+                    if delivered:
+                        execute(self.db_path, "DELETE FROM outbox WHERE id = ?", (message_id,))
+                finally:
+                    with self._lock:
+                        self._sending = None
+                if delivered:
+                    sent += 1
+                elif attempts + 1 >= self.max_attempts:
+                    print(f"E-Mail '{subject}' nach {attempts + 1} Versuchen endgültig fehlgeschlagen.")
+                    execute(self.db_path, "UPDATE outbox SET attempts = ?, failed = 1 WHERE id = ?",
+                            (attempts + 1, message_id))
+                else:
+                    execute(self.db_path, "UPDATE outbox SET attempts = ?, next_attempt = ? WHERE id = ?",
+                            (attempts + 1, time.time() + self._backoff(attempts), message_id))
+        return sent
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            try:
+                self.send_due()
+            except sqlite3.Error as e:
+                print(f"Fehler beim Zugriff auf den E-Mail-Postausgang: {e}")
+            self._wakeup.wait(timeout=self.poll_interval)
+        self.email_sender.close()
+
+    def start(self):
+        """
+        Starts the background worker.
+        """
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=30):
+        """
+        Stops the background worker, unsent emails stay queued for the next start.
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
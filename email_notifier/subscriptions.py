@@ -0,0 +1,95 @@
+from autobahn_api.spatial_index import haversine_km
+
+
+class Subscription:
+    def __init__(self, email, roads=None, region=None, name=None):
+        """
+        Highways and/or region a recipient (eg. a police station) is responsible for.
+
+        Args:
+            email (str): Address of the recipient.
+            roads (list): IDs of the highways (eg. ["A8", "A81"]).
+            region (dict): {"lat": ..., "lon": ..., "radius_km": ...}, highways with an incident within
+                the radius are routed to the recipient as well.
+            name (str): Optional name used in messages (eg. "PR Stuttgart").
+        """
+        self.email = email
+        self.roads = frozenset(roads or ())
+        self.region = region
+        self.name = name or email
+
+    def in_region(self, incidents):
+        """
+        Returns True if any of the normalized incidents lies within the region.
+        """
+        if not self.region:
+            return False
+        lat, lon = float(self.region["lat"]), float(self.region["lon"])
+        radius_km = float(self.region.get("radius_km", 50))
+        return any(incident.has_position and haversine_km(lat, lon, incident.lat, incident.lon) <= radius_km
+                   for incident in incidents)
+
+
+class SubscriptionRouter:
+    def __init__(self, subscriptions):
+        """
+        Routes the email of a highway to the subscribed recipients.
+
+        Args:
+            subscriptions (list): Subscriptions of all recipients.
+        """
+        self.subscriptions = subscriptions
+        # {road_id: [subscription]}, region subscriptions are checked per email
+        self._by_road = {}
+        for subscription in subscriptions:
+            for road_id in subscription.roads:
+                self._by_road.setdefault(road_id, []).append(subscription)
+        self._regional = [subscription for subscription in subscriptions if subscription.region]
+
+    def road_ids(self):
+        """
+        Returns the highways subscribed by ID, None if any recipient subscribed a region (all highways are needed).
+        """
+        if self._regional:
+            return None
+        return sorted(self._by_road)
+
+    def recipients(self, road_id, incidents=()):
+        """
+        Returns the addresses subscribed to a highway directly or through a region containing one of its incidents.
+
+        Args:
+            road_id (str): ID of the highway (eg. "A8").
+            incidents (list): Normalized incidents of the email.
+
+        Returns:
+            list: Sorted addresses without duplicates.
+        """
+        emails = {subscription.email for subscription in self._by_road.get(road_id, ())}
+        for subscription in self._regional:
+            if subscription.email not in emails and subscription.in_region(incidents):
+                emails.add(subscription.email)
+        return sorted(emails)
+
+
+def load_subscriptions(config):
+    """
+    Creates the router from the "subscriptions" section of the config.
+
+    Returns:
+        SubscriptionRouter: The router or None if no subscriptions are configured.
+
+    Raises:
+        ValueError: If a subscription has no email or neither roads nor region.
+    """
+    entries = config.get("subscriptions")
+    if not entries:
+        return None
+    subscriptions = []
+    for entry in entries:
+        if not entry.get("email"):
+            raise ValueError(f"Abonnement ohne email: {entry}")
+        if not entry.get("roads") and not entry.get("region"):
+            raise ValueError(f"Abonnement von {entry['email']} ohne roads oder region.")
+        subscriptions.append(Subscription(entry["email"], entry.get("roads"), entry.get("region"), entry.get("name")))
+    return SubscriptionRouter(subscriptions)
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+
+# Histogram buckets for durations in seconds and for sizes in characters
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_start")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, TIME_BUCKETS, **self._labels)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_key(labels):
+    # label values are kept as strings, so series with eg. status=200 and status="error" stay sortable
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        """
+        Thread-safe registry of counters and histograms (timers are histograms of seconds).
+        While disabled every call returns immediately, so the instrumentation can stay in the hot paths.
+
+        Args:
+            enabled (bool): Record metrics.
+        """
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increases the counter name with the given labels by value.
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=SIZE_BUCKETS, **labels):
+        """
+        Records value in the histogram name with the given labels.
+        The buckets of the first observation are kept for the metric.
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def timer(self, name, **labels):
+        """
+        Context manager recording the duration of its block in seconds in the histogram name.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Returns all metrics as JSON serializable dict.
+
+        Returns:
+            dict: {"counters": [...], "histograms": [...]} with name, labels and values of each series.
+        """
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                           "buckets": dict(zip(map(str, h.buckets), h.cumulative_counts()))}
+                          for (name, labels), h in sorted(self._histograms.items())]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(h.buckets, h.cumulative_counts()):
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {h.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Writes the metrics to path, as JSON for ".json" files, otherwise in the Prometheus text format
+        (eg. for the textfile collector of the node exporter). The file is replaced atomically.
+        """
+        content = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with self._write_lock:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+
+
+# Process-wide registry used by the instrumented modules, disabled until configure() enables it
+metrics = Metrics()
+
+
+def configure(config):
+    """
+    Enables the process-wide metrics if "metrics_enabled" is set in the config.
+    """
+    if config.get("metrics_enabled", False):
+        metrics.enable()
+    else:
+        metrics.disable()
+    return metrics
+
+
+def export(config):
+    """
+    Writes the process-wide metrics to "metrics_path" of the config if they are enabled.
+    """
+    if not metrics.enabled:
+        return
+    try:
+        metrics.write(config.get("metrics_path", ".cache/metrics.prom"))
+    except OSError as e:
+        print(f"Error writing the metrics: {e}")
+
+
+if __name__ == "__main__":
+    demo = Metrics(enabled=True)
+    for status in (200, 200, 304, 500):
+        demo.inc("autobahn_requests_total", service="warning", status=status)
+    with demo.timer("llm_generate_seconds", model="gemini-pro"):
+        time.sleep(0.01)
+    demo.observe("llm_prompt_chars", 4200)
+    print(demo.to_prometheus())
+    print(demo.to_json())
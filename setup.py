@@ -6,11 +6,12 @@ setup(
     description="LLM integration for Autobahn police information system",
     author="IBlacKxFalcoNI",
     author_email="your.email@example.com",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     install_requires=[
         "PyYAML>=6.0",  # Config
         "requests>=2.31.0",  # HTTP and API
         "openai>=1.17.1",  # LLM
+        "numpy>=1.24",  # Hotspot scoring
     ],
     python_requires=">=3.9",
 )
\ No newline at end of file
@@ -1,14 +1,13 @@
-import yaml
+from config import load_config as load_cached_config
 
 def load_config(filepath="config/config.yaml"):
     """Loads Config from YAML-File."""
     try:
-        with open(filepath, "r") as f:
-            return yaml.safe_load(f)
+        return load_cached_config(filepath)
     except FileNotFoundError:
         print(f"Error: Configfile '{filepath}' not found.")
         return None
-    except yaml.YAMLError as e:
+    except ValueError as e:
         print(f"Error while loading config file '{filepath}': {e}")
         return None
 
@@ -19,4 +18,4 @@ if __name__ == "__main__":
         if autobahn_url:
             print(f"The Autobahn API URL is: {autobahn_url}")
         else:
-            print("The 'autobahn_api_url' was not found in the config.")
\ No newline at end of file
+            print("The 'autobahn_api_url' was not found in the config.")
@@ -0,0 +1,110 @@
+from unittest import mock
+
+import requests
+
+from autobahn_api.autobahn_api_client import AutobahnApiClient
+from autobahn_api.resilience import CircuitBreaker
+
+
+def _response(data, status_code=200):
+    response = mock.Mock(status_code=status_code, headers={}, content=b"{}")
+    response.json.return_value = data
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _client():
+    return AutobahnApiClient("http://autobahn.test", max_retries=0, failure_threshold=1, reset_timeout=0)
+
+
+def test_unexpected_request_error_returns_none():
+    client = _client()
+    with mock.patch.object(client.session, "get", side_effect=requests.exceptions.TooManyRedirects("loop")):
+        assert client.get_roadworks("A8") is None
+
+
+def test_half_open_trial_with_unexpected_error_reopens_circuit():
+    client = _client()
+    breaker = client._breaker("roadworks")
+    with mock.patch.object(client.session, "get", side_effect=requests.exceptions.ConnectionError("down")):
+        assert client.get_roadworks("A8") is None
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # the trial request fails with an error that is not retried
+    with mock.patch.object(client.session, "get", side_effect=requests.exceptions.TooManyRedirects("loop")):
+        assert client.get_roadworks("A8") is None
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # the next trial is let through again and closes the circuit
+    with mock.patch.object(client.session, "get", return_value=_response({"roadworks": []})):
+        assert client.get_roadworks("A8") == {"roadworks": []}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_exception_during_trial_still_records_failure():
+    client = _client()
+    breaker = client._breaker("warning")
+    breaker.record_failure()
+    with mock.patch.object(client, "_request", side_effect=RuntimeError("bug")):
+        try:
+            client.get_warnings("A8")
+        except RuntimeError:
+            pass
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+
+
+def test_connection_pool_covers_all_pools_sharing_the_session(caplog):
+    from concurrent.futures import ThreadPoolExecutor
+    from autobahn_api.details_fetcher import DetailsFetcher
+    from benchmarks.stub_autobahn_api import StubAutobahnApi, make_network
+
+    with StubAutobahnApi(make_network(4, 2), latency=0.05) as api:
+        client = AutobahnApiClient(api.url, max_workers=2)
+        fetcher = DetailsFetcher(client, max_workers=4)
+        client.reserve_connections(2)
+        assert client.session.get_adapter(api.url)._pool_maxsize == 8
+
+        # all 8 threads send their requests at the same time, none of the connections may be discarded
+        with caplog.at_level("WARNING", logger="urllib3.connectionpool"):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda _: client.get_roadworks("A1"), range(32)))
+        fetcher.close()
+    assert "Connection pool is full" not in caplog.text
+
+
+def test_bad_reply_serves_stale_data(tmp_path):
+    from autobahn_api.response_cache import ResponseCache
+
+    client = AutobahnApiClient("http://autobahn.test", cache=ResponseCache(str(tmp_path), {"roadworks": 0}),
+                               max_retries=0)
+    with mock.patch.object(client.session, "get", return_value=_response({"roadworks": [{"identifier": "rw1"}]})):
+        assert client.get_roadworks("A8") == {"roadworks": [{"identifier": "rw1"}]}
+
+    not_found = _response(None, status_code=404)
+    not_found.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found")
+    with mock.patch.object(client.session, "get", return_value=not_found):
+        assert client.get_roadworks("A8") == {"roadworks": [{"identifier": "rw1"}]}
+
+    invalid = _response(None)
+    invalid.json.side_effect = ValueError("Expecting value")
+    with mock.patch.object(client.session, "get", return_value=invalid):
+        assert client.get_roadworks("A8") == {"roadworks": [{"identifier": "rw1"}]}
+
+
+def test_get_all_data_with_duplicate_roads():
+    client = _client()
+    with mock.patch.object(client, "get_available_roads", return_value={"roads": ["A8", "A1", "A8"]}), \
+            mock.patch.object(client, "get_road_data", side_effect=lambda road_id: {"roadworks": [road_id]}) as get:
+        assert client.get_all_data() == {"A8": {"roadworks": ["A8"]}, "A1": {"roadworks": ["A1"]}}
+        assert get.call_count == 2
+        assert list(client.get_all_data(parallel=False)) == ["A8", "A1"]
+
+
+def test_reserve_connections_closes_the_replaced_adapter():
+    client = _client()
+    previous = client.session.get_adapter("http://autobahn.test")
+    with mock.patch.object(previous, "close") as close:
+        client.reserve_connections(4)
+    close.assert_called_once_with()
+    assert client.session.get_adapter("https://autobahn.test")._pool_maxsize == client.max_workers + 4
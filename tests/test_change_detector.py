@@ -0,0 +1,93 @@
+import sqlite3
+
+from autobahn_api.change_detector import ChangeDetector
+
+A8 = {"roadworks": [{"identifier": "rw1", "title": "A8 | Fahrbahnerneuerung"}], "warning": [], "closure": []}
+A81 = {"roadworks": [], "warning": [{"identifier": "warn1", "title": "A81 | Stau"}], "closure": []}
+
+
+def _rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return dict(connection.execute("SELECT road_id, snapshot FROM road_snapshots"))
+    finally:
+        connection.close()
+
+
+def test_save_writes_only_the_changed_highway(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    detector = ChangeDetector(path)
+    detector.update("A8", A8)
+    detector.update("A81", A81)
+    detector.save("A8")
+    assert list(_rows(path)) == ["A8"]
+    # only keys and hashes are stored, not the payloads
+    assert "Fahrbahnerneuerung" not in _rows(path)["A8"]
+
+    restarted = ChangeDetector(path)
+    assert not restarted.update("A8", A8).has_changes()
+    assert restarted.update("A81", A81).has_changes()
+
+
+def test_changes_are_reported_after_restart_until_saved(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    detector = ChangeDetector(path)
+    detector.update("A8", A8)
+    detector.save()
+
+    changed = {**A8, "closure": [{"identifier": "clos1", "title": "A8 | Vollsperrung"}]}
+    assert detector.update("A8", changed).has_changes()
+    assert ChangeDetector(path).update("A8", changed).new["closure"] == changed["closure"]
+
+    detector.save("A8")
+    assert not ChangeDetector(path).update("A8", changed).has_changes()
+
+
+def test_rollback_reports_the_changes_again():
+    detector = ChangeDetector()
+    detector.update("A8", A8)
+    changed = {**A8, "roadworks": [{"identifier": "rw1", "title": "A8 | Vollsperrung"}]}
+
+    changes = detector.update("A8", changed)
+    assert changes.changed["roadworks"] == changed["roadworks"]
+    detector.rollback(changes)
+    assert detector.update("A8", changed).changed["roadworks"] == changed["roadworks"]
+    assert not detector.update("A8", changed).has_changes()
+
+    resolved = detector.update("A8", {"roadworks": []})
+    assert resolved.resolved["roadworks"] == ["rw1"]
+
+
+def test_changes_are_kept_when_the_email_fails(tmp_path):
+    from unittest import mock
+    from core.main import DeploymentPipeline
+
+    class Outbox:
+        def __init__(self):
+            self.subjects = []
+
+        def enqueue(self, subject, body, receiver_email=None):
+            self.subjects.append(subject)
+            return len(self.subjects)
+
+    path = str(tmp_path / "state.sqlite3")
+    client = mock.Mock()
+    client.get_road_data.return_value = A8
+    detector = ChangeDetector(path)
+    outbox = Outbox()
+    llm_handler = mock.Mock()
+
+    # without llm_deadline_seconds there is no template email, the job is dropped
+    llm_handler.generate_response.return_value = None
+    deployment = DeploymentPipeline({}, client, detector, llm_handler, outbox).start()
+    assert deployment("A8")
+    deployment.stop()
+    assert outbox.subjects == []
+    assert ChangeDetector(path).update("A8", A8).has_changes()
+
+    llm_handler.generate_response.return_value = "Einsatzhinweis A8: Baustelle\n\nText"
+    deployment = DeploymentPipeline({}, client, detector, llm_handler, outbox).start()
+    assert deployment("A8")
+    deployment.stop()
+    assert outbox.subjects == ["Einsatzhinweis A8: Baustelle"]
+    assert not ChangeDetector(path).update("A8", A8).has_changes()
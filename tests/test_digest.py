@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+
+from autobahn_api.incidents import Incident
+from email_notifier.digest import DigestCollector
+from email_notifier.subscriptions import Subscription, SubscriptionRouter, load_subscriptions
+
+# Stuttgart
+REGION = {"lat": 48.78, "lon": 9.18, "radius_km": 20}
+
+
+def test_recipients_with_the_same_highways_share_one_digest():
+    outbox = mock.Mock()
+    digest = DigestCollector(outbox)
+    digest.add("A8", "Einsatzhinweis A8", "Text A8\n", ["b@example.com", "a@example.com"])
+    digest.add("A81", "Einsatzhinweis A81", "Text A81", ["a@example.com", "b@example.com", "c@example.com"])
+    digest.add("A7", "Einsatzhinweis A7", "Text A7", ["d@example.com"])
+
+    assert digest.flush() == 3
+    queued = {call.args[2]: call.args[:2] for call in outbox.enqueue.call_args_list}
+    assert queued["a@example.com, b@example.com"] == (
+        "Einsatzhinweise A8, A81", "=== Einsatzhinweis A8 ===\n\nText A8\n\n=== Einsatzhinweis A81 ===\n\nText A81")
+    # a single highway keeps its subject and content
+    assert queued["c@example.com"] == ("Einsatzhinweis A81", "Text A81")
+    assert queued["d@example.com"] == ("Einsatzhinweis A7", "Text A7")
+
+    assert digest.flush() == 0
+    assert outbox.enqueue.call_count == 3
+
+
+def test_replace_before_the_flush_only():
+    outbox = mock.Mock()
+    digest = DigestCollector(outbox)
+    entry_id = digest.add("A8", "Einsatzhinweis A8 (Vorlage)", "Vorlage", ["a@example.com"])
+    assert digest.replace(entry_id, "Einsatzhinweis A8", "KI-E-Mail")
+    digest.flush()
+    outbox.enqueue.assert_called_once_with("Einsatzhinweis A8", "KI-E-Mail", "a@example.com")
+    assert not digest.replace(entry_id, "Einsatzhinweis A8", "zu spät")
+
+
+def test_router_routes_by_road_and_region():
+    router = SubscriptionRouter([
+        Subscription("b@example.com", roads=["A8", "A81"]),
+        Subscription("a@example.com", roads=["A8"], region=REGION),
+        Subscription("c@example.com", region=REGION),
+    ])
+    in_stuttgart = [Incident("A81", "closure", "c1", lat=48.80, lon=9.20)]
+    in_munich = [Incident("A81", "closure", "c2", lat=48.14, lon=11.58), Incident("A81", "warning", "w1")]
+
+    # sorted, a recipient subscribed by road and region is listed once
+    assert router.recipients("A8", in_stuttgart) == ["a@example.com", "b@example.com", "c@example.com"]
+    assert router.recipients("A81", in_stuttgart) == ["a@example.com", "b@example.com", "c@example.com"]
+    assert router.recipients("A81", in_munich) == ["b@example.com"]
+    assert router.recipients("A7") == []
+    # regional recipients need all highways
+    assert router.road_ids() is None
+    assert SubscriptionRouter([Subscription("b@example.com", roads=["A81", "A8"])]).road_ids() == ["A8", "A81"]
+
+
+def test_load_subscriptions_validates_entries():
+    assert load_subscriptions({}) is None
+    assert load_subscriptions({"subscriptions": []}) is None
+
+    router = load_subscriptions({"subscriptions": [{"email": "a@example.com", "roads": ["A8"], "name": "PR Stuttgart"},
+                                                   {"email": "c@example.com", "region": REGION}]})
+    assert [subscription.name for subscription in router.subscriptions] == ["PR Stuttgart", "c@example.com"]
+
+    with pytest.raises(ValueError):
+        load_subscriptions({"subscriptions": [{"roads": ["A8"]}]})
+    with pytest.raises(ValueError):
+        load_subscriptions({"subscriptions": [{"email": "a@example.com"}]})
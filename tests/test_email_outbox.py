@@ -0,0 +1,80 @@
+import smtplib
+import time
+from unittest import mock
+
+from benchmarks.smtp_sink import SMTPSink
+from email_notifier.email_sender import EmailSender
+from email_notifier.outbox import EmailOutbox
+
+
+def _sender(sink, monkeypatch, idle_timeout=60):
+    monkeypatch.setenv("SMTP_PASSWORD", "secret")
+    host, port = sink.address
+    return EmailSender(host, port, "user", None, "sender@example.com", "police@example.com",
+                       idle_timeout=idle_timeout, use_tls=False)
+
+
+def test_connection_is_kept_alive(monkeypatch):
+    with SMTPSink() as sink:
+        sender = _sender(sink, monkeypatch)
+        with mock.patch.object(sender, "_connect", wraps=sender._connect) as connect:
+            assert sender.send_email("Einsatzhinweis A8", "Text")
+            assert sender.send_email("Einsatzhinweis A9", "Text")
+        sender.close()
+    assert connect.call_count == 1
+    assert sink.messages == 2
+
+
+def test_idle_and_dropped_connections_are_reestablished(monkeypatch):
+    with SMTPSink() as sink:
+        sender = _sender(sink, monkeypatch, idle_timeout=0)
+        with mock.patch.object(sender, "_connect", wraps=sender._connect) as connect:
+            assert sender.send_email("Einsatzhinweis A8", "Text")
+            assert sender.send_email("Einsatzhinweis A9", "Text")
+            assert connect.call_count == 2
+
+            # the server closes the connection while sending, the email is sent again over a new one
+            sender.idle_timeout = 60
+            dropped = mock.Mock(side_effect=smtplib.SMTPServerDisconnected("closed"))
+            with mock.patch.object(sender._server, "sendmail", dropped):
+                assert sender.send_email("Einsatzhinweis A1", "Text")
+            assert connect.call_count == 3
+        sender.close()
+    assert sink.messages == 3
+
+
+def test_failed_emails_are_retried_until_max_attempts(tmp_path):
+    sender = mock.Mock()
+    sender.send_email.return_value = False
+    outbox = EmailOutbox(sender, str(tmp_path / "outbox.sqlite3"), max_attempts=3)
+    outbox.enqueue("Einsatzhinweis A8", "Text")
+
+    assert outbox.send_due() == 0
+    # the retry waits for the backoff
+    assert outbox.send_due() == 0
+    assert sender.send_email.call_count == 1
+    assert outbox.pending() == 1
+
+    for later in (1000, 3000):
+        with mock.patch("email_notifier.outbox.time.time", return_value=time.time() + later):
+            outbox.send_due()
+    assert sender.send_email.call_count == 3
+    # marked as failed after the third attempt
+    assert outbox.pending() == 0
+    with mock.patch("email_notifier.outbox.time.time", return_value=time.time() + 10000):
+        assert outbox.send_due() == 0
+    assert sender.send_email.call_count == 3
+
+
+def test_queued_emails_survive_a_restart(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    EmailOutbox(mock.Mock(), path).enqueue("Einsatzhinweis A8", "Text", "station@example.com")
+
+    sender = mock.Mock()
+    sender.send_email.return_value = True
+    outbox = EmailOutbox(sender, path, batch_size=1)
+    outbox.enqueue("Einsatzhinweis A9", "Text")
+    assert outbox.send_due() == 2
+    assert sender.send_email.call_args_list == [mock.call("Einsatzhinweis A8", "Text", "station@example.com"),
+                                                mock.call("Einsatzhinweis A9", "Text", None)]
+    assert outbox.pending() == 0
@@ -0,0 +1,103 @@
+import threading
+from unittest import mock
+
+from LLM_integration.hedged_generation import HedgedGenerator
+from LLM_integration.template_email import render_template_email
+from email_notifier.outbox import EmailOutbox
+
+
+def test_llm_text_is_used_within_the_deadline():
+    generator = HedgedGenerator(deadline=5)
+    fallback = mock.Mock(return_value="Vorlage")
+    assert generator.generate(lambda: "KI-E-Mail", fallback) == ("KI-E-Mail", False)
+    fallback.assert_not_called()
+    generator.close()
+
+
+def test_fallback_on_timeout_and_late_text_is_delivered():
+    generator = HedgedGenerator(deadline=0.05)
+    release = threading.Event()
+    delivered = threading.Event()
+    late = []
+
+    def slow():
+        release.wait(5)
+        return "KI-E-Mail"
+
+    def on_late(text):
+        late.append(text)
+        delivered.set()
+
+    assert generator.generate(slow, lambda: "Vorlage", on_late) == ("Vorlage", True)
+    assert not late
+    release.set()
+    assert delivered.wait(5)
+    assert late == ["KI-E-Mail"]
+    generator.close()
+
+
+def test_fallback_on_error_or_empty_answer():
+    generator = HedgedGenerator(deadline=5)
+
+    def failing():
+        raise RuntimeError("quota exceeded")
+
+    assert generator.generate(failing, lambda: "Vorlage") == ("Vorlage", True)
+    assert generator.generate(lambda: None, lambda: "Vorlage") == ("Vorlage", True)
+    generator.close()
+
+
+def test_fallback_right_away_while_max_pending_requests_run():
+    generator = HedgedGenerator(deadline=0.05, max_pending=1)
+    release = threading.Event()
+    assert generator.generate(lambda: release.wait(5) and "KI-E-Mail", lambda: "Vorlage") == ("Vorlage", True)
+
+    queued = mock.Mock(return_value="KI-E-Mail")
+    assert generator.generate(queued, lambda: "Vorlage") == ("Vorlage", True)
+    queued.assert_not_called()
+
+    release.set()
+    generator.close()
+
+
+def test_outbox_replace_only_before_sending(tmp_path):
+    sender = mock.Mock()
+    sender.send_email.side_effect = [True, False]
+    outbox = EmailOutbox(sender, str(tmp_path / "outbox.sqlite3"), max_attempts=1)
+
+    message_id = outbox.enqueue("Einsatzhinweis A8 (Vorlage)", "Vorlage")
+    assert outbox.replace(message_id, "Einsatzhinweis A8", "KI-E-Mail")
+    assert outbox.send_due() == 1
+    sender.send_email.assert_called_once_with("Einsatzhinweis A8", "KI-E-Mail", None)
+    # already sent
+    assert not outbox.replace(message_id, "Einsatzhinweis A8", "zu spät")
+
+    failed_id = outbox.enqueue("Einsatzhinweis A9", "Vorlage")
+    assert outbox.send_due() == 0
+    assert not outbox.replace(failed_id, "Einsatzhinweis A9", "zu spät")
+
+
+def test_template_email_is_deterministic():
+    closures = [{"title": "A8 | Stuttgart - München", "subtitle": "AS Leonberg-Ost", "isBlocked": "true",
+                 "description": ["Vollsperrung"], "routeRecommendation": ["U12"]}]
+    warnings = [{"title": "A8 | Ulm", "delayTimeValue": "5"},
+                {"title": "A8 | Karlsruhe", "delayTimeValue": "25", "description": ["Stau"]}]
+    roadworks = [{"title": "A8 | Pforzheim"}]
+    hotspots = [(2.345, closures[0])]
+
+    email = render_template_email("A8", roadworks, warnings, closures, hotspots)
+    assert email == render_template_email("A8", roadworks, warnings, closures, hotspots)
+    assert email.startswith("Einsatzhinweis A8: 1 Sperrung, 2 Verkehrsmeldungen und 1 Baustelle\n")
+
+    lines = [line for line in email.splitlines() if line.startswith("* ")]
+    assert lines == ["* Sperrung: A8 | Stuttgart - München | AS Leonberg-Ost – gesperrt; Vollsperrung",
+                     "* Verkehrsmeldung: A8 | Karlsruhe – 25 min Verzögerung; Stau",
+                     "* Verkehrsmeldung: A8 | Ulm – 5 min Verzögerung",
+                     "* Baustelle: A8 | Pforzheim"]
+    assert "    * Umleitung: U12" in email
+    assert "Nächstgelegener Einsatzort: A8 | Stuttgart - München | AS Leonberg-Ost (2.3 km entfernt)." in email
+
+    truncated = render_template_email("A8", roadworks, warnings, closures, max_items=2)
+    assert "* ... sowie 2 weitere Meldung(en)." in truncated
+    assert "Vorrangig die zuerst genannten Meldungen prüfen" in truncated
+    assert render_template_email("A8", [], [], []).startswith("Einsatzhinweis A8: keine neuen Meldungen\n")
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from autobahn_api.hotspot_scoring import cluster_incidents, local_density, score_incidents, select_top_incidents
+from autobahn_api.incidents import Incident, normalize_all_data
+from autobahn_api.spatial_index import haversine_km
+from benchmarks.stub_autobahn_api import make_network
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+def _incident(identifier, service="warning", lat=48.78, lon=9.18, **fields):
+    return Incident("A8", service, identifier, title=identifier, lat=lat, lon=lon, **fields)
+
+
+def test_scores_follow_service_blocking_recency_and_future():
+    # far apart, so the density is the same for all
+    incidents = [
+        _incident("closure", "closure", lat=48.0),
+        _incident("warning", "warning", lat=49.0),
+        _incident("roadworks", "roadworks", lat=50.0),
+        _incident("blocked", "roadworks", lat=51.0, is_blocked=True),
+        _incident("future", "closure", lat=52.0, future=True),
+        _incident("recent", "roadworks", lat=53.0, start_time=NOW - timedelta(hours=1)),
+        _incident("old", "roadworks", lat=54.0, start_time=NOW - timedelta(days=10)),
+    ]
+    scores = dict(zip((i.identifier for i in incidents), score_incidents(incidents, NOW)))
+    assert scores["closure"] > scores["warning"] > scores["roadworks"]
+    assert scores["blocked"] > scores["roadworks"]
+    assert scores["future"] < scores["closure"]
+    assert scores["recent"] > scores["roadworks"] > scores["old"]
+    assert len(score_incidents([], NOW)) == 0
+
+
+def test_local_density_matches_brute_force():
+    incidents = normalize_all_data(make_network(4, 25)) + [_incident("no position", lat=None, lon=None)]
+    lat = np.array([i.lat if i.lat is not None else np.nan for i in incidents])
+    lon = np.array([i.lon if i.lon is not None else np.nan for i in incidents])
+
+    expected = [0 if not a.has_position else
+                sum(1 for b in incidents if b is not a and b.has_position and haversine_km(a.lat, a.lon, b.lat, b.lon) <= 50)
+                for a in incidents]
+    assert local_density(lat, lon, radius_km=50, block_size=16).tolist() == expected
+
+
+def test_nearby_incidents_are_clustered():
+    incidents = [
+        _incident("a", "closure", lat=48.780, lon=9.180),
+        _incident("b", lat=48.785, lon=9.185),
+        _incident("c", lat=49.500, lon=8.500),
+        _incident("d", lat=None, lon=None),
+    ]
+    scores = score_incidents(incidents, NOW)
+    clusters = cluster_incidents(incidents, scores, radius_km=2.0)
+
+    assert sorted(sorted(members) for _, members in clusters) == [[0, 1], [2], [3]]
+    assert [score for score, _ in clusters] == sorted((score for score, _ in clusters), reverse=True)
+    assert clusters[0][1] == [0, 1]
+
+
+def test_select_top_incidents_keeps_the_best_clusters():
+    incidents = [
+        _incident("closure", "closure", lat=48.780),
+        _incident("warning", "warning", lat=48.781),
+        _incident("roadworks", "roadworks", lat=50.0),
+    ]
+    roadworks, warnings, closures = select_top_incidents(incidents, top_n=1, now=NOW)
+    assert (roadworks, [i.identifier for i in warnings], [i.identifier for i in closures]) == ([], ["warning"], ["closure"])
@@ -0,0 +1,74 @@
+from autobahn_api.incident_archive import IncidentArchive
+
+DAY = 86400
+T0 = 1_700_000_000.0
+
+
+def _road(closures=(), warnings=()):
+    return {"roadworks": [], "warning": list(warnings), "closure": list(closures)}
+
+
+def _closure(identifier, title, subtitle=""):
+    return {"identifier": identifier, "title": title, "subtitle": subtitle, "isBlocked": "true"}
+
+
+def test_unchanged_poll_writes_nothing(tmp_path):
+    archive = IncidentArchive(str(tmp_path / "incidents.sqlite3"))
+    road_data = _road([_closure("c1", "A8 | Kreuz Stuttgart")])
+    assert archive.record("A8", road_data, fetched_at=T0) == 1
+    assert archive.record("A8", road_data, fetched_at=T0 + 60) == 0
+
+    # a restarted archive loads the current versions from the database
+    restarted = IncidentArchive(archive.db_path)
+    assert restarted.record("A8", road_data, fetched_at=T0 + 120) == 0
+    assert len(restarted.history("A8")) == 1
+
+
+def test_changed_incident_appends_version_and_missing_incident_is_resolved(tmp_path):
+    archive = IncidentArchive(str(tmp_path / "incidents.sqlite3"))
+    archive.record("A8", _road([_closure("c1", "A8 | Kreuz Stuttgart"), _closure("c2", "A8 | Ulm")]), fetched_at=T0)
+    archive.record("A8", _road([_closure("c1", "A8 | Kreuz Stuttgart", "Vollsperrung")]), fetched_at=T0 + 60)
+
+    c1 = archive.history("A8", identifier="c1")
+    assert [version["version"] for version in c1] == [1, 2]
+    assert c1[0]["valid_to"] == T0 + 60 and not c1[0]["resolved"]
+    assert c1[1]["valid_to"] is None and c1[1]["data"]["subtitle"] == "Vollsperrung"
+    assert c1[1]["is_blocked"] is True
+
+    c2 = archive.history("A8", identifier="c2")
+    assert len(c2) == 1
+    assert c2[0]["resolved"] and c2[0]["valid_to"] == T0 + 60
+
+    # versions which ended before the range are left out
+    assert [version["version"] for version in archive.history("A8", identifier="c1", start=T0 + 61)] == [2]
+
+
+def test_missing_service_is_left_untouched(tmp_path):
+    archive = IncidentArchive(str(tmp_path / "incidents.sqlite3"))
+    archive.record("A8", _road([_closure("c1", "A8 | Ulm")]), fetched_at=T0)
+    # eg. the closure request failed: the closure stays open
+    archive.record("A8", {"roadworks": [], "warning": []}, fetched_at=T0 + 60)
+    assert not archive.history("A8", identifier="c1")[0]["resolved"]
+    assert archive.history("A8", identifier="c1")[0]["valid_to"] is None
+
+
+def test_count_new_and_frequent_segments_respect_time_range(tmp_path):
+    archive = IncidentArchive(str(tmp_path / "incidents.sqlite3"))
+    archive.record("A8", _road([_closure("old", "A8 | Ulm")]), fetched_at=T0 - 10 * DAY)
+    archive.record("A8", _road([_closure("c1", "A8 | Ulm")], [{"identifier": "w1", "title": "A8 | Stau"}]),
+                   fetched_at=T0 - DAY)
+    archive.record("A8", _road([_closure("c2", "A8 | Ulm")]), fetched_at=T0 - DAY / 2)
+    archive.record("A8", _road([_closure("c2", "A8 | Ulm", "geändert"), _closure("c3", "A8 | Kreuz Stuttgart")]),
+                   fetched_at=T0)
+    archive.record("A81", _road([_closure("x1", "A81 | Ulm")]), fetched_at=T0)
+
+    # changed versions (c2 version 2) and other highways are not counted as new
+    assert archive.count_new("A8", T0 - 2 * DAY, T0) == {"roadworks": 0, "warning": 1, "closure": 3}
+    assert archive.count_new("A8", T0 - 20 * DAY, T0)["closure"] == 4
+    assert archive.frequent_segments("A8", "closure", T0 - 2 * DAY, T0) == [("A8 | Ulm", 2),
+                                                                           ("A8 | Kreuz Stuttgart", 1)]
+    assert archive.frequent_segments("A8", "closure", T0 - 2 * DAY, T0, top=1) == [("A8 | Ulm", 2)]
+
+    summary = archive.trend_summary("A8", days=2, now=T0)
+    assert "3 Sperrungen" in summary and "A8 | Ulm (2x)" in summary
+    assert archive.trend_summary("A8", days=1, now=T0 - 5 * DAY) == ""
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+from unittest import mock
+
+from LLM_integration.response_cache import LLMResponseCache
+
+
+def _rows(db_path):
+    connection = sqlite3.connect(db_path)
+    try:
+        return [key for (key,) in connection.execute("SELECT key FROM responses ORDER BY key")]
+    finally:
+        connection.close()
+
+
+def test_expired_responses_are_removed_on_startup(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    cache = LLMResponseCache(db_path, ttl=60)
+    with mock.patch("time.time", return_value=time.time() - 120):
+        cache.put("old", "response")
+    cache.put("new", "response")
+
+    LLMResponseCache(db_path, ttl=60)
+    assert _rows(db_path) == ["new"]
+
+
+def test_expired_response_is_deleted_on_lookup(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    cache = LLMResponseCache(db_path, ttl=60)
+    cache.put("key", "response")
+
+    reopened = LLMResponseCache(db_path, ttl=60)
+    with mock.patch("time.time", return_value=time.time() + 120):
+        assert reopened.get("key") is None
+    assert _rows(db_path) == []
+
+
+def test_put_evicts_expired_responses_once_per_ttl(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    cache = LLMResponseCache(db_path, ttl=60)
+    cache.put("first", "response")
+    with mock.patch("time.time", return_value=time.time() + 120):
+        cache.put("second", "response")
+    assert _rows(db_path) == ["second"]
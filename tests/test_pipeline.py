@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from core.pipeline import Pipeline, Stage
+
+
+def test_items_pass_all_stages_and_stop_drains_them():
+    results = []
+    pipeline = Pipeline([
+        Stage("double", lambda item: item * 2, workers=3),
+        Stage("collect", lambda item: results.append(item) or item, workers=2),
+    ], queue_size=2).start()
+    for item in range(50):
+        pipeline.submit(item)
+    pipeline.stop()
+
+    assert sorted(results) == [item * 2 for item in range(50)]
+    assert all(not thread.is_alive() for thread in pipeline._threads)
+    assert pipeline.stats()["collect"]["processed"] == 50
+
+
+def test_dropped_and_failed_items_are_handed_to_on_drop():
+    dropped = []
+
+    def check(item):
+        if item == 3:
+            raise ValueError("broken")
+        return item if item % 2 == 0 else None
+
+    results = []
+    pipeline = Pipeline([Stage("check", check), Stage("collect", results.append)],
+                        on_drop=dropped.append).start()
+    for item in range(6):
+        pipeline.submit(item)
+    pipeline.stop()
+
+    # the last stage returns None as well, every item ends in on_drop
+    assert results == [0, 2, 4]
+    assert sorted(dropped) == [0, 1, 2, 3, 4, 5]
+    stats = pipeline.stats()
+    assert (stats["check"]["dropped"], stats["check"]["errors"], stats["check"]["processed"]) == (2, 1, 3)
+
+
+def test_slow_stage_holds_back_the_input():
+    release = threading.Event()
+    pipeline = Pipeline([Stage("fast", lambda item: item), Stage("slow", lambda item: release.wait() and item)],
+                        queue_size=1).start()
+
+    # one item in each worker and one in each queue, then the first queue stays full
+    submitted = 0
+    with pytest.raises(queue.Full):
+        for item in range(10):
+            pipeline.submit(item, timeout=0.2)
+            submitted += 1
+    assert submitted == 4
+
+    release.set()
+    time.sleep(0.05)
+    pipeline.submit(99, timeout=1)
+    pipeline.stop()
+    assert pipeline.stats()["slow"]["processed"] == 5
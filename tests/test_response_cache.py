@@ -0,0 +1,44 @@
+import os
+import time
+
+from autobahn_api.response_cache import ResponseCache
+
+
+def test_old_files_are_pruned_on_open(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age=60)
+    cache.put("http://autobahn.test/details/warning/old", {"identifier": "old"})
+    cache.put("http://autobahn.test/details/warning/new", {"identifier": "new"})
+    old_path = cache._path("http://autobahn.test/details/warning/old")
+    two_minutes_ago = time.time() - 120
+    os.utime(old_path, (two_minutes_ago, two_minutes_ago))
+
+    reopened = ResponseCache(str(tmp_path), max_age=60)
+    assert not os.path.exists(old_path)
+    assert reopened.get("http://autobahn.test/details/warning/old") is None
+    assert reopened.get("http://autobahn.test/details/warning/new").data == {"identifier": "new"}
+
+
+def test_stale_files_younger_than_max_age_are_kept(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttls={"warning": 1})
+    cache.put("http://autobahn.test/A8/services/warning", {"warning": []})
+    ten_minutes_ago = time.time() - 600
+    os.utime(cache._path("http://autobahn.test/A8/services/warning"), (ten_minutes_ago, ten_minutes_ago))
+
+    assert ResponseCache(str(tmp_path), ttls={"warning": 1}).prune() == 0
+
+
+def test_leftover_temporary_files_are_removed(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://autobahn.test/A8/services/warning", {"warning": []})
+    leftover = tmp_path / "0123.json.1.2.tmp"
+    leftover.write_text("{")
+    two_minutes_ago = time.time() - 120
+    os.utime(leftover, (two_minutes_ago, two_minutes_ago))
+    in_progress = tmp_path / "4567.json.1.2.tmp"
+    in_progress.write_text("{")
+
+    assert cache.prune() == 1
+    assert not leftover.exists() and in_progress.exists()
+
+    cache.clear()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from core.scheduler import RoadScheduler
+
+
+def _run_until(scheduler, condition, timeout=10):
+    runner = threading.Thread(target=scheduler.run)
+    runner.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "condition not reached"
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+        runner.join()
+
+
+def test_intervals_adapt_to_changes():
+    scheduler = RoadScheduler(["A1", "A8", "A9"], lambda road_id: road_id == "A1", default_interval=300,
+                              min_interval=120, max_interval=600, road_intervals={"A9": 60})
+    for _ in range(3):
+        for road_id in ("A1", "A8", "A9"):
+            scheduler._free_workers.acquire()
+            scheduler._run(road_id)
+
+    # hot highways are polled more often, quiet ones less often, fixed intervals stay
+    assert scheduler.intervals == {"A1": 120, "A8": 600, "A9": 60}
+
+
+def test_failing_cycle_keeps_the_highway_scheduled():
+    counts = {"A1": 0, "A8": 0}
+    lock = threading.Lock()
+
+    def run_cycle(road_id):
+        with lock:
+            counts[road_id] += 1
+        if road_id == "A1":
+            raise RuntimeError("API down")
+        return False
+
+    scheduler = RoadScheduler(list(counts), run_cycle, default_interval=0.01, min_interval=0.01,
+                              max_interval=0.02, jitter=0)
+    _run_until(scheduler, lambda: min(counts.values()) >= 3)
+    assert scheduler.intervals["A1"] == 0.02
+
+
+def test_concurrent_cycles_are_limited_to_workers():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def run_cycle(road_id):
+        with lock:
+            running.append(road_id)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(road_id)
+        return True
+
+    road_ids = [f"A{number}" for number in range(1, 9)]
+    scheduler = RoadScheduler(road_ids, run_cycle, default_interval=0.01, min_interval=0.01, jitter=0, workers=2)
+    _run_until(scheduler, lambda: len(peak) >= 16)
+    assert max(peak) == 2
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+from autobahn_api.change_detector import ChangeDetector
+from benchmarks.stub_autobahn_api import StubAutobahnApi, make_network
+from core.sharding import ShardCoordinator, partition, shard_of, shard_path
+
+
+class _Outbox:
+    def __init__(self):
+        self.subjects = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, subject, body, receiver_email=None):
+        with self._lock:
+            self.subjects.append(subject)
+            return len(self.subjects)
+
+    def replace(self, message_id, subject, body):
+        return False
+
+
+def _crashing_shard(work_dir, shard_index, shard_count, road_ids, results, stop_event):
+    """
+    Polls its highways once per start. The first start of shard 1 is killed without a clean stop
+    after its emails were handed over, the restarted shard polls the same unchanged highways again.
+    """
+    from autobahn_api.autobahn_api_client import AutobahnApiClient
+    from benchmarks.fake_llm import FakeLLMApiHandler
+    from core.main import DeploymentPipeline
+    from core.sharding import ShardSink
+
+    change_detector = ChangeDetector(shard_path(os.path.join(work_dir, "state.sqlite3"), shard_index))
+    deployment = DeploymentPipeline({}, AutobahnApiClient(os.environ["STUB_AUTOBAHN_URL"]), change_detector,
+                                    FakeLLMApiHandler(latency=0), None, digest=ShardSink(shard_index, results)).start()
+    changed = sum(deployment(road_id) for road_id in road_ids)
+    while deployment.pipeline.stats()["send"]["processed"] < changed:
+        time.sleep(0.01)
+
+    crash_flag = os.path.join(work_dir, "crashed")
+    if shard_index == 0 and not os.path.exists(crash_flag):
+        open(crash_flag, "w").close()
+        results.close()
+        results.join_thread()
+        os._exit(3)
+
+    open(os.path.join(work_dir, f"done{shard_index}"), "w").close()
+    stop_event.wait()
+    deployment.stop()
+
+
+def test_partition_is_stable_and_disjoint():
+    road_ids = [f"A{number}" for number in range(1, 60)]
+    shards = partition(road_ids, 4)
+    assert sorted(sum(shards, [])) == sorted(road_ids)
+    assert all(shard_of(road_id, 4) == index for index, shard in enumerate(shards) for road_id in shard)
+
+
+def test_killed_shard_does_not_resend_changes(tmp_path, monkeypatch):
+    network = make_network(6, 2)
+    outbox = _Outbox()
+    with StubAutobahnApi(network, latency=0) as stub:
+        monkeypatch.setenv("STUB_AUTOBAHN_URL", stub.url)
+        coordinator = ShardCoordinator(str(tmp_path), list(network), 2, outbox, restart_delay=0.1,
+                                       target=_crashing_shard)
+        runner = threading.Thread(target=coordinator.run)
+        runner.start()
+        try:
+            deadline = time.monotonic() + 60
+            while not all((tmp_path / f"done{index}").exists() for index in range(2)):
+                assert time.monotonic() < deadline, "shards did not finish"
+                time.sleep(0.05)
+            time.sleep(0.5)
+        finally:
+            coordinator.stop()
+            runner.join()
+
+    assert (tmp_path / "crashed").exists()
+    assert sorted(outbox.subjects) == sorted(set(outbox.subjects))
+    assert len(outbox.subjects) == len(network)
+
+
+def test_late_email_of_a_shard_is_decided_by_the_coordinator(tmp_path, capsys):
+    import queue
+    from unittest import mock
+    from core.main import DeploymentPipeline, RoadJob
+    from core.sharding import ShardSink
+
+    results = queue.Queue()
+    sink = ShardSink(0, results)
+    deployment = DeploymentPipeline({"llm_late_followup": True}, mock.Mock(), ChangeDetector(), None, None,
+                                    digest=sink)
+    job = RoadJob("A8")
+    job.message_id = sink.add("A8", "Einsatzhinweis A8: Vorlage", "Vorlage", ["a@example.com"])
+    deployment.on_late_email(job, "Einsatzhinweis A8: KI\n\nText")
+
+    messages = [results.get_nowait() for _ in range(results.qsize())]
+    assert [message[0] for message in messages] == ["email", "late"]
+    assert "ersetzt" not in capsys.readouterr().out
+
+    # the template email was sent already, the coordinator sends the follow-up and logs it
+    outbox = _Outbox()
+    coordinator = ShardCoordinator(str(tmp_path), ["A8"], 1, outbox, late_followup=True)
+    for message in messages:
+        coordinator._handle(message)
+    assert outbox.subjects == ["Einsatzhinweis A8: Vorlage", "Aktualisierung: Einsatzhinweis A8: KI"]
+    output = capsys.readouterr().out
+    assert "Aktualisierung" in output and "ersetzt" not in output
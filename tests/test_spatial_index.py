@@ -0,0 +1,73 @@
+from unittest import mock
+
+from autobahn_api.change_detector import ChangeDetector
+from autobahn_api.incidents import normalize_all_data, normalize_road_data
+from autobahn_api.spatial_index import SpatialIndex, haversine_km, rank_hotspots
+from benchmarks.stub_autobahn_api import make_network
+from core.main import DeploymentPipeline, RoadJob
+
+POSITION = {"lat": 48.78, "lon": 9.18}
+
+
+def _distances(results):
+    return [round(distance, 9) for distance, _ in results]
+
+
+def test_rank_hotspots_matches_brute_force():
+    incidents = normalize_all_data(make_network(10, 20))
+
+    expected = sorted(haversine_km(48.78, 9.18, incident.lat, incident.lon)
+                      for incident in incidents if incident.has_position)[:5]
+    hotspots = rank_hotspots(incidents, POSITION, 5)
+    assert [distance for distance, _ in hotspots] == expected
+
+
+def test_rank_hotspots_without_position():
+    assert rank_hotspots([], None) is None
+    assert rank_hotspots([], POSITION) == []
+
+
+def test_network_queries_match_brute_force():
+    network = make_network(20, 30)
+    incidents = [incident for incident in normalize_all_data(network) if incident.has_position]
+    index = SpatialIndex.from_road_data(network)
+    assert len(index) == len(incidents)
+
+    for radius_km in (5, 40, 150):
+        expected = sorted(haversine_km(48.78, 9.18, incident.lat, incident.lon) for incident in incidents
+                          if haversine_km(48.78, 9.18, incident.lat, incident.lon) <= radius_km)
+        assert _distances(index.radius_query(48.78, 9.18, radius_km)) == [round(d, 9) for d in expected]
+
+    expected = {(i.road_id, i.service, i.identifier) for i in incidents if 48.0 <= i.lat <= 49.5 and 8.0 <= i.lon <= 10.0}
+    assert {(i.road_id, i.service, i.identifier) for i in index.bbox_query(48.0, 8.0, 49.5, 10.0)} == expected
+
+    expected = sorted(haversine_km(52.5, 13.4, incident.lat, incident.lon) for incident in incidents)[:7]
+    assert _distances(index.nearest(52.5, 13.4, 7)) == [round(d, 9) for d in expected]
+
+
+def test_update_road_replaces_the_incidents_of_a_highway():
+    network = make_network(3, 10)
+    index = SpatialIndex.from_road_data(network)
+
+    index.update_road("A1", normalize_road_data("A1", {"warning": []}), ["warning"])
+    remaining = [incident for incident in normalize_all_data(network)
+                 if not (incident.road_id == "A1" and incident.service == "warning")]
+    assert len(index) == len(remaining)
+    assert {(i.road_id, i.identifier) for i in index.bbox_query(-90, -180, 90, 180)} == \
+           {(i.road_id, i.identifier) for i in remaining}
+
+
+def test_pipeline_adds_incidents_of_other_highways_around_the_patrol():
+    network = make_network(5, 20)
+    config = {"patrol_position": POSITION, "patrol_radius_km": 120, "hotspot_count": 3}
+    deployment = DeploymentPipeline(config, mock.Mock(), ChangeDetector(), None, None)
+    for road_id, road_data in network.items():
+        job = RoadJob(road_id)
+        job.road_data = road_data
+        deployment.normalize(job)
+
+    others = [incident for incident in normalize_all_data(network) if incident.road_id != "A1"]
+    expected = sorted(d for d in (haversine_km(48.78, 9.18, i.lat, i.lon) for i in others) if d <= 120)[:3]
+    nearby = deployment.nearby_incidents("A1")
+    assert expected and _distances(nearby) == [round(d, 9) for d in expected]
+    assert all(incident.road_id != "A1" for _, incident in nearby)